@@ -1,10 +1,48 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, Response, render_template, request, jsonify, send_file, send_from_directory
+import json
+import multiprocessing
 import os
-import uuid
 import time
 from werkzeug.utils import secure_filename
-from scripts.tts_generate import generate_tts
-from scripts.wav2lip_run import run_wav2lip
+
+# Run as a script, app.run(debug=True) re-executes this file in a child process that
+# serves requests (WERKZEUG_RUN_MAIN=true). Only that process starts the worker pool,
+# the janitor and preloading, not the reloader's watcher or the pipeline workers that
+# re-import this module
+SERVING_PROCESS = multiprocessing.parent_process() is None and (
+    __name__ != '__main__' or os.environ.get('WERKZEUG_RUN_MAIN') == 'true')
+
+# Metric files left by an earlier run or a respawned process would otherwise be summed
+# into /metrics; they have to go before prometheus_client is imported
+if SERVING_PROCESS and os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    os.makedirs(metrics_dir, exist_ok=True)
+    for name in os.listdir(metrics_dir):
+        if name.endswith('.db'):
+            os.remove(os.path.join(metrics_dir, name))
+
+from scripts.device_detection import get_optimal_device
+from scripts.model_manager import get_tts_model_manager
+from scripts.tts_cache import get_tts_cache
+from scripts.face_cache import get_face_cache
+from scripts.image_normalize import normalize_image, ImageNormalizeError, NORMALIZED_EXTENSION
+from scripts.http_cache import file_etag, IMMUTABLE_MAX_AGE
+from scripts.pipeline import run_pipeline
+from scripts.result_index import get_result_index, make_result_fingerprint, hash_file
+from scripts.cost_model import get_cost_model, estimate_pipeline_seconds
+from scripts.tts_generate import get_tortoise_version
+from scripts.job_queue import JobManager, QueueFullError, JOB_COMPLETED, JOB_FAILED
+from scripts.scheduling import create_scheduling_policy, SCHEDULING_POLICY
+from scripts.wav2lip_run import HLS_PLAYLIST, get_wav2lip_options
+from scripts.worker_pool import create_worker_pool
+from scripts.workspace import new_job_id, JobWorkspace, WORK_FOLDER
+from scripts.metrics import render_metrics, STAGE_UPLOAD_SAVE
+from scripts.tracing import JobTrace, trace_stage
+from scripts.tts_presets import parse_tts_settings, get_preset_timings, TTSSettingsError, TTS_PARAM_LIMITS
+from scripts.voice_library import get_voice_library, compute_conditioning_latents, DEFAULT_VOICE
+from scripts.batch_generate import make_batch_items, submit_batch, iter_batch_results, BATCH_MAX_ITEMS
+from scripts.janitor import (StorageJanitor, FileLeases, touch_file, UPLOAD_TTL_HOURS, AUDIO_TTL_HOURS,
+                             VIDEO_TTL_HOURS, STREAM_TTL_HOURS, DOWNLOAD_GRACE_SECONDS)
 
 app = Flask(__name__)
 
@@ -13,100 +51,544 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['AUDIO_FOLDER'] = 'audio'
 app.config['VIDEO_FOLDER'] = 'video'
+app.config['STREAM_FOLDER'] = 'streams'
+app.config['WORK_FOLDER'] = WORK_FOLDER
+app.config['JOB_WORKERS'] = int(os.environ.get('FACE_GEN_JOB_WORKERS', '1'))
+# Renders allowed to wait for a worker; more are refused with 429 (0 = unbounded)
+app.config['MAX_QUEUED_JOBS'] = int(os.environ.get('FACE_GEN_MAX_QUEUED_JOBS', '32'))
+# Which queued render a free worker takes next: 'fifo', 'sjf' or 'fair'
+app.config['SCHEDULER'] = SCHEDULING_POLICY
+# Speech goes from TTS to Wav2Lip in memory; the WAV is only an optional artifact
+app.config['KEEP_AUDIO'] = os.environ.get('FACE_GEN_KEEP_AUDIO', '1') == '1'
+# Identical /generate requests are answered with the video rendered the first time
+app.config['RESULT_DEDUP'] = os.environ.get('FACE_GEN_RESULT_DEDUP', '1') == '1'
+# Identical requests arriving while one is queued or running share its job
+app.config['COALESCE_REQUESTS'] = os.environ.get('FACE_GEN_COALESCE_REQUESTS', '1') == '1'
 
 # Ensure directories exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 os.makedirs(app.config['AUDIO_FOLDER'], exist_ok=True)
 os.makedirs(app.config['VIDEO_FOLDER'], exist_ok=True)
+os.makedirs(app.config['STREAM_FOLDER'], exist_ok=True)
+os.makedirs(app.config['WORK_FOLDER'], exist_ok=True)
+
+# Probe devices once at startup; later calls reuse the cached result
+print(f"Optimal device: {get_optimal_device()}")
+
+# Optional pipeline worker processes (FACE_GEN_PROCESS_WORKERS)
+worker_pool = create_worker_pool() if SERVING_PROCESS else None
+
+# Background executor for every render; bounds the number of concurrent and waiting renders
+job_manager = JobManager(max_workers=worker_pool.workers if worker_pool else app.config['JOB_WORKERS'],
+                         worker_pool=worker_pool, max_queued=app.config['MAX_QUEUED_JOBS'],
+                         policy=create_scheduling_policy(app.config['SCHEDULER']))
+
+# Deletes expired uploads and outputs in the background; files of unfinished jobs,
+# recent results and downloads in progress are never touched
+file_leases = FileLeases()
+janitor = StorageJanitor(
+    {
+        app.config['UPLOAD_FOLDER']: UPLOAD_TTL_HOURS * 3600,
+        app.config['AUDIO_FOLDER']: AUDIO_TTL_HOURS * 3600,
+        app.config['VIDEO_FOLDER']: VIDEO_TTL_HOURS * 3600,
+        app.config['STREAM_FOLDER']: STREAM_TTL_HOURS * 3600
+    },
+    protected=lambda: job_manager.referenced_files(DOWNLOAD_GRACE_SECONDS),
+    leases=file_leases
+)
+if SERVING_PROCESS:
+    janitor.start()
 
 # Allowed file extensions
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+ALLOWED_AUDIO_EXTENSIONS = {'wav', 'mp3', 'flac', 'ogg', 'm4a'}
+
+def queue_full_response(error):
+    """429 response telling the client when the queue should have room again"""
+    response = jsonify({'error': 'Server is busy, please retry later', 'retry_after': error.retry_after})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 429
 
-def allowed_file(filename):
+def allowed_file(filename, extensions=ALLOWED_EXTENSIONS):
     return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+           filename.rsplit('.', 1)[1].lower() in extensions
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def save_face_upload(job_id):
+    """
+    Validate the uploaded face image and save it
+
+    Returns:
+        tuple: (face path, None) on success or (None, error response) on failure
+    """
+    # Check if files were uploaded
+    if 'face_image' not in request.files:
+        return None, (jsonify({'error': 'No face image uploaded'}), 400)
+    
+    file = request.files['face_image']
+    if file.filename == '':
+        return None, (jsonify({'error': 'No face image selected'}), 400)
+    
+    if not allowed_file(file.filename):
+        return None, (jsonify({'error': 'Invalid file type. Please upload an image.'}), 400)
+    
+    # Decode once, fix orientation and store a downscaled JPEG instead of the raw upload
+    face_stem = os.path.splitext(secure_filename(file.filename))[0]
+    face_filename = f"face_{job_id}_{face_stem}.{NORMALIZED_EXTENSION}"
+    face_path = os.path.join(app.config['UPLOAD_FOLDER'], face_filename)
+    try:
+        with trace_stage(STAGE_UPLOAD_SAVE):
+            normalize_image(file.stream, face_path)
+    except ImageNormalizeError as e:
+        return None, (jsonify({'error': str(e)}), 400)
+    return face_path, None
+
+def get_requested_voice():
+    """
+    Read the voice of a request
+
+    Returns:
+        tuple: (voice ID, None) on success or (None, error response) for an unknown voice
+    """
+    voice = request.form.get('voice', '').strip() or DEFAULT_VOICE
+    if not get_voice_library().has(voice):
+        return None, (jsonify({'error': f'Unknown voice: {voice}'}), 400)
+    return voice, None
+
+def get_requested_tts_settings():
+    """
+    Read the Tortoise preset and sampling parameters of a request
+
+    Returns:
+        tuple: (settings dict, None) on success or (None, error response) for invalid settings
+    """
+    try:
+        settings = parse_tts_settings(
+            preset=request.form.get('preset', '').strip() or None,
+            params={name: request.form.get(name, '').strip() for name in TTS_PARAM_LIMITS},
+            target_latency=request.form.get('target_latency', '').strip() or None
+        )
+    except TTSSettingsError as e:
+        return None, (jsonify({'error': str(e)}), 400)
+    return settings, None
+
+def prepare_generation_request():
+    """
+    Validate a generation request and save the uploaded face image
+
+    Returns:
+        tuple: (paths dict, None) on success or (None, error response) on failure
+    """
+    # Get text input
+    text = request.form.get('text', '').strip()
+    if not text:
+        return None, (jsonify({'error': 'No text provided'}), 400)
+    
+    voice, error = get_requested_voice()
+    if error:
+        return None, error
+    
+    tts_settings, error = get_requested_tts_settings()
+    if error:
+        return None, error
+    
+    # Generate collision-free filenames
+    job_id = new_job_id()
+    audio_filename = f"audio_{job_id}.wav"
+    video_filename = f"video_{job_id}.mp4"
+    
+    # The trace starts at upload so queue wait and upload time are attributed too
+    trace = JobTrace(job_id)
+    with trace.activate():
+        face_path, error = save_face_upload(job_id)
+    if error:
+        return None, error
+    
+    return {
+        'job_id': job_id,
+        'trace': trace,
+        'face_path': face_path,
+        'text': text,
+        'voice': voice,
+        'tts_settings': tts_settings,
+        'audio_path': os.path.join(app.config['AUDIO_FOLDER'], audio_filename) if app.config['KEEP_AUDIO'] else None,
+        'video_path': os.path.join(app.config['VIDEO_FOLDER'], video_filename)
+    }, None
+
+def get_result_fingerprint(paths):
+    """
+    Fingerprint of a prepared generation request (see make_result_fingerprint)
+
+    Returns:
+        str: SHA-256 hex digest
+    """
+    return make_result_fingerprint(hash_file(paths['face_path']), paths['text'], paths['voice'],
+                                   paths['tts_settings'], get_wav2lip_options(), get_tortoise_version())
+
+def get_client_id():
+    """
+    Identify who sent the request, for fair-share scheduling
+
+    Returns:
+        str: The X-Client-ID header, or the remote address without it
+    """
+    return request.headers.get('X-Client-ID') or request.remote_addr
+
+def get_request_fingerprint(paths):
+    """Fingerprint of a prepared request, or None when neither dedup nor coalescing needs it"""
+    if app.config['RESULT_DEDUP'] or app.config['COALESCE_REQUESTS']:
+        return get_result_fingerprint(paths)
+    return None
+
+def find_finished_result(paths, fingerprint):
+    """
+    Look up the video of an earlier render of the same request
+
+    On a hit the new upload is not needed and is removed.
+
+    Returns:
+        dict: Completed response fields, or None if the request has to be rendered
+    """
+    if not fingerprint or not app.config['RESULT_DEDUP']:
+        return None
+    video_filename = get_result_index().lookup(fingerprint, app.config['VIDEO_FOLDER'])
+    if not video_filename:
+        return None
+    
+    # Same face, text and settings as an earlier render: reuse its video
+    os.remove(paths['face_path'])
+    touch_file(os.path.join(app.config['VIDEO_FOLDER'], video_filename))
+    paths['trace'].write_log(outcome='deduplicated', video_filename=video_filename)
+    return {
+        'success': True,
+        'message': 'Digital avatar generated successfully',
+        'state': JOB_COMPLETED,
+        'video_filename': video_filename,
+        'download_url': f'/download/{video_filename}',
+        'deduplicated': True,
+        'trace': paths['trace'].to_dict()
+    }
+
+def submit_generation(paths, fingerprint=None, info=None):
+    """
+    Queue the pipeline for a prepared request
+
+    With request coalescing on, a request identical to a queued or running one
+    attaches to that job instead of rendering again. With result dedup on, the
+    finished video is indexed under the fingerprint, whichever route queued it.
+
+    Returns:
+        tuple: (job snapshot, True if the request attached to an existing job)
+
+    Raises:
+        QueueFullError: If the job queue is full
+    """
+    job_id = paths.pop('job_id')
+    files = [paths['face_path'], paths['audio_path'], paths['video_path'], paths.get('stream_dir')]
+    key = fingerprint if app.config['COALESCE_REQUESTS'] else None
+    def index_result(result):
+        get_result_index().record(fingerprint, result['video_filename'])
+    on_success = index_result if fingerprint and app.config['RESULT_DEDUP'] else None
+    # Predicted from similar finished jobs, for ETAs and the queue's drain time
+    cost = estimate_pipeline_seconds(paths['text'], paths['tts_settings'],
+                                     threads=worker_pool.threads if worker_pool else None)
+    try:
+        job = job_manager.submit(run_pipeline, job_id=job_id, info=info, files=files, key=key, cost=cost,
+                                 client=get_client_id(), size=len(paths['text']), on_success=on_success,
+                                 workspace_id=job_id, **paths)
+    except QueueFullError as e:
+        os.remove(paths['face_path'])
+        paths['trace'].write_log(outcome='rejected', retry_after=e.retry_after)
+        raise
+    if job['id'] == job_id:
+        return job, False
+    
+    # The other job renders from its own copy of the face, so this upload is unused
+    os.remove(paths['face_path'])
+    paths['trace'].write_log(outcome='coalesced', attached_to=job['id'])
+    return job, True
+
+def get_batch_texts():
+    """
+    Read the scripts of a batch request
+
+    Accepts a JSON list in the 'texts' field or repeated 'text' fields.
+
+    Returns:
+        list: Non-empty scripts
+    """
+    if request.form.get('texts'):
+        texts = json.loads(request.form['texts'])
+        if not isinstance(texts, list):
+            raise ValueError('texts must be a JSON list')
+    else:
+        texts = request.form.getlist('text')
+    return [str(text).strip() for text in texts if str(text).strip()]
+
 @app.route('/generate', methods=['POST'])
 def generate():
     try:
-        # Check if files were uploaded
-        if 'face_image' not in request.files:
-            return jsonify({'error': 'No face image uploaded'}), 400
+        # A full queue is only checked when a new render has to be queued (submit_generation),
+        # so finished results and requests joining a queued render are always answered
+        paths, error = prepare_generation_request()
+        if error:
+            return error
         
-        file = request.files['face_image']
-        if file.filename == '':
-            return jsonify({'error': 'No face image selected'}), 400
+        fingerprint = get_request_fingerprint(paths)
+        finished = find_finished_result(paths, fingerprint)
+        if finished:
+            return jsonify(finished)
         
-        if not allowed_file(file.filename):
-            return jsonify({'error': 'Invalid file type. Please upload an image.'}), 400
+        # Renders run on the job queue, so identical concurrent requests share one
+        job, coalesced = submit_generation(paths, fingerprint)
+        job = job_manager.wait(job['id'])
+        if job is None:
+            return jsonify({'error': 'Internal server error'}), 500
+        if job['state'] == JOB_FAILED:
+            return jsonify({'error': job['error']}), 500
         
-        # Get text input
-        text = request.form.get('text', '').strip()
-        if not text:
+        # Return success response
+        response = {
+            'success': True,
+            'message': 'Digital avatar generated successfully',
+            **job['result']
+        }
+        if coalesced:
+            response['coalesced'] = True
+        return jsonify(response)
+        
+    except QueueFullError as e:
+        return queue_full_response(e)
+    except Exception as e:
+        print(f"Error in main route: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    try:
+        paths, error = prepare_generation_request()
+        if error:
+            return error
+        
+        # An earlier render of the same request is returned as an already completed job
+        fingerprint = get_request_fingerprint(paths)
+        finished = find_finished_result(paths, fingerprint)
+        if finished:
+            return jsonify(finished)
+        
+        job_id = paths['job_id']
+        
+        # Optionally stream HLS segments while the video renders
+        info = {}
+        if request.form.get('stream') == 'true':
+            paths['stream_dir'] = os.path.join(app.config['STREAM_FOLDER'], job_id)
+            info['stream_url'] = f'/stream/{job_id}/{HLS_PLAYLIST}'
+        
+        job, coalesced = submit_generation(paths, fingerprint, info)
+        response = {
+            'success': True,
+            'job_id': job['id'],
+            'state': job['state'],
+            'status_url': f"/jobs/{job['id']}",
+            'estimated_seconds': job['estimated_seconds'],
+            'eta_seconds': job_manager.eta_seconds(job['id']),
+            **job['info']
+        }
+        if coalesced:
+            response['coalesced'] = True
+        return jsonify(response), 202
+        
+    except QueueFullError as e:
+        return queue_full_response(e)
+    except Exception as e:
+        print(f"Error in jobs route: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/generate_batch', methods=['POST'])
+def generate_batch():
+    try:
+        try:
+            texts = get_batch_texts()
+        except ValueError as e:
+            return jsonify({'error': f'Invalid texts: {str(e)}'}), 400
+        if not texts:
             return jsonify({'error': 'No text provided'}), 400
+        if len(texts) > BATCH_MAX_ITEMS:
+            return jsonify({'error': f'Too many texts (max {BATCH_MAX_ITEMS})'}), 400
         
-        # Generate unique filenames
-        timestamp = str(int(time.time()))
-        face_filename = f"face_{timestamp}_{secure_filename(file.filename)}"
-        audio_filename = f"audio_{timestamp}.wav"
-        video_filename = f"video_{timestamp}.mp4"
+        voice, error = get_requested_voice()
+        if error:
+            return error
         
-        # Save uploaded face image
-        face_path = os.path.join(app.config['UPLOAD_FOLDER'], face_filename)
-        file.save(face_path)
+        tts_settings, error = get_requested_tts_settings()
+        if error:
+            return error
         
-        # Generate TTS
-        audio_path = os.path.join(app.config['AUDIO_FOLDER'], audio_filename)
-        print(f"Generating TTS for text: {text[:50]}...")
+        batch_id = new_job_id()
+        face_path, error = save_face_upload(batch_id)
+        if error:
+            return error
         
-        if not generate_tts(text, audio_path):
-            return jsonify({'error': 'TTS generation failed'}), 500
+        audio_folder = app.config['AUDIO_FOLDER'] if app.config['KEEP_AUDIO'] else None
+        items = make_batch_items(texts, audio_folder, app.config['VIDEO_FOLDER'])
         
-        # Generate video
-        video_path = os.path.join(app.config['VIDEO_FOLDER'], video_filename)
-        print(f"Generating video...")
+        # Every item is queued before the response starts, so a client that
+        # disconnects early still gets its videos rendered
+        try:
+            job_ids = submit_batch(job_manager, face_path, items, batch_id, voice=voice, tts_settings=tts_settings,
+                                   client=get_client_id())
+        except QueueFullError:
+            os.remove(face_path)
+            raise
         
-        if not run_wav2lip(face_path, audio_path, video_path):
-            return jsonify({'error': 'Video generation failed'}), 500
+        def stream_results():
+            # One JSON document per line: the batch header, then each item as it finishes
+            yield json.dumps({
+                'batch_id': batch_id,
+                'items': [{'batch_index': index, 'job_id': item['job_id'], 'status_url': f"/jobs/{item['job_id']}"}
+                          for index, item in enumerate(items)]
+            }) + '\n'
+            for result in iter_batch_results(job_manager, job_ids):
+                yield json.dumps(result) + '\n'
         
-        # Return success response
-        return jsonify({
-            'success': True,
-            'message': 'Digital avatar generated successfully',
-            'video_filename': video_filename,
-            'download_url': f'/download/{video_filename}'
-        })
+        # Keep the face until the stream ends, also after its jobs have finished
+        file_leases.acquire(face_path)
+        response = Response(stream_results(), mimetype='application/x-ndjson')
+        response.call_on_close(lambda: file_leases.release(face_path))
+        return response
         
+    except QueueFullError as e:
+        return queue_full_response(e)
     except Exception as e:
-        print(f"Error in main route: {str(e)}")
+        print(f"Error in batch route: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@app.route('/voices', methods=['POST'])
+def create_voice():
+    try:
+        name = request.form.get('name', '').strip()
+        if not name:
+            return jsonify({'error': 'No voice name provided'}), 400
+        
+        clips = [clip for clip in request.files.getlist('clips') if clip.filename]
+        if not clips:
+            return jsonify({'error': 'No reference clips uploaded'}), 400
+        if not all(allowed_file(clip.filename, ALLOWED_AUDIO_EXTENSIONS) for clip in clips):
+            return jsonify({'error': 'Invalid file type. Please upload audio clips.'}), 400
+        
+        # Clips are only needed to compute the latents
+        with JobWorkspace() as workspace:
+            clip_paths = []
+            for index, clip in enumerate(clips):
+                clip_path = workspace.file(f"clip_{index}_{secure_filename(clip.filename)}")
+                clip.save(clip_path)
+                clip_paths.append(clip_path)
+            
+            # Runs where renders run, on a worker's warm models and thread budget when there is a pool
+            start_time = time.time()
+            latents = job_manager.execute(compute_conditioning_latents, clip_paths)
+            print(f"Conditioning latents for voice '{name}' computed in {time.time() - start_time:.2f} seconds")
+        
+        voice = get_voice_library().add(name, latents)
+        return jsonify({'success': True, 'voice': voice}), 201
+        
+    except Exception as e:
+        print(f"Error in voices route: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@app.route('/voices')
+def list_voices():
+    return jsonify({'voices': get_voice_library().list_voices()})
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    response = {
+        'job_id': job['id'],
+        'state': job['state'],
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at'],
+        'estimated_seconds': job['estimated_seconds'],
+        **job['info']
+    }
+    if job['state'] not in (JOB_COMPLETED, JOB_FAILED):
+        # Recomputed on every poll from the jobs ahead and the time already spent
+        response['eta_seconds'] = job_manager.eta_seconds(job_id)
+    if job['state'] == JOB_COMPLETED:
+        response.update(job['result'])
+    elif job['state'] == JOB_FAILED:
+        response['error'] = job['error']
+    return jsonify(response)
+
 @app.route('/download/<filename>')
 def download_video(filename):
+    # Absolute path: send_file resolves relative paths against the app package, not the CWD
+    video_path = os.path.abspath(os.path.join(app.config['VIDEO_FOLDER'], filename))
+    # Keep the janitor away until send_file has opened the file; an open file
+    # keeps streaming even if it is deleted afterwards
+    file_leases.acquire(video_path)
     try:
-        video_path = os.path.join(app.config['VIDEO_FOLDER'], filename)
         if not os.path.exists(video_path):
             return jsonify({'error': 'Video file not found'}), 404
         
+        # Recently downloaded videos are the last the storage quota evicts
+        touch_file(video_path)
+        
+        # Strong content ETag plus Range/If-None-Match/If-Modified-Since handling;
+        # generated videos never change, so they can be cached indefinitely
+        send_options = {
+            'conditional': True,
+            'etag': file_etag(video_path),
+            'max_age': IMMUTABLE_MAX_AGE
+        }
+        
         # Check if it's a download request (from download button)
         if request.args.get('download') == 'true':
-            return send_file(
+            response = send_file(
                 video_path,
                 as_attachment=True,
-                download_name=filename
+                download_name=filename,
+                **send_options
             )
         else:
             # For video playback in browser
-            return send_file(
+            response = send_file(
                 video_path,
-                mimetype='video/mp4'
+                mimetype='video/mp4',
+                **send_options
             )
+        response.cache_control.immutable = True
+        return response
     except Exception as e:
         return jsonify({'error': 'File not found'}), 404
+    finally:
+        file_leases.release(video_path)
+
+@app.route('/stream/<stream_id>/<filename>')
+def stream_video(stream_id, filename):
+    stream_dir = os.path.abspath(os.path.join(app.config['STREAM_FOLDER'], secure_filename(stream_id)))
+    if filename == HLS_PLAYLIST:
+        # The playlist grows while the render runs, so it must always be revalidated
+        response = send_from_directory(stream_dir, filename, mimetype='application/vnd.apple.mpegurl', max_age=0)
+        response.cache_control.no_cache = True
+        return response
+    
+    # Segments are never rewritten once listed in the playlist
+    response = send_from_directory(stream_dir, filename, mimetype='video/mp2t', max_age=IMMUTABLE_MAX_AGE)
+    response.cache_control.immutable = True
+    return response
+
+@app.route('/metrics')
+def metrics():
+    body, content_type = render_metrics()
+    return Response(body, content_type=content_type)
 
 @app.route('/status')
 def status():
@@ -117,11 +599,29 @@ def status():
             'uploads': os.path.exists(app.config['UPLOAD_FOLDER']),
             'audio': os.path.exists(app.config['AUDIO_FOLDER']),
             'video': os.path.exists(app.config['VIDEO_FOLDER'])
-        }
+        },
+        'device': get_optimal_device(),
+        'tts_models': get_tts_model_manager().get_stats(),
+        'tts_cache': get_tts_cache().get_stats(),
+        'face_cache': get_face_cache().get_stats(),
+        'voices': get_voice_library().get_stats(),
+        'tts_timings': get_preset_timings().get_stats(),
+        'results': get_result_index().get_stats(),
+        'job_costs': get_cost_model().get_stats(),
+        'jobs': job_manager.get_stats(),
+        'storage': janitor.get_stats()
     })
 
 if __name__ == "__main__":
     print("Starting Digital Avatar Generator...")
     print("Flask app initialized")
     print("Directories created")
+    # Worker processes preload their own models (see scripts/worker_pool.py)
+    if (SERVING_PROCESS and not worker_pool
+            and os.environ.get('FACE_GEN_PRELOAD_TTS', '').lower() in ('1', 'true', 'yes')):
+        print("Preloading TTS models...")
+        get_tts_model_manager().warmup()
+    if worker_pool:
+        for worker in worker_pool.start():
+            print(f"Worker {worker['pid']}: {worker['torch_threads']} torch thread(s), CPUs {worker['cpus']}")
     app.run(debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Batch Generation for Face-Gen
+Renders many scripts for one face, sharing face preparation and loaded models
+
+Command line usage (from the app/ directory):
+    python -m scripts.batch_generate --face assets/face.jpg --texts-file scripts.txt
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from .cost_model import estimate_pipeline_seconds
+from .job_queue import JobManager, JOB_COMPLETED
+from .pipeline import run_pipeline
+from .tts_presets import parse_tts_settings, TTSSettingsError, TTS_PRESETS, AUTO_PRESET, DEFAULT_PRESET
+from .voice_library import get_voice_library
+from .wav2lip_run import prepare_wav2lip_face
+from .workspace import new_job_id
+
+BATCH_MAX_ITEMS = int(os.environ.get('FACE_GEN_BATCH_MAX_ITEMS', '500'))
+
+def make_batch_items(texts, audio_folder, video_folder):
+    """
+    Assign a job ID and output paths to every text of a batch
+
+    An audio_folder of None skips saving the WAV of each item.
+
+    Returns:
+        list: Dicts with job_id, text, audio_path and video_path
+    """
+    items = []
+    for text in texts:
+        job_id = new_job_id()
+        items.append({
+            'job_id': job_id,
+            'text': text,
+            'audio_path': os.path.join(audio_folder, f"audio_{job_id}.wav") if audio_folder else None,
+            'video_path': os.path.join(video_folder, f"video_{job_id}.mp4")
+        })
+    return items
+
+def run_batch_item(prepare_face=False, batch_id=None, **kwargs):
+    """
+    Run the pipeline for one batch item
+
+    The first item also caches the face detection shared by the batch before
+    it starts, so face preparation runs on the job queue, not in the caller.
+    """
+    if prepare_face:
+        start_time = time.time()
+        if prepare_wav2lip_face(kwargs['face_path']):
+            print(f"Batch {batch_id}: face prepared in {time.time() - start_time:.2f} seconds")
+    return run_pipeline(**kwargs)
+
+def submit_batch(job_manager, face_path, items, batch_id=None, voice=None, tts_settings=None, client=None):
+    """
+    Queue one pipeline job per item
+
+    The first item caches the face detection (see run_batch_item), and every
+    item runs against the same process-wide TTS and Wav2Lip models. The items
+    are admitted as a whole: either all of them are queued or none. Nothing
+    runs in the caller, so a full queue is reported without delay.
+
+    Args:
+        job_manager (JobManager): Executor the items are scheduled on
+        face_path (str): Face image shared by all items
+        items (list): Output of make_batch_items
+        batch_id (str): Identifier reported with every item
+        voice (str): Voice library ID shared by all items
+        tts_settings (dict): Preset settings shared by all items (see parse_tts_settings)
+        client (str): Who submitted the batch, for fair-share scheduling
+
+    Returns:
+        list: Job IDs in item order
+
+    Raises:
+        QueueFullError: If the job queue has no room for the whole batch
+    """
+    batch_id = batch_id or new_job_id()
+    # Items run in the job manager's worker processes when it has a pool
+    threads = job_manager.worker_pool.threads if job_manager.worker_pool else None
+    job_ids = []
+    with job_manager.admit(len(items)):
+        for index, item in enumerate(items):
+            job = job_manager.submit(
+                run_batch_item,
+                job_id=item['job_id'],
+                info={'batch_id': batch_id, 'batch_index': index},
+                files=[face_path, item['audio_path'], item['video_path']],
+                bounded=False,
+                cost=estimate_pipeline_seconds(item['text'], tts_settings, threads=threads),
+                client=client,
+                size=len(item['text']),
+                face_path=face_path,
+                text=item['text'],
+                audio_path=item['audio_path'],
+                video_path=item['video_path'],
+                workspace_id=item['job_id'],
+                voice=voice,
+                tts_settings=tts_settings,
+                prepare_face=index == 0,
+                batch_id=batch_id
+            )
+            job_ids.append(job['id'])
+    return job_ids
+
+def iter_batch_results(job_manager, job_ids):
+    """
+    Yield one result per item as soon as it finishes
+
+    Yields:
+        dict: batch_index, job_id, state and either the download info or the error
+    """
+    for job in job_manager.as_completed(job_ids):
+        result = {
+            'batch_index': job['info'].get('batch_index'),
+            'job_id': job['id'],
+            'state': job['state']
+        }
+        if job['state'] == JOB_COMPLETED:
+            result.update(job['result'])
+        else:
+            result['error'] = job['error']
+        yield result
+
+def load_texts(path):
+    """Read one script per non-empty line"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description='Render many scripts for one face')
+    parser.add_argument('--face', required=True, help='Face image shared by every clip')
+    parser.add_argument('--texts-file', help='File with one script per line')
+    parser.add_argument('--text', action='append', default=[], help='Script to render (repeatable)')
+    parser.add_argument('--audio-dir', default='audio', help='Output folder for audio')
+    parser.add_argument('--voice', help='Voice library ID (default: random voice)')
+    parser.add_argument('--preset', choices=(DEFAULT_PRESET, AUTO_PRESET) + tuple(TTS_PRESETS),
+                        default=DEFAULT_PRESET, help='Tortoise preset (auto needs --target-latency)')
+    parser.add_argument('--target-latency', type=float, help='Seconds of TTS per clip for --preset auto')
+    parser.add_argument('--num-autoregressive-samples', type=int, help='Override the autoregressive sample count')
+    parser.add_argument('--diffusion-iterations', type=int, help='Override the diffusion iterations')
+    parser.add_argument('--no-audio', action='store_true', help='Do not keep the WAV of each clip')
+    parser.add_argument('--video-dir', default='video', help='Output folder for videos')
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('FACE_GEN_JOB_WORKERS', '1')),
+                        help='Clips rendered at the same time')
+    args = parser.parse_args()
+
+    texts = list(args.text)
+    if args.texts_file:
+        texts.extend(load_texts(args.texts_file))
+    if not texts:
+        parser.error('No texts given; use --text or --texts-file')
+    if not get_voice_library().has(args.voice):
+        parser.error(f'Unknown voice: {args.voice}')
+    try:
+        tts_settings = parse_tts_settings(args.preset, {
+            'num_autoregressive_samples': args.num_autoregressive_samples,
+            'diffusion_iterations': args.diffusion_iterations
+        }, args.target_latency)
+    except TTSSettingsError as e:
+        parser.error(str(e))
+
+    job_manager = JobManager(max_workers=args.workers, max_finished_jobs=max(1000, len(texts)))
+    items = make_batch_items(texts, None if args.no_audio else args.audio_dir, args.video_dir)
+
+    start_time = time.time()
+    failed = 0
+    job_ids = submit_batch(job_manager, args.face, items, voice=args.voice, tts_settings=tts_settings)
+    for result in iter_batch_results(job_manager, job_ids):
+        if result['state'] != JOB_COMPLETED:
+            failed += 1
+        print(json.dumps(result, ensure_ascii=False), flush=True)
+    job_manager.shutdown()
+
+    print(f"Batch finished: {len(texts) - failed}/{len(texts)} clips in {time.time() - start_time:.2f} seconds",
+          file=sys.stderr)
+    return failed == 0
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Job Cost Model for Face-Gen
+Learns stage durations from finished jobs and predicts how long new jobs will take
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from .metrics import STAGE_TTS, STAGE_WAV2LIP, STAGE_ENCODE
+from .tts_presets import tts_settings_label, DEFAULT_PRESET
+
+COST_DB_PATH = os.environ.get('FACE_GEN_COST_DB', os.path.join('cache', 'job_costs.sqlite3'))
+# Most recent runs per stage and configuration used for a fit
+COST_SAMPLES = 200
+# Rows kept in the database; older ones are deleted
+COST_MAX_ROWS = 20000
+
+# Stages the model records; wav2lip includes encode
+COST_STAGES = (STAGE_TTS, STAGE_WAV2LIP, STAGE_ENCODE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stage_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT,
+    recorded_at REAL,
+    stage TEXT,
+    seconds REAL,
+    device TEXT,
+    preset TEXT,
+    threads INTEGER,
+    text_length INTEGER,
+    audio_seconds REAL,
+    frame_count INTEGER
+);
+CREATE INDEX IF NOT EXISTS stage_runs_lookup ON stage_runs (stage, device, preset, threads);
+"""
+
+def current_threads():
+    """Torch threads of this process"""
+    import torch
+    return torch.get_num_threads()
+
+def fit_line(samples):
+    """
+    Least-squares fit of y = intercept + slope * x
+
+    The slope is kept non-negative; with only one distinct x, y is assumed to
+    grow in proportion to x.
+
+    Returns:
+        tuple: (intercept, slope)
+    """
+    n = len(samples)
+    mean_x = sum(x for x, _ in samples) / n
+    mean_y = sum(y for _, y in samples) / n
+    var_x = sum((x - mean_x) ** 2 for x, _ in samples)
+    if var_x == 0:
+        return (0.0, mean_y / mean_x) if mean_x else (mean_y, 0.0)
+    slope = max(sum((x - mean_x) * (y - mean_y) for x, y in samples) / var_x, 0.0)
+    return max(mean_y - slope * mean_x, 0.0), slope
+
+class JobCostModel:
+    """
+    Stage durations of finished jobs in SQLite, and linear fits over them.
+
+    Every run of a stage is stored with its job's features (text length,
+    preset, audio seconds, frame count, device, torch threads). Estimates fit
+    a line through the most recent runs with the same configuration:
+
+    - TTS seconds from text length, per device, preset and threads
+    - audio seconds from text length, per preset
+    - Wav2Lip seconds from audio seconds, per device and threads
+
+    Configurations without data fall back to the same device with any thread
+    count. The database is shared by worker processes and survives restarts.
+    """
+
+    def __init__(self, path=COST_DB_PATH, max_samples=COST_SAMPLES, max_rows=COST_MAX_ROWS):
+        self.path = path
+        self.max_samples = max_samples
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with closing(self._connect()) as db:
+            db.executescript(SCHEMA)
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=10)
+        db.execute('PRAGMA journal_mode=WAL')
+        return db
+
+    def record(self, trace, preset, threads):
+        """
+        Store the stage durations of a finished job
+
+        Args:
+            trace (dict): JobTrace.to_dict() of the job
+            preset (str): TTS settings label (see tts_settings_label)
+            threads (int): Torch threads the job ran with
+        """
+        stages = [entry for entry in trace['stages'] if entry['stage'] in COST_STAGES and entry['duration'] is not None]
+        features = {}
+        for entry in trace['stages']:
+            for name in ('text_length', 'audio_seconds', 'frame_count'):
+                if entry.get(name) is not None:
+                    features[name] = entry[name]
+        rows = [(trace['job_id'], time.time(), entry['stage'], entry['duration'], entry.get('device'), preset, threads,
+                 features.get('text_length'), features.get('audio_seconds'), features.get('frame_count'))
+                for entry in stages]
+        if not rows:
+            return
+        with self._lock, closing(self._connect()) as db:
+            with db:
+                db.executemany(
+                    'INSERT INTO stage_runs (job_id, recorded_at, stage, seconds, device, preset, threads, '
+                    'text_length, audio_seconds, frame_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+                db.execute('DELETE FROM stage_runs WHERE id <= (SELECT MAX(id) FROM stage_runs) - ?',
+                           (self.max_rows,))
+
+    def _samples(self, db, x, y, conditions):
+        where = ' AND '.join(f'{name} = ?' for name in conditions)
+        query = (f'SELECT {x}, {y} FROM stage_runs WHERE {where} AND {x} IS NOT NULL AND {y} IS NOT NULL '
+                 f'ORDER BY id DESC LIMIT ?')
+        return db.execute(query, (*conditions.values(), self.max_samples)).fetchall()
+
+    def _predict(self, db, x, y, value, *condition_sets):
+        """Predict y at x=value from the first condition set that has data"""
+        for conditions in condition_sets:
+            samples = self._samples(db, x, y, conditions)
+            if samples:
+                intercept, slope = fit_line(samples)
+                return intercept + slope * value
+        return None
+
+    def estimate(self, text_length, preset, device, threads):
+        """
+        Predict the stage durations of a job
+
+        Returns:
+            dict: Seconds for 'tts', 'wav2lip' and 'total' plus the predicted
+                'audio_seconds'; each is None when there is no data to fit
+        """
+        with closing(self._connect()) as db:
+            tts = self._predict(db, 'text_length', 'seconds', text_length,
+                                {'stage': STAGE_TTS, 'device': device, 'preset': preset, 'threads': threads},
+                                {'stage': STAGE_TTS, 'device': device, 'preset': preset})
+            audio_seconds = self._predict(db, 'text_length', 'audio_seconds', text_length,
+                                          {'stage': STAGE_TTS, 'preset': preset},
+                                          {'stage': STAGE_TTS})
+            wav2lip = None
+            if audio_seconds is not None:
+                wav2lip = self._predict(db, 'audio_seconds', 'seconds', audio_seconds,
+                                        {'stage': STAGE_WAV2LIP, 'device': device, 'threads': threads},
+                                        {'stage': STAGE_WAV2LIP, 'device': device})
+        total = tts + wav2lip if tts is not None and wav2lip is not None else None
+        return {'tts': tts, 'wav2lip': wav2lip, 'audio_seconds': audio_seconds, 'total': total}
+
+    def get_stats(self):
+        """
+        Get recorded runs per stage and device
+
+        Returns:
+            dict: {stage: {device: run count}}
+        """
+        with closing(self._connect()) as db:
+            rows = db.execute('SELECT stage, device, COUNT(*) FROM stage_runs GROUP BY stage, device').fetchall()
+        stats = {}
+        for stage, device, count in rows:
+            stats.setdefault(stage, {})[device or 'unknown'] = count
+        return stats
+
+_model = None
+_model_lock = threading.Lock()
+
+def get_cost_model():
+    """
+    Get the process-wide cost model
+
+    Returns:
+        JobCostModel: Shared instance
+    """
+    global _model
+    with _model_lock:
+        if _model is None:
+            _model = JobCostModel()
+        return _model
+
+def _preset_label(tts_settings):
+    settings = tts_settings or {}
+    return tts_settings_label(settings.get('preset') or DEFAULT_PRESET, settings.get('params') or {})
+
+def record_job_costs(trace, tts_settings=None):
+    """Add a finished job to the cost model; failures to record never fail the job"""
+    try:
+        get_cost_model().record(trace, _preset_label(tts_settings), current_threads())
+    except (sqlite3.Error, OSError) as e:
+        print(f"Could not record job cost: {str(e)}")
+
+def estimate_pipeline_seconds(text, tts_settings=None, threads=None):
+    """
+    Predict how long run_pipeline will take for a request on this machine
+
+    Args:
+        text (str): Script
+        tts_settings (dict): Preset, params and target_latency from parse_tts_settings
+        threads (int): Torch threads of the process that will run it, defaults to this process
+
+    Returns:
+        float: Seconds, or None until similar jobs have finished
+    """
+    from .device_detection import get_optimal_device
+
+    try:
+        return get_cost_model().estimate(len(text), _preset_label(tts_settings), get_optimal_device(),
+                                         threads or current_threads())['total']
+    except (sqlite3.Error, OSError) as e:
+        print(f"Could not estimate job cost: {str(e)}")
+        return None
@@ -6,9 +6,22 @@ Automatically detects and configures the best available device for AI processing
 
 import os
 import platform
+import threading
 import torch
 import psutil
 
+VALID_DEVICES = ('mps', 'cuda', 'cpu')
+
+# Environment variable that forces a device and skips the probe
+DEVICE_OVERRIDE_ENV = 'FACE_GEN_DEVICE'
+
+# Torch threads per pipeline worker process on CPU hosts (see recommend_worker_layout)
+DEFAULT_THREADS_PER_WORKER = 4
+
+# Probe results are cached for the life of the process; see probe_devices()
+_probe_cache = None
+_probe_lock = threading.Lock()
+
 def detect_environment():
     """
     Detect the current environment (Docker, local, OS, architecture)
@@ -92,17 +105,61 @@ def detect_cuda_availability():
     
     return cuda_info
 
-def get_optimal_device():
+def probe_devices(refresh=False):
     """
-    Determine the optimal device for the current environment
+    Probe the environment, MPS and CUDA once and cache the result
+    
+    Allocating test tensors initialises the CUDA/MPS context, so the probe
+    runs once per process unless refresh is requested.
+    
+    Args:
+        refresh (bool): Re-run the probe instead of using the cached result
     
     Returns:
-        str: Optimal device ('mps', 'cuda', or 'cpu')
+        dict: Environment, MPS and CUDA information
     """
-    env_info = detect_environment()
-    mps_info = detect_mps_availability()
-    cuda_info = detect_cuda_availability()
+    global _probe_cache
+    with _probe_lock:
+        if _probe_cache is None or refresh:
+            _probe_cache = {
+                'environment': detect_environment(),
+                'mps': detect_mps_availability(),
+                'cuda': detect_cuda_availability()
+            }
+        return _probe_cache
+
+def refresh_device_detection():
+    """
+    Discard the cached probe and detect devices again
     
+    Returns:
+        str: Optimal device after the refresh
+    """
+    probe_devices(refresh=True)
+    return get_optimal_device()
+
+def get_device_override():
+    """
+    Get the device forced through FACE_GEN_DEVICE
+    
+    Returns:
+        str: Forced device, or None if not set or invalid
+    """
+    device = os.environ.get(DEVICE_OVERRIDE_ENV, '').strip().lower()
+    if not device:
+        return None
+    if device not in VALID_DEVICES:
+        print(f"Ignoring invalid {DEVICE_OVERRIDE_ENV}={device}, expected one of {', '.join(VALID_DEVICES)}")
+        return None
+    return device
+
+def select_device(env_info, mps_info, cuda_info):
+    """
+    Pick a device from probe results
+    
+    Returns:
+        str: Optimal device ('mps', 'cuda', or 'cpu')
+    """
     # Priority: MPS > CUDA > CPU
     if mps_info['functional'] and not env_info['is_docker']:
         return 'mps'
@@ -111,6 +168,22 @@ def get_optimal_device():
     else:
         return 'cpu'
 
+def get_optimal_device():
+    """
+    Determine the optimal device for the current environment
+    
+    Uses the cached probe; FACE_GEN_DEVICE overrides the result.
+    
+    Returns:
+        str: Optimal device ('mps', 'cuda', or 'cpu')
+    """
+    override = get_device_override()
+    if override:
+        return override
+    
+    probe = probe_devices()
+    return select_device(probe['environment'], probe['mps'], probe['cuda'])
+
 def configure_device_for_model(model, device):
     """
     Move a PyTorch model to the specified device
@@ -137,16 +210,67 @@ def configure_device_for_model(model, device):
         print(f"Failed to move model to {device}, falling back to CPU: {e}")
         return model.to('cpu')
 
-def get_device_info():
+def get_cpu_info():
+    """
+    Count the CPUs this process may use
+    
+    Returns:
+        dict: Physical cores, logical CPUs and the CPU IDs in the process affinity mask
+    """
+    logical = psutil.cpu_count(logical=True) or 1
+    physical = psutil.cpu_count(logical=False) or logical
+    try:
+        available = sorted(psutil.Process().cpu_affinity())
+    except (AttributeError, NotImplementedError, psutil.Error):
+        # macOS has no affinity API
+        available = list(range(logical))
+    # A container limited to a CPU set sees fewer CPUs than the host has cores
+    physical = min(physical, len(available))
+    return {
+        'physical_cores': physical,
+        'logical_cpus': logical,
+        'available_cpus': available
+    }
+
+def recommend_worker_layout(device=None, threads_per_worker=None):
+    """
+    Choose how many pipeline worker processes to run and how many torch threads each gets
+    
+    On CPU, physical cores are split into workers of threads_per_worker threads so
+    overlapping renders do not oversubscribe cores. GPU and MPS devices are shared
+    by one worker that keeps all cores for pre- and post-processing.
+    
+    Args:
+        device (str): Inference device, defaults to the optimal device
+        threads_per_worker (int): Torch threads per worker on CPU, defaults to DEFAULT_THREADS_PER_WORKER
+    
+    Returns:
+        dict: workers, threads_per_worker and the CPU info the layout is based on
+    """
+    device = device or get_optimal_device()
+    cpu_info = get_cpu_info()
+    cores = cpu_info['physical_cores']
+    if device in ('cuda', 'mps'):
+        workers, threads = 1, cores
+    else:
+        threads = max(1, min(threads_per_worker or DEFAULT_THREADS_PER_WORKER, cores))
+        workers = max(1, cores // threads)
+    return {'workers': workers, 'threads_per_worker': threads, 'cpu': cpu_info}
+
+def get_device_info(refresh=False):
     """
     Get comprehensive device information
     
+    Args:
+        refresh (bool): Re-run the device probe instead of using the cached result
+    
     Returns:
         dict: Device information
     """
-    env_info = detect_environment()
-    mps_info = detect_mps_availability()
-    cuda_info = detect_cuda_availability()
+    probe = probe_devices(refresh=refresh)
+    env_info = probe['environment']
+    mps_info = probe['mps']
+    cuda_info = probe['cuda']
     optimal_device = get_optimal_device()
     
     device_info = {
@@ -154,6 +278,8 @@ def get_device_info():
         'mps': mps_info,
         'cuda': cuda_info,
         'optimal_device': optimal_device,
+        'device_override': get_device_override(),
+        'cpu': get_cpu_info(),
         'recommendations': get_recommendations(env_info, mps_info, cuda_info, optimal_device)
     }
     
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Face Detection Cache for Face-Gen
+Persists detected face boxes and preprocessed crops keyed by image content
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+import numpy as np
+
+FACE_CACHE_DIR = os.environ.get('FACE_GEN_FACE_CACHE_DIR', os.path.join('cache', 'faces'))
+
+def hash_image_bytes(data):
+    """
+    Hash uploaded image bytes
+
+    Returns:
+        str: SHA-256 hex digest
+    """
+    return hashlib.sha256(data).hexdigest()
+
+def make_face_key(image_hash, pads, img_size=96):
+    """
+    Build the cache key for a face detection
+
+    The crop depends on the image, the --pads setting and the model input size.
+
+    Returns:
+        str: Filesystem-safe key
+    """
+    pads_part = '-'.join(str(int(p)) for p in pads)
+    return f"{image_hash}_{pads_part}_{img_size}"
+
+class FaceDetectionCache:
+    """
+    Stores (crop box, resized face crop) per image in compressed .npz files.
+
+    Recently used entries are also kept in memory so hot avatars skip the disk.
+    """
+
+    def __init__(self, cache_dir=FACE_CACHE_DIR, memory_entries=256):
+        self.cache_dir = cache_dir
+        self.memory_entries = memory_entries
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def _remember_locked(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        """
+        Look up a cached detection
+
+        Returns:
+            tuple: ((y1, y2, x1, x2), uint8 face crop) or None on a miss
+        """
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self._hits += 1
+                return value
+
+        try:
+            with np.load(self._path(key)) as data:
+                value = (tuple(int(c) for c in data['box']), data['face'])
+        except (OSError, KeyError, ValueError):
+            with self._lock:
+                self._misses += 1
+            return None
+
+        with self._lock:
+            self._hits += 1
+            self._remember_locked(key, value)
+        return value
+
+    def put(self, key, box, face):
+        """Store a detection on disk and in memory"""
+        box = tuple(int(c) for c in box)
+        face = np.ascontiguousarray(face, dtype=np.uint8)
+        with self._lock:
+            self._remember_locked(key, (box, face))
+
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                np.savez_compressed(f, box=np.array(box, dtype=np.int32), face=face)
+            os.replace(tmp_path, self._path(key))
+            tmp_path = None
+        except OSError as e:
+            # A failed cache write must never fail the render
+            print(f"Face cache write failed: {str(e)}")
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def get_stats(self):
+        """
+        Get cache statistics
+
+        Returns:
+            dict: Hits, misses, hit rate and in-memory entry count
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+                'memory_entries': len(self._memory)
+            }
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_face_cache():
+    """
+    Get the process-wide face detection cache
+
+    Returns:
+        FaceDetectionCache: Shared cache instance
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = FaceDetectionCache()
+        return _cache
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+HTTP Caching Helpers for Face-Gen
+Content-derived ETags for generated files, which never change once written
+"""
+
+import hashlib
+import os
+import threading
+
+# Generated videos are immutable, so clients may cache them for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+_etag_cache = {}
+_etag_lock = threading.Lock()
+
+def file_etag(path, chunk_size=1024 * 1024):
+    """
+    Get a strong ETag for a file derived from its contents
+
+    The digest is memoized per (path, size, mtime) so each file is hashed once.
+
+    Args:
+        path (str): File path
+        chunk_size (int): Read size while hashing
+
+    Returns:
+        str: SHA-256 hex digest of the file (unquoted)
+    """
+    stat = os.stat(path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    with _etag_lock:
+        cached = _etag_cache.get(path)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    etag = digest.hexdigest()
+
+    with _etag_lock:
+        _etag_cache[path] = (signature, etag)
+    return etag
+
+def forget_file_etag(path):
+    """Drop the memoized ETag of a deleted or replaced file"""
+    with _etag_lock:
+        _etag_cache.pop(path, None)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Upload Image Normalization for Face-Gen
+Decodes face uploads once, fixes their orientation and stores a right-sized JPEG
+"""
+
+import os
+import tempfile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Longest side of a stored face image; Wav2Lip only needs a 96x96 mouth crop and
+# the output video has the size of the stored image
+MAX_IMAGE_SIDE = int(os.environ.get('FACE_GEN_MAX_IMAGE_SIDE', '720'))
+
+# Baseline JPEG without chroma subsampling decodes quickly with libjpeg-turbo
+NORMALIZED_EXTENSION = 'jpg'
+JPEG_QUALITY = 95
+
+# Refuse decompression bombs well before they exhaust memory
+Image.MAX_IMAGE_PIXELS = 64 * 1024 * 1024
+
+class ImageNormalizeError(ValueError):
+    """Raised when an upload cannot be decoded as an image"""
+
+def normalize_image(source, output_path, max_side=MAX_IMAGE_SIDE):
+    """
+    Decode an image, apply its EXIF orientation, downscale it and save it as JPEG
+
+    Animated images keep their first frame; transparency is flattened onto white.
+    The file is written atomically.
+
+    Args:
+        source: Path or binary file object of the uploaded image
+        output_path (str): Where to write the normalized JPEG
+        max_side (int): Longest side after downscaling (0 keeps the size)
+
+    Returns:
+        dict: Original and stored (width, height)
+
+    Raises:
+        ImageNormalizeError: If the upload is not a readable image
+    """
+    try:
+        with Image.open(source) as image:
+            image.seek(0)
+            original_size = image.size
+            if max_side:
+                # JPEGs can be decoded directly at a reduced scale
+                image.draft('RGB', (max_side, max_side))
+            image = ImageOps.exif_transpose(image)
+            if image.mode in ('RGBA', 'LA', 'P'):
+                image = image.convert('RGBA')
+                background = Image.new('RGB', image.size, (255, 255, 255))
+                background.paste(image, mask=image.getchannel('A'))
+                image = background
+            elif image.mode != 'RGB':
+                image = image.convert('RGB')
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError) as e:
+        print(f"Image decode failed: {str(e)}")
+        raise ImageNormalizeError('Could not read image. Please upload a valid image file.')
+
+    if max_side and max(image.size) > max_side:
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+
+    directory = os.path.dirname(output_path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        image.save(tmp_path, 'JPEG', quality=JPEG_QUALITY, subsampling=0)
+        os.replace(tmp_path, output_path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+    return {'original_size': original_size, 'stored_size': image.size}
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Storage Janitor for Face-Gen
+Deletes expired uploads and outputs and keeps their total size under a quota
+"""
+
+import os
+import shutil
+import threading
+import time
+from .http_cache import forget_file_etag
+from .metrics import STORAGE_RECLAIMED_BYTES, STORAGE_DELETED, STORAGE_BYTES
+
+# How long an entry may go unused before it is deleted, per folder; 0 keeps it forever
+UPLOAD_TTL_HOURS = float(os.environ.get('FACE_GEN_UPLOAD_TTL_HOURS', '24'))
+AUDIO_TTL_HOURS = float(os.environ.get('FACE_GEN_AUDIO_TTL_HOURS', '24'))
+VIDEO_TTL_HOURS = float(os.environ.get('FACE_GEN_VIDEO_TTL_HOURS', '72'))
+STREAM_TTL_HOURS = float(os.environ.get('FACE_GEN_STREAM_TTL_HOURS', '6'))
+# Total size allowed across all managed folders; 0 disables the quota
+STORAGE_QUOTA_MB = int(os.environ.get('FACE_GEN_STORAGE_QUOTA_MB', '10240'))
+# Seconds between sweeps; 0 disables the janitor
+JANITOR_INTERVAL = int(os.environ.get('FACE_GEN_JANITOR_INTERVAL', '300'))
+# Outputs of finished jobs are kept at least this long so their download_url works
+DOWNLOAD_GRACE_SECONDS = int(os.environ.get('FACE_GEN_DOWNLOAD_GRACE_MINUTES', '60')) * 60
+
+class FileLeases:
+    """
+    Reference counts for files that a request is using.
+
+    A leased path is never deleted while its count is above zero.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def acquire(self, path):
+        path = os.path.abspath(path)
+        with self._lock:
+            self._counts[path] = self._counts.get(path, 0) + 1
+        return path
+
+    def release(self, path):
+        path = os.path.abspath(path)
+        with self._lock:
+            count = self._counts.get(path, 0) - 1
+            if count > 0:
+                self._counts[path] = count
+            else:
+                self._counts.pop(path, None)
+
+    def paths(self):
+        with self._lock:
+            return set(self._counts)
+
+def touch_file(path):
+    """Mark a file as used now without changing its mtime, which its ETag depends on"""
+    try:
+        os.utime(path, (time.time(), os.stat(path).st_mtime))
+    except OSError:
+        pass
+
+def _entry_size(path):
+    """Size of a file, or of everything inside a directory"""
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def _folder_label(folder):
+    return os.path.basename(os.path.normpath(folder))
+
+class StorageJanitor:
+    """
+    Periodic cleanup of the upload and output folders.
+
+    Every entry of a folder (a file, or an HLS stream directory) that has not
+    been used for longer than the folder's TTL is deleted. If the folders
+    together still exceed max_bytes, the least recently used entries are
+    deleted until they fit. "Used" is the later of mtime and atime; downloads
+    bump atime with touch_file(). Paths returned by protected() or held in
+    leases are never deleted.
+    """
+
+    def __init__(self, folders, max_bytes=STORAGE_QUOTA_MB * 1024 * 1024, interval=JANITOR_INTERVAL,
+                 protected=None, leases=None):
+        """
+        Args:
+            folders (dict): Folder path -> TTL in seconds (0 disables the TTL)
+            max_bytes (int): Quota over all folders, 0 disables it
+            interval (int): Seconds between background sweeps, 0 disables them
+            protected (callable): Returns paths still referenced by unfinished jobs
+            leases (FileLeases): Files in use by requests
+        """
+        self.folders = dict(folders)
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.protected = protected or (lambda: ())
+        self.leases = leases or FileLeases()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {'sweeps': 0, 'deleted': 0, 'reclaimed_bytes': 0, 'last_sweep': None, 'bytes': 0}
+
+    def _scan(self):
+        entries = []
+        for folder, ttl in self.folders.items():
+            if not os.path.isdir(folder):
+                continue
+            for item in os.scandir(folder):
+                try:
+                    stat = item.stat()
+                    size = _entry_size(item.path)
+                except OSError:
+                    continue
+                entries.append({
+                    'path': os.path.abspath(item.path),
+                    'folder': folder,
+                    'ttl': ttl,
+                    'size': size,
+                    'last_used': max(stat.st_atime, stat.st_mtime)
+                })
+        return entries
+
+    def _delete(self, entry, reason):
+        try:
+            if os.path.isdir(entry['path']):
+                shutil.rmtree(entry['path'])
+            else:
+                os.remove(entry['path'])
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            print(f"Janitor could not delete {entry['path']}: {str(e)}")
+            return False
+        forget_file_etag(entry['path'])
+        folder = _folder_label(entry['folder'])
+        STORAGE_RECLAIMED_BYTES.labels(folder=folder, reason=reason).inc(entry['size'])
+        STORAGE_DELETED.labels(folder=folder, reason=reason).inc()
+        return True
+
+    def sweep(self, now=None):
+        """
+        Run one cleanup pass
+
+        Returns:
+            dict: Entries deleted and bytes reclaimed by this pass
+        """
+        now = now or time.time()
+        with self._lock:
+            keep = {os.path.abspath(path) for path in self.protected() if path} | self.leases.paths()
+            entries = self._scan()
+            deleted = reclaimed = 0
+            remaining = []
+            for entry in entries:
+                expired = entry['ttl'] and now - entry['last_used'] > entry['ttl']
+                if expired and entry['path'] not in keep and self._delete(entry, 'ttl'):
+                    deleted += 1
+                    reclaimed += entry['size']
+                else:
+                    remaining.append(entry)
+
+            total = sum(entry['size'] for entry in remaining)
+            if self.max_bytes and total > self.max_bytes:
+                for entry in sorted(remaining, key=lambda entry: entry['last_used']):
+                    if total <= self.max_bytes:
+                        break
+                    if entry['path'] not in keep and self._delete(entry, 'quota'):
+                        remaining.remove(entry)
+                        deleted += 1
+                        reclaimed += entry['size']
+                        total -= entry['size']
+
+            for folder in self.folders:
+                STORAGE_BYTES.labels(folder=_folder_label(folder)).set(
+                    sum(entry['size'] for entry in remaining if entry['folder'] == folder))
+
+            self._stats['sweeps'] += 1
+            self._stats['deleted'] += deleted
+            self._stats['reclaimed_bytes'] += reclaimed
+            self._stats['last_sweep'] = now
+            self._stats['bytes'] = total
+        if deleted:
+            print(f"Janitor deleted {deleted} entries and reclaimed {reclaimed} bytes")
+        return {'deleted': deleted, 'reclaimed_bytes': reclaimed}
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Janitor sweep failed: {str(e)}")
+
+    def start(self):
+        """Sweep every interval seconds in a background thread"""
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name='face-gen-janitor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread after its current sweep"""
+        self._stop.set()
+
+    def get_stats(self):
+        """
+        Get janitor statistics
+
+        Returns:
+            dict: Sweep count, totals deleted and reclaimed, managed bytes and the settings
+        """
+        with self._lock:
+            return {
+                **self._stats,
+                'max_bytes': self.max_bytes,
+                'interval': self.interval,
+                'ttl_seconds': {_folder_label(folder): ttl for folder, ttl in self.folders.items()}
+            }
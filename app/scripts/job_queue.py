@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Background Job Queue for Face-Gen
+Runs generation pipelines on a bounded executor so HTTP requests return immediately
+"""
+
+import math
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from .metrics import (STAGE_SECONDS, STAGE_QUEUE_WAIT, JOBS_COALESCED, QUEUE_DEPTH, QUEUE_DRAIN_SECONDS,
+                      QUEUE_ADMITTED, QUEUE_REJECTED)
+from .scheduling import FifoPolicy
+
+# Job states
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+
+FINISHED_STATES = (JOB_COMPLETED, JOB_FAILED)
+
+# Assumed job duration until the first job has finished
+DEFAULT_JOB_SECONDS = 60
+# Weight of the newest job in the moving average of job durations
+DURATION_SMOOTHING = 0.2
+
+class QueueFullError(Exception):
+    """Raised when a job is refused because max_queued jobs are already waiting"""
+
+    def __init__(self, retry_after):
+        super().__init__(f'Job queue is full, retry in {retry_after} seconds')
+        self.retry_after = retry_after
+
+class JobManager:
+    """
+    Tracks jobs submitted to a fixed-size worker pool.
+
+    The number of renders running at once is bounded by max_workers; extra
+    jobs wait in state 'queued'. Whenever a worker is free, the scheduling
+    policy (see scheduling.py, FIFO by default) picks the queued job it runs
+    next. With a worker_pool, each job thread hands its function to a worker
+    process and waits for it.
+
+    Jobs submitted with a key are single-flight: while a job with that key is
+    queued or running, submitting the same key again returns the existing job
+    instead of starting another one.
+
+    With max_queued set, at most that many jobs may wait; further submissions
+    raise QueueFullError with a retry time based on how long the queue needs
+    to drain, so overload turns into fast rejections instead of ever-longer waits.
+    """
+
+    def __init__(self, max_workers=1, max_finished_jobs=1000, worker_pool=None, max_queued=0, name='render',
+                 policy=None):
+        self.max_workers = max_workers
+        self.max_finished_jobs = max_finished_jobs
+        self.worker_pool = worker_pool
+        self.max_queued = max_queued
+        self.name = name
+        self.policy = policy or FifoPolicy()
+        self._average_seconds = None
+        self._rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='face-gen-job')
+        self._jobs = {}
+        # ID -> (func, args, kwargs, on_success) of each queued job
+        self._pending = {}
+        # key -> ID of the unfinished job submitted with it
+        self._keys = {}
+        self._coalesced = 0
+        # Held while jobs are admitted, so a group admitted with admit() is queued as a whole
+        self._admission = threading.RLock()
+        self._lock = threading.Lock()
+        # Notified whenever a job changes state
+        self._changed = threading.Condition(self._lock)
+
+    def submit(self, func, *args, job_id=None, info=None, files=None, key=None, bounded=True, cost=None,
+               client=None, size=None, on_success=None, **kwargs):
+        """
+        Queue func(*args, **kwargs) for background execution
+
+        func should return a JSON-serialisable dict on success and raise on failure.
+
+        Args:
+            job_id (str): Identifier to use, defaults to a new UUID
+            info (dict): Extra fields reported with the job while it runs (e.g. a stream URL)
+            files (list): Paths the job reads or writes, kept by the storage janitor (see referenced_files)
+            key (str): Identity of the work (e.g. a request fingerprint); a queued or running
+                job with the same key is returned instead of starting a new one
+            bounded (bool): Apply max_queued; False for work already admitted with admit()
+            cost (float): Predicted run time in seconds (see cost_model), used for ETAs and the
+                drain time; defaults to the average of finished jobs
+            client (str): Who submitted the job, for fair-share scheduling
+            size (float): Size hint (e.g. text length) used to order jobs when costs are unknown
+            on_success (callable): Called with the result in this process before the job is
+                reported completed (e.g. to index the result); not called when attaching
+
+        Returns:
+            dict: Snapshot of the new job, or of the unfinished job with the same key
+                (its id then differs from job_id)
+
+        Raises:
+            QueueFullError: If max_queued jobs are already waiting
+        """
+        job_id = job_id or uuid.uuid4().hex
+        job = {
+            'id': job_id,
+            'state': JOB_QUEUED,
+            'info': dict(info or {}),
+            'files': [path for path in (files or ()) if path],
+            'key': key,
+            'attached': 0,
+            'estimated_seconds': cost,
+            'client': client,
+            'size': size,
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'result': None,
+            'error': None
+        }
+        with self._admission, self._lock:
+            existing = self._jobs.get(self._keys.get(key)) if key else None
+            if existing is not None:
+                existing['attached'] += 1
+                self._coalesced += 1
+                JOBS_COALESCED.inc()
+                return dict(existing)
+            if bounded:
+                self._check_capacity_locked(1)
+            QUEUE_ADMITTED.labels(queue=self.name).inc()
+            self._jobs[job_id] = job
+            self._pending[job_id] = (func, args, kwargs, on_success)
+            if key:
+                self._keys[key] = job_id
+            self._prune_locked()
+            self._publish_locked()
+        # Each executor task runs whichever queued job the policy picks when a worker is free
+        self._executor.submit(self._run_next)
+        return self.get(job_id)
+
+    def _unfinished_locked(self):
+        queued = [job for job in self._jobs.values() if job['state'] == JOB_QUEUED]
+        running = [job for job in self._jobs.values() if job['state'] == JOB_RUNNING]
+        return queued, running
+
+    def _job_seconds_locked(self, job):
+        """Predicted total run time of a job"""
+        if job['estimated_seconds'] is not None:
+            return job['estimated_seconds']
+        return self._average_seconds or DEFAULT_JOB_SECONDS
+
+    def _remaining_seconds_locked(self, job, now):
+        """Predicted run time a job still needs"""
+        if job['state'] in FINISHED_STATES:
+            return 0.0
+        if job['state'] == JOB_RUNNING:
+            return max(self._job_seconds_locked(job) - (now - job['started_at']), 0.0)
+        return self._job_seconds_locked(job)
+
+    def _drain_seconds_locked(self, queued=None):
+        """Estimated seconds until the running jobs and the given (default: all) queued jobs have finished"""
+        all_queued, running = self._unfinished_locked()
+        if queued is None:
+            queued = all_queued
+        now = time.time()
+        work = sum(self._remaining_seconds_locked(job, now) for job in running + queued)
+        return work / self.max_workers
+
+    def _publish_locked(self):
+        queued, _ = self._unfinished_locked()
+        QUEUE_DEPTH.labels(queue=self.name).set(len(queued))
+        QUEUE_DRAIN_SECONDS.labels(queue=self.name).set(self._drain_seconds_locked())
+
+    def _check_capacity_locked(self, count):
+        if not self.max_queued:
+            return
+        queued, _ = self._unfinished_locked()
+        # Work larger than the whole queue is still admitted when nothing is waiting
+        if queued and len(queued) + count > self.max_queued:
+            self._rejected += 1
+            QUEUE_REJECTED.labels(queue=self.name).inc()
+            raise QueueFullError(max(1, math.ceil(self._drain_seconds_locked())))
+
+    def check_capacity(self, count=1):
+        """
+        Check that count more jobs may be queued
+
+        Raises:
+            QueueFullError: If they would exceed max_queued
+        """
+        with self._lock:
+            self._check_capacity_locked(count)
+
+    @contextmanager
+    def admit(self, count):
+        """
+        Admit count jobs as a whole
+
+        Submit them with bounded=False inside the block; other submissions wait
+        until it ends, so the group is never split by a full queue.
+
+        Raises:
+            QueueFullError: If count more jobs would exceed max_queued
+        """
+        with self._admission:
+            self.check_capacity(count)
+            yield
+
+    def _order_locked(self):
+        """Queued jobs, next to start first"""
+        queued, _ = self._unfinished_locked()
+        return self.policy.order(queued, list(self._jobs.values()), time.time())
+
+    def _run_next(self):
+        with self._lock:
+            order = self._order_locked()
+            if not order:
+                return
+            job = order[0]
+            func, args, kwargs, on_success = self._pending.pop(job['id'])
+            started_at = time.time()
+            job.update(state=JOB_RUNNING, started_at=started_at)
+            self._publish_locked()
+            self._changed.notify_all()
+        STAGE_SECONDS.labels(stage=STAGE_QUEUE_WAIT).observe(started_at - job['created_at'])
+        self._run(job['id'], func, args, kwargs, started_at, on_success)
+
+    def _run(self, job_id, func, args, kwargs, started_at, on_success=None):
+        try:
+            result = self.execute(func, *args, **kwargs)
+            finished_at = time.time()
+            if on_success is not None:
+                try:
+                    on_success(result)
+                except Exception as e:
+                    # The job itself succeeded
+                    print(f"Job {job_id} success callback failed: {str(e)}")
+            with self._lock:
+                seconds = finished_at - started_at
+                if self._average_seconds is None:
+                    self._average_seconds = seconds
+                else:
+                    self._average_seconds += DURATION_SMOOTHING * (seconds - self._average_seconds)
+            self._update(job_id, state=JOB_COMPLETED, result=result, finished_at=finished_at)
+        except Exception as e:
+            print(f"Job {job_id} failed: {str(e)}")
+            self._update(job_id, state=JOB_FAILED, error=str(e), finished_at=time.time())
+
+    def execute(self, func, *args, **kwargs):
+        """Run func where jobs run (in a worker process if there is a pool) and return its result"""
+        if self.worker_pool is not None:
+            return self.worker_pool.run(func, *args, **kwargs)
+        return func(*args, **kwargs)
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+                if job['state'] in FINISHED_STATES and job['key'] and self._keys.get(job['key']) == job_id:
+                    del self._keys[job['key']]
+            self._publish_locked()
+            self._changed.notify_all()
+
+    def _prune_locked(self):
+        """Forget the oldest finished jobs once more than max_finished_jobs are kept"""
+        finished = [job for job in self._jobs.values() if job['state'] in FINISHED_STATES]
+        excess = len(finished) - self.max_finished_jobs
+        if excess > 0:
+            finished.sort(key=lambda job: job['finished_at'])
+            for job in finished[:excess]:
+                del self._jobs[job['id']]
+
+    def get(self, job_id):
+        """
+        Get a snapshot of a job
+
+        Returns:
+            dict: Job fields, or None if the job is unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def referenced_files(self, finished_within=0):
+        """
+        Paths that jobs still need
+
+        Args:
+            finished_within (float): Also include jobs that finished this many seconds ago
+                or less, so their results can still be downloaded
+
+        Returns:
+            set: Files of queued, running and recently finished jobs
+        """
+        cutoff = time.time() - finished_within
+        with self._lock:
+            return {path for job in self._jobs.values()
+                    if job['finished_at'] is None or job['finished_at'] >= cutoff
+                    for path in job['files']}
+
+    def as_completed(self, job_ids, timeout=None):
+        """
+        Yield job snapshots in the order the jobs finish
+
+        Args:
+            job_ids (list): Jobs to wait for
+            timeout (float): Give up after this many seconds (None waits forever)
+
+        Yields:
+            dict: Snapshot of each finished job
+        """
+        pending = list(job_ids)
+        deadline = None if timeout is None else time.time() + timeout
+        while pending:
+            with self._lock:
+                while True:
+                    finished = [job_id for job_id in pending
+                                if job_id not in self._jobs or self._jobs[job_id]['state'] in FINISHED_STATES]
+                    if finished:
+                        break
+                    remaining = None if deadline is None else deadline - time.time()
+                    if remaining is not None and remaining <= 0:
+                        return
+                    self._changed.wait(remaining)
+                snapshots = [dict(self._jobs[job_id]) for job_id in finished if job_id in self._jobs]
+            for job_id in finished:
+                pending.remove(job_id)
+            yield from snapshots
+
+    def eta_seconds(self, job_id):
+        """
+        Estimate how long until a job finishes
+
+        Queued jobs wait for the running jobs and the jobs the policy would
+        start before them (shared over the workers), then need their own
+        predicted run time.
+        Running jobs need what is left of their predicted run time.
+
+        Returns:
+            float: Seconds, 0 for finished jobs, or None if the job is unknown
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job['state'] != JOB_QUEUED:
+                return self._remaining_seconds_locked(job, time.time())
+            order = self._order_locked()
+            ahead = order[:order.index(job)]
+            return self._drain_seconds_locked(ahead) + self._job_seconds_locked(job)
+
+    def wait(self, job_id, timeout=None):
+        """
+        Wait for a job to finish
+
+        Returns:
+            dict: Snapshot of the finished job, or None if it is unknown or the timeout expired
+        """
+        return next(self.as_completed([job_id], timeout), None)
+
+    def get_stats(self):
+        """
+        Get job counts by state
+
+        Returns:
+            dict: Number of jobs in each state, requests attached to an existing job or rejected,
+                the estimated drain time, the worker and queue limits and the scheduling policy
+        """
+        with self._lock:
+            counts = {state: 0 for state in (JOB_QUEUED, JOB_RUNNING, JOB_COMPLETED, JOB_FAILED)}
+            for job in self._jobs.values():
+                counts[job['state']] += 1
+            counts['coalesced'] = self._coalesced
+            counts['rejected'] = self._rejected
+            counts['estimated_drain_seconds'] = round(self._drain_seconds_locked(), 1)
+        counts['max_workers'] = self.max_workers
+        counts['max_queued'] = self.max_queued
+        counts['policy'] = self.policy.name
+        if self.worker_pool is not None:
+            counts['worker_pool'] = self.worker_pool.get_stats()
+        return counts
+
+    def shutdown(self, wait=True):
+        """Stop accepting jobs and optionally wait for running ones"""
+        self._executor.shutdown(wait=wait)
+        if self.worker_pool is not None:
+            self.worker_pool.shutdown(wait=wait)
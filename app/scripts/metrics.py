@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Prometheus Metrics for Face-Gen
+Per-stage latency histograms, outcome counters and resource gauges served on /metrics
+"""
+
+import os
+from prometheus_client import (Counter, Gauge, Histogram, CollectorRegistry, generate_latest, multiprocess,
+                               CONTENT_TYPE_LATEST, REGISTRY)
+
+# Stages of a request, in the order they run
+STAGE_UPLOAD_SAVE = 'upload_save'
+STAGE_QUEUE_WAIT = 'queue_wait'
+STAGE_TTS = 'tts'
+STAGE_WAV2LIP = 'wav2lip'
+STAGE_ENCODE = 'encode'
+
+# From a cached face upload (milliseconds) to a long Tortoise render (minutes)
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600, 1200)
+
+STAGE_SECONDS = Histogram(
+    'face_gen_stage_duration_seconds',
+    'Time spent in each pipeline stage (wav2lip includes encode)',
+    ['stage'],
+    buckets=STAGE_BUCKETS
+)
+STAGE_RESULTS = Counter(
+    'face_gen_stage_results_total',
+    'Finished pipeline stages by outcome',
+    ['stage', 'outcome']
+)
+# Gauges are summed over live processes when pipeline worker processes are used
+JOBS_IN_FLIGHT = Gauge(
+    'face_gen_jobs_in_flight',
+    'Pipelines currently running',
+    multiprocess_mode='livesum'
+)
+MODELS_LOADED = Gauge(
+    'face_gen_models_loaded',
+    'Model instances resident in memory',
+    ['model', 'device'],
+    multiprocess_mode='livesum'
+)
+JOBS_COALESCED = Counter(
+    'face_gen_jobs_coalesced_total',
+    'Requests attached to an identical queued or running job instead of rendering again'
+)
+QUEUE_DEPTH = Gauge(
+    'face_gen_queue_depth',
+    'Jobs waiting for a worker',
+    ['queue'],
+    multiprocess_mode='livesum'
+)
+QUEUE_DRAIN_SECONDS = Gauge(
+    'face_gen_queue_drain_seconds',
+    'Estimated seconds until every queued and running job has finished',
+    ['queue'],
+    multiprocess_mode='livesum'
+)
+QUEUE_ADMITTED = Counter(
+    'face_gen_queue_admitted_total',
+    'Jobs accepted into the queue',
+    ['queue']
+)
+QUEUE_REJECTED = Counter(
+    'face_gen_queue_rejected_total',
+    'Jobs refused because the queue was full',
+    ['queue']
+)
+STORAGE_RECLAIMED_BYTES = Counter(
+    'face_gen_storage_reclaimed_bytes_total',
+    'Bytes freed by the storage janitor',
+    ['folder', 'reason']
+)
+STORAGE_DELETED = Counter(
+    'face_gen_storage_deleted_total',
+    'Files and stream directories deleted by the storage janitor',
+    ['folder', 'reason']
+)
+STORAGE_BYTES = Gauge(
+    'face_gen_storage_bytes',
+    'Size of each managed folder after the last janitor sweep',
+    ['folder'],
+    multiprocess_mode='livesum'
+)
+RESULT_LOOKUPS = Counter(
+    'face_gen_result_lookups_total',
+    'Lookups of finished videos for identical requests',
+    ['outcome']
+)
+
+def observe_stage(stage, seconds, success=True):
+    """Record a finished stage"""
+    STAGE_SECONDS.labels(stage=stage).observe(seconds)
+    STAGE_RESULTS.labels(stage=stage, outcome='success' if success else 'failure').inc()
+
+def render_metrics(registry=REGISTRY):
+    """
+    Render all metrics in the Prometheus text format
+
+    With PROMETHEUS_MULTIPROC_DIR set (required for pipeline worker processes)
+    the values written by every process are merged.
+
+    Returns:
+        tuple: (body bytes, content type)
+    """
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
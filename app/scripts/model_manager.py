@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+TTS Model Manager for Face-Gen
+Keeps Tortoise TTS models resident in the process so warm requests never reload weights
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from tortoise.api import TextToSpeech
+from .device_detection import get_optimal_device, configure_device_for_model
+from .metrics import MODELS_LOADED
+
+# Tortoise sub-models that have to live on the inference device
+TTS_SUBMODELS = ('autoregressive', 'diffusion', 'vocoder', 'clvp')
+
+# Instances kept per device; more than one lets chunks and concurrent jobs overlap on
+# the process's shared torch threads (see tts_generate.synthesize)
+TTS_MAX_INSTANCES = int(os.environ.get('FACE_GEN_TTS_INSTANCES', '1'))
+
+class TTSModelManager:
+    """
+    Process-wide pool of Tortoise TextToSpeech instances, per device.
+
+    Models are built on first use and then kept on their device. An instance is
+    lent to one caller at a time because Tortoise moves sub-models around during
+    a call and is not safe to share between concurrent generations. Up to
+    max_instances instances are loaded per device; further callers wait for one
+    to be returned.
+    """
+
+    def __init__(self, max_instances=TTS_MAX_INSTANCES):
+        self.max_instances = max(1, max_instances)
+        self._cond = threading.Condition()
+        self._entries = {}
+        self._idle = {}
+        self._loading = {}
+        self._hits = 0
+        self._misses = 0
+
+    def _load(self, device):
+        """Build a TextToSpeech instance and move its sub-models to device"""
+        print(f"Loading Tortoise TTS models for device: {device}")
+        start_time = time.time()
+        tts = TextToSpeech()
+        actual_device = device
+
+        if device in ('mps', 'cuda'):
+            try:
+                print(f"Attempting to use {device.upper()} acceleration...")
+                for name in TTS_SUBMODELS:
+                    if hasattr(tts, name):
+                        setattr(tts, name, configure_device_for_model(getattr(tts, name), device))
+                print(f"Models configured for {device.upper()} device")
+            except Exception as e:
+                print(f"{device.upper()} configuration failed, falling back to CPU: {str(e)}")
+                actual_device = 'cpu'
+                print(f"Switching to device: {actual_device}")
+
+        load_time = time.time() - start_time
+        print(f"Tortoise TTS models loaded in {load_time:.2f} seconds")
+        return {
+            'tts': tts,
+            'device': actual_device,
+            'load_time': load_time,
+            'loaded_at': time.time()
+        }
+
+    def _checkout(self, device):
+        """Take an idle instance, load a new one, or wait for one to be returned"""
+        with self._cond:
+            while True:
+                idle = self._idle.setdefault(device, [])
+                if idle:
+                    self._hits += 1
+                    return idle.pop()
+                loaded = len(self._entries.get(device, [])) + self._loading.get(device, 0)
+                if loaded < self.max_instances:
+                    self._misses += 1
+                    self._loading[device] = self._loading.get(device, 0) + 1
+                    break
+                self._cond.wait()
+
+        try:
+            entry = self._load(device)
+        except Exception:
+            with self._cond:
+                self._loading[device] -= 1
+                self._cond.notify_all()
+            raise
+
+        with self._cond:
+            self._loading[device] -= 1
+            self._entries.setdefault(device, []).append(entry)
+            MODELS_LOADED.labels(model='tortoise', device=device).set(len(self._entries[device]))
+        return entry
+
+    def _checkin(self, device, entry):
+        with self._cond:
+            # Instances dropped by unload() while lent out are not returned to the pool
+            if any(e is entry for e in self._entries.get(device, [])):
+                self._idle.setdefault(device, []).append(entry)
+            self._cond.notify_all()
+
+    @contextmanager
+    def acquire(self, device=None):
+        """
+        Borrow a warm TTS instance for a device
+
+        Args:
+            device (str): Target device, defaults to the optimal device
+
+        Yields:
+            tuple: (TextToSpeech instance, device the models actually run on)
+        """
+        if device is None:
+            device = get_optimal_device()
+        entry = self._checkout(device)
+        try:
+            yield entry['tts'], entry['device']
+        finally:
+            self._checkin(device, entry)
+
+    def warmup(self, device=None):
+        """Load the models for a device ahead of the first request"""
+        with self.acquire(device) as (_, actual_device):
+            return actual_device
+
+    def unload(self, device=None):
+        """Drop cached instances (all devices if device is None)"""
+        with self._cond:
+            devices = list(self._entries) if device is None else [device]
+            for name in devices:
+                self._entries.pop(name, None)
+                self._idle.pop(name, None)
+                MODELS_LOADED.labels(model='tortoise', device=name).set(0)
+            self._cond.notify_all()
+
+    def get_stats(self):
+        """
+        Get cache statistics
+
+        Returns:
+            dict: Hit/miss counts and per-device instance counts and load times
+        """
+        with self._cond:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'max_instances': self.max_instances,
+                'loaded': {
+                    device: {
+                        'device': entries[0]['device'],
+                        'instances': len(entries),
+                        'idle': len(self._idle.get(device, [])),
+                        'load_time': round(max(entry['load_time'] for entry in entries), 3),
+                        'loaded_at': min(entry['loaded_at'] for entry in entries)
+                    }
+                    for device, entries in self._entries.items() if entries
+                }
+            }
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_tts_model_manager():
+    """
+    Get the process-wide TTS model manager
+
+    Returns:
+        TTSModelManager: Shared manager instance
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = TTSModelManager()
+        return _manager
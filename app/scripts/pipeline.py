@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Generation Pipeline for Face-Gen
+Chains TTS and Wav2Lip to turn a face image and text into a talking-face video
+"""
+
+import os
+from .cost_model import record_job_costs
+from .metrics import JOBS_IN_FLIGHT, STAGE_QUEUE_WAIT, STAGE_TTS, STAGE_WAV2LIP
+from .tracing import JobTrace, annotate, trace_stage
+from .tts_generate import generate_speech, TTS_SAMPLE_RATE
+from .wav2lip_run import run_wav2lip
+from .workspace import JobWorkspace, new_job_id
+
+class PipelineError(Exception):
+    """Raised when a pipeline stage fails"""
+
+def run_pipeline(face_path, text, audio_path, video_path, stream_dir=None, workspace_id=None, voice=None,
+                 tts_settings=None, trace=None):
+    """
+    Run the full TTS -> Wav2Lip pipeline
+
+    Intermediate files are written to a per-job workspace; the audio and video
+    are renamed into place only once complete, and the workspace is removed.
+    The speech waveform is handed from TTS to Wav2Lip in memory, so the WAV
+    file is only written when audio_path asks for it.
+
+    Every stage is timed on a JobTrace, which is returned with the result and
+    appended to the trace log whether the job succeeds or fails. Successful
+    jobs also feed the cost model used for ETAs.
+
+    Args:
+        face_path (str): Path to the uploaded face image
+        text (str): Text for the avatar to speak
+        audio_path (str): Output path for the generated speech, or None to skip saving it
+        video_path (str): Output path for the generated video
+        stream_dir (str): Optional directory for an HLS stream written during the render
+        workspace_id (str): Workspace name (normally the job ID), defaults to a new UUID
+        voice (str): Voice library ID, defaults to Tortoise's random voice
+        tts_settings (dict): Preset, params and target_latency from parse_tts_settings
+        trace (JobTrace): Trace started when the request arrived, defaults to a new one
+
+    Returns:
+        dict: Result with the video filename, download URL and stage trace
+
+    Raises:
+        PipelineError: If TTS or video generation fails
+    """
+    workspace_id = workspace_id or new_job_id()
+    if trace is None:
+        trace = JobTrace(workspace_id)
+    else:
+        trace.record_wait(STAGE_QUEUE_WAIT)
+
+    try:
+        with JOBS_IN_FLIGHT.track_inprogress(), trace.activate(), JobWorkspace(workspace_id) as workspace:
+            work_audio_path = workspace.file('audio.wav')
+            work_video_path = workspace.file('video.mp4')
+
+            print(f"Generating TTS for text: {text[:50]}...")
+            with trace_stage(STAGE_TTS, text_length=len(text)):
+                waveform = generate_speech(text, work_audio_path if audio_path else None, voice=voice,
+                                           **(tts_settings or {}))
+                if waveform is None:
+                    raise PipelineError('TTS generation failed')
+                audio_seconds = round(waveform.numel() / TTS_SAMPLE_RATE, 3)
+                annotate(audio_seconds=audio_seconds)
+
+            print("Generating video...")
+            with trace_stage(STAGE_WAV2LIP, text_length=len(text), audio_seconds=audio_seconds):
+                if not run_wav2lip(face_path, work_audio_path, work_video_path, stream_dir=stream_dir,
+                                   waveform=waveform):
+                    raise PipelineError('Video generation failed')
+
+            if audio_path:
+                workspace.publish('audio.wav', audio_path)
+            workspace.publish('video.mp4', video_path)
+    except Exception as e:
+        trace.write_log(outcome='failed', error=str(e))
+        raise
+
+    trace.write_log(outcome='completed')
+    record_job_costs(trace.to_dict(), tts_settings)
+    video_filename = os.path.basename(video_path)
+    return {
+        'video_filename': video_filename,
+        'download_url': f'/download/{video_filename}',
+        'trace': trace.to_dict()
+    }
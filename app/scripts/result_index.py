@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Finished Result Index for Face-Gen
+Maps job fingerprints to rendered videos so identical requests reuse them
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from .metrics import RESULT_LOOKUPS
+from .tts_cache import normalize_text
+
+RESULT_INDEX_PATH = os.environ.get('FACE_GEN_RESULT_INDEX', os.path.join('cache', 'results.json'))
+# Entries kept in the index; the oldest are forgotten first (their videos are left to the janitor)
+RESULT_INDEX_MAX_ENTRIES = int(os.environ.get('FACE_GEN_RESULT_INDEX_ENTRIES', '10000'))
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """
+    Hash a file's contents
+
+    Returns:
+        str: SHA-256 hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def make_result_fingerprint(image_hash, text, voice, tts_settings, wav2lip_options, model_version='unknown'):
+    """
+    Build the fingerprint of a generation request
+
+    Two requests with the same fingerprint produce the same video: TTS is
+    seeded from its inputs (see tts_generate.tts_seed) and Wav2Lip is deterministic.
+
+    Args:
+        image_hash (str): SHA-256 of the stored (normalized) face image
+        text (str): Script; whitespace differences are ignored
+        voice (str): Voice library ID
+        tts_settings (dict): Preset, params and target_latency from parse_tts_settings
+        wav2lip_options (dict): Settings that change the render (see get_wav2lip_options)
+        model_version (str): Tortoise version
+
+    Returns:
+        str: SHA-256 hex digest of the normalized request
+    """
+    payload = json.dumps({
+        'image': image_hash,
+        'text': normalize_text(text),
+        'voice': voice,
+        'tts': tts_settings or {},
+        'wav2lip': wav2lip_options,
+        'model_version': model_version
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class ResultIndex:
+    """
+    Fingerprint -> video filename for every finished render.
+
+    The index is a JSON file, so finished videos are found again after a
+    restart. Entries whose video has been deleted (e.g. by the storage
+    janitor) are dropped when they are looked up.
+    """
+
+    def __init__(self, path=RESULT_INDEX_PATH, max_entries=RESULT_INDEX_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._hits = 0
+        self._misses = 0
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Could not load result index: {str(e)}")
+
+    def _save_locked(self):
+        if not self.path:
+            return
+        try:
+            directory = os.path.dirname(self.path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            # A lost index only means the next identical request renders again
+            print(f"Could not save result index: {str(e)}")
+
+    def lookup(self, fingerprint, video_folder):
+        """
+        Find the video of an earlier identical request
+
+        Args:
+            fingerprint (str): Output of make_result_fingerprint
+            video_folder (str): Folder the videos are served from
+
+        Returns:
+            str: Video filename, or None if there is no finished video
+        """
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+            if entry is not None and not os.path.exists(os.path.join(video_folder, entry['video_filename'])):
+                del self._entries[fingerprint]
+                self._save_locked()
+                entry = None
+            if entry is None:
+                self._misses += 1
+                RESULT_LOOKUPS.labels(outcome='miss').inc()
+                return None
+            self._hits += 1
+            RESULT_LOOKUPS.labels(outcome='hit').inc()
+            return entry['video_filename']
+
+    def record(self, fingerprint, video_filename):
+        """Remember the video rendered for a fingerprint"""
+        with self._lock:
+            self._entries.pop(fingerprint, None)
+            self._entries[fingerprint] = {'video_filename': video_filename, 'created_at': time.time()}
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+            self._save_locked()
+
+    def get_stats(self):
+        """
+        Get index statistics
+
+        Returns:
+            dict: Entry count, hits, misses and hit rate
+        """
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                'entries': len(self._entries),
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / total if total else 0.0
+            }
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_result_index():
+    """
+    Get the process-wide result index
+
+    Returns:
+        ResultIndex: Shared instance
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ResultIndex()
+        return _index
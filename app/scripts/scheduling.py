@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Job Scheduling Policies for Face-Gen
+Decide which queued render a free worker picks up next
+"""
+
+import os
+
+# 'fifo', 'sjf' (shortest estimated job first, with aging) or 'fair' (per-client fair share)
+SCHEDULING_POLICY = os.environ.get('FACE_GEN_SCHEDULER', 'sjf')
+# Seconds after which a waiting job counts as the smallest job, so long jobs are never starved
+SCHEDULER_MAX_WAIT = float(os.environ.get('FACE_GEN_SCHEDULER_MAX_WAIT', '600'))
+
+def job_sizes(jobs):
+    """
+    Comparable sizes of queued jobs
+
+    The predicted run time (estimated_seconds) is used when every job has one;
+    otherwise all jobs are compared by their size hint (e.g. text length), so
+    seconds and characters are never mixed.
+
+    Returns:
+        dict: {job id: size}
+    """
+    if all(job['estimated_seconds'] is not None for job in jobs):
+        return {job['id']: job['estimated_seconds'] for job in jobs}
+    return {job['id']: job['size'] or 0 for job in jobs}
+
+class FifoPolicy:
+    """Jobs run in the order they were submitted"""
+
+    name = 'fifo'
+
+    def order(self, queued, jobs, now):
+        """
+        Order queued jobs by when they should start
+
+        Args:
+            queued (list): Job dicts waiting for a worker
+            jobs (list): Every known job, including running and finished ones
+            now (float): Current time
+
+        Returns:
+            list: The queued jobs, next to start first
+        """
+        return sorted(queued, key=lambda job: job['created_at'])
+
+class ShortestJobFirstPolicy(FifoPolicy):
+    """
+    The smallest job runs first, so short renders do not wait behind long ones.
+
+    A job's size counts for less the longer it waits and for nothing once it
+    has waited max_wait seconds; such jobs then run in submission order.
+    """
+
+    name = 'sjf'
+
+    def __init__(self, max_wait=SCHEDULER_MAX_WAIT):
+        self.max_wait = max_wait
+
+    def order(self, queued, jobs, now):
+        sizes = job_sizes(queued)
+
+        def priority(job):
+            aging = max(1 - (now - job['created_at']) / self.max_wait, 0) if self.max_wait else 1
+            return sizes[job['id']] * aging, job['created_at']
+
+        return sorted(queued, key=priority)
+
+class FairSharePolicy(FifoPolicy):
+    """
+    Workers are shared out between clients in turn.
+
+    The next job comes from the client with the fewest running jobs, ties going
+    to the client that started a job least recently; each client's own jobs
+    run in submission order. One client's large batch therefore delays other
+    clients by at most one job per worker.
+    """
+
+    name = 'fair'
+
+    def order(self, queued, jobs, now):
+        running = {}
+        last_started = {}
+        for job in jobs:
+            if job['started_at'] is None:
+                continue
+            client = job['client']
+            last_started[client] = max(last_started.get(client, 0), job['started_at'])
+            if job['finished_at'] is None:
+                running[client] = running.get(client, 0) + 1
+
+        # Interleave the clients: every client's first job, then every client's second job...
+        turn = {}
+        ranked = []
+        for job in sorted(queued, key=lambda job: job['created_at']):
+            client = job['client']
+            ranked.append((turn.get(client, 0) + running.get(client, 0), last_started.get(client, 0),
+                           job['created_at'], job))
+            turn[client] = turn.get(client, 0) + 1
+        return [entry[-1] for entry in sorted(ranked, key=lambda entry: entry[:3])]
+
+SCHEDULING_POLICIES = {policy.name: policy for policy in (FifoPolicy, ShortestJobFirstPolicy, FairSharePolicy)}
+
+def create_scheduling_policy(name=SCHEDULING_POLICY, max_wait=SCHEDULER_MAX_WAIT):
+    """
+    Build the policy described by FACE_GEN_SCHEDULER
+
+    Args:
+        name (str): 'fifo', 'sjf' or 'fair'
+        max_wait (float): Aging limit for 'sjf'
+
+    Returns:
+        FifoPolicy: The policy
+
+    Raises:
+        ValueError: If the name is unknown
+    """
+    if name not in SCHEDULING_POLICIES:
+        raise ValueError(f"Unknown scheduling policy: {name} (choose from {', '.join(SCHEDULING_POLICIES)})")
+    if name == ShortestJobFirstPolicy.name:
+        return ShortestJobFirstPolicy(max_wait=max_wait)
+    return SCHEDULING_POLICIES[name]()
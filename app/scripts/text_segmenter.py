@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Text Segmenter for Face-Gen
+Splits scripts into sentence-sized chunks for TTS, handling English and CJK punctuation
+"""
+
+import re
+
+# Sentence terminators: English needs trailing whitespace, CJK punctuation does not
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+|(?<=[。！？；…])|\n+')
+
+# Weaker break points used to split sentences that are still too long
+CLAUSE_END = re.compile(r'(?<=[,;:])\s+|(?<=[，、；：])')
+
+def _join(left, right):
+    """Join two pieces, without a space after CJK text"""
+    if not left:
+        return right
+    separator = '' if ord(left[-1]) >= 0x2E80 else ' '
+    return f"{left}{separator}{right}"
+
+def split_sentences(text):
+    """
+    Split text into sentences
+
+    Returns:
+        list: Non-empty sentences with surrounding whitespace removed
+    """
+    return [s.strip() for s in SENTENCE_END.split(text) if s and s.strip()]
+
+def _split_long(sentence, max_chars):
+    """Break an over-long sentence at clause boundaries, then at max_chars"""
+    pieces = []
+    current = ''
+    for clause in (c.strip() for c in CLAUSE_END.split(sentence)):
+        if not clause:
+            continue
+        while len(clause) > max_chars:
+            if current:
+                pieces.append(current)
+                current = ''
+            pieces.append(clause[:max_chars])
+            clause = clause[max_chars:].strip()
+        if current and len(_join(current, clause)) > max_chars:
+            pieces.append(current)
+            current = ''
+        current = _join(current, clause)
+    if current:
+        pieces.append(current)
+    return pieces
+
+def split_text(text, max_chars=250):
+    """
+    Split text into chunks of whole sentences no longer than max_chars
+
+    Short sentences are merged so each chunk is close to max_chars; a single
+    sentence longer than max_chars is split at commas and then hard-wrapped.
+
+    Args:
+        text (str): Input text
+        max_chars (int): Maximum chunk length in characters
+
+    Returns:
+        list: Text chunks in reading order
+    """
+    chunks = []
+    current = ''
+    for sentence in split_sentences(text):
+        for piece in _split_long(sentence, max_chars) if len(sentence) > max_chars else [sentence]:
+            if current and len(_join(current, piece)) > max_chars:
+                chunks.append(current)
+                current = ''
+            current = _join(current, piece)
+    if current:
+        chunks.append(current)
+    return chunks
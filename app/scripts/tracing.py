@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Per-job Stage Tracing for Face-Gen
+Records when each pipeline stage ran, how long it took and what it worked on
+"""
+
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+import psutil
+from .metrics import observe_stage
+
+# JSON-lines file every finished trace is appended to; empty disables the log
+TRACE_LOG_PATH = os.environ.get('FACE_GEN_TRACE_LOG', os.path.join('logs', 'traces.jsonl'))
+
+# Fields every stage record carries, None when a stage does not know them
+STAGE_FIELDS = ('device', 'text_length', 'audio_seconds', 'frame_count')
+
+_active_trace = contextvars.ContextVar('face_gen_trace', default=None)
+_log_lock = threading.Lock()
+
+def peak_rss_mb():
+    """Peak resident set size of the process so far, in MB"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    except ImportError:
+        memory = psutil.Process().memory_info()
+        return round(getattr(memory, 'peak_wset', memory.rss) / (1024 * 1024), 1)
+
+class JobTrace:
+    """
+    Ordered list of stage records for one job.
+
+    Stages are timed with stage(); code deeper in the call stack adds
+    details to the innermost running stage with annotate() without needing
+    a reference to the trace.
+    """
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.created_at = time.time()
+        self.stages = []
+        self._open = []
+        self._lock = threading.Lock()
+
+    def record(self, stage, start, duration, **fields):
+        """Add an already-measured stage"""
+        entry = {'stage': stage, 'start': start, 'duration': round(duration, 4)}
+        entry.update({name: fields.get(name) for name in STAGE_FIELDS})
+        entry['peak_rss_mb'] = peak_rss_mb()
+        with self._lock:
+            self.stages.append(entry)
+        return entry
+
+    def record_wait(self, stage):
+        """Record the time since the last stage ended (or the trace began) as a stage"""
+        with self._lock:
+            since = max([entry['start'] + entry['duration'] for entry in self.stages] or [self.created_at])
+        return self.record(stage, since, max(time.time() - since, 0.0))
+
+    @contextmanager
+    def stage(self, stage, **fields):
+        """
+        Time the enclosed block as a stage
+
+        Yields:
+            dict: The stage record, which the block may add fields to
+        """
+        entry = {'stage': stage, 'start': time.time(), 'duration': None}
+        entry.update({name: fields.get(name) for name in STAGE_FIELDS})
+        with self._lock:
+            self.stages.append(entry)
+            self._open.append(entry)
+        token = _active_trace.set(self)
+        start_time = time.perf_counter()
+        success = False
+        try:
+            yield entry
+            success = True
+        finally:
+            duration = time.perf_counter() - start_time
+            entry['duration'] = round(duration, 4)
+            entry['peak_rss_mb'] = peak_rss_mb()
+            if not success:
+                entry['failed'] = True
+            with self._lock:
+                self._open.remove(entry)
+            _active_trace.reset(token)
+            observe_stage(stage, duration, success)
+
+    def __getstate__(self):
+        # Traces travel to worker processes with the job; locks cannot be pickled
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def annotate(self, **fields):
+        """Set fields on the innermost running stage"""
+        with self._lock:
+            if self._open:
+                self._open[-1].update({name: value for name, value in fields.items() if name in STAGE_FIELDS})
+
+    @contextmanager
+    def activate(self):
+        """Make this the current trace for trace_stage() and annotate() calls"""
+        token = _active_trace.set(self)
+        try:
+            yield self
+        finally:
+            _active_trace.reset(token)
+
+    def to_dict(self):
+        """
+        JSON-serialisable trace
+
+        Returns:
+            dict: job_id, created_at, total_seconds and the list of stages
+        """
+        with self._lock:
+            stages = [dict(entry) for entry in self.stages]
+        return {
+            'job_id': self.job_id,
+            'created_at': self.created_at,
+            'total_seconds': round(time.time() - self.created_at, 4),
+            'stages': stages
+        }
+
+    def write_log(self, path=TRACE_LOG_PATH, **extra):
+        """Append the trace as one JSON line; failures to log never fail the job"""
+        if not path:
+            return
+        line = json.dumps({**self.to_dict(), **extra}, ensure_ascii=False)
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with _log_lock:
+                with open(path, 'a', encoding='utf-8') as f:
+                    f.write(line + '\n')
+        except OSError as e:
+            print(f"Could not write trace log: {str(e)}")
+
+def current_trace():
+    """The trace of the job running in this context, or None"""
+    return _active_trace.get()
+
+@contextmanager
+def trace_stage(stage, **fields):
+    """
+    Time a stage on the current trace, or only in the metrics if there is none
+
+    Yields:
+        dict: The stage record (a throwaway dict when no trace is active)
+    """
+    trace = current_trace()
+    if trace is not None:
+        with trace.stage(stage, **fields) as entry:
+            yield entry
+        return
+    start_time = time.perf_counter()
+    success = False
+    try:
+        yield {}
+        success = True
+    finally:
+        observe_stage(stage, time.perf_counter() - start_time, success)
+
+def annotate(**fields):
+    """Add fields (device, audio_seconds, frame_count, ...) to the running stage of the current trace"""
+    trace = current_trace()
+    if trace is not None:
+        trace.annotate(**fields)
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+TTS Audio Cache for Face-Gen
+Content-addressed on-disk cache of synthesized waveforms with LRU eviction
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
+
+TTS_CACHE_DIR = os.environ.get('FACE_GEN_TTS_CACHE_DIR', os.path.join('cache', 'tts'))
+TTS_CACHE_MAX_BYTES = int(float(os.environ.get('FACE_GEN_TTS_CACHE_MB', '512')) * 1024 * 1024)
+
+def normalize_text(text):
+    """Normalize text so trivially different inputs share a cache entry"""
+    text = unicodedata.normalize('NFC', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+def make_cache_key(text, voice='random', preset='default', sample_rate=24000, model_version='unknown'):
+    """
+    Build the cache key for a synthesis request
+
+    Returns:
+        str: SHA-256 hex digest of the normalized request
+    """
+    payload = json.dumps({
+        'text': normalize_text(text),
+        'voice': voice,
+        'preset': preset,
+        'sample_rate': sample_rate,
+        'model_version': model_version
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class TTSAudioCache:
+    """
+    Stores finished WAV files under their cache key.
+
+    Entries are kept in least-recently-used order; once the total size exceeds
+    max_bytes the oldest entries are deleted. A max_bytes of 0 disables the cache.
+
+    Several processes (e.g. pipeline workers) may share cache_dir, so every
+    write re-reads sizes and use times from the directory before evicting,
+    and a lookup that misses checks for a file another process stored.
+    """
+
+    def __init__(self, cache_dir=TTS_CACHE_DIR, max_bytes=TTS_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        if self.enabled:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._scan()
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    def _scan(self):
+        """Rebuild the LRU index from the files already on disk"""
+        with self._lock:
+            self._scan_locked()
+            self._evict_locked()
+
+    def _scan_locked(self):
+        found = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.wav'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                # Evicted by another process in the meantime
+                continue
+            found.append((stat.st_mtime, name[:-4], stat.st_size))
+        self._entries = OrderedDict((key, size) for _, key, size in sorted(found))
+        self._total_bytes = sum(self._entries.values())
+
+    def lookup(self, key):
+        """
+        Find the cached WAV file for a key
+
+        Returns:
+            str: Path of the cached file on a hit, None on a miss
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            if key not in self._entries:
+                try:
+                    self._entries[key] = os.path.getsize(self._path(key))
+                    self._total_bytes += self._entries[key]
+                except OSError:
+                    self._misses += 1
+                    return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            path = self._path(key)
+            try:
+                # Keep mtime in LRU order so the order survives restarts
+                os.utime(path)
+            except OSError:
+                pass
+        return path
+
+    def forget(self, key):
+        """Drop an entry whose file turned out to be unreadable"""
+        with self._lock:
+            if key in self._entries:
+                self._drop_locked(key)
+                self._hits -= 1
+                self._misses += 1
+
+    def get(self, key, output_path):
+        """
+        Copy a cached waveform to output_path
+
+        Returns:
+            bool: True on a cache hit, False on a miss
+        """
+        path = self.lookup(key)
+        if path is None:
+            return False
+        try:
+            os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+            shutil.copyfile(path, output_path)
+            return True
+        except OSError:
+            self.forget(key)
+            return False
+
+    def put(self, key, source_path):
+        """Store a copy of source_path under key"""
+        self.put_with(key, lambda tmp_path: shutil.copyfile(source_path, tmp_path))
+
+    def put_with(self, key, write):
+        """
+        Store a file produced by write(path) under key
+
+        Lets callers holding audio in memory write it straight into the cache.
+        """
+        if not self.enabled:
+            return
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            os.close(fd)
+            write(tmp_path)
+            size = os.path.getsize(tmp_path)
+            with self._lock:
+                os.replace(tmp_path, self._path(key))
+                # Other processes sharing the directory add and evict entries too
+                self._scan_locked()
+                self._entries[key] = size
+                self._entries.move_to_end(key)
+                self._total_bytes = sum(self._entries.values())
+                self._evict_locked()
+        except Exception as e:
+            # A failed cache write must never fail the request
+            print(f"TTS cache write failed: {str(e)}")
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _drop_locked(self, key):
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._total_bytes -= size
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict_locked(self):
+        while self._total_bytes > self.max_bytes and self._entries:
+            key = next(iter(self._entries))
+            self._drop_locked(key)
+            self._evictions += 1
+
+    def get_stats(self):
+        """
+        Get cache statistics
+
+        Returns:
+            dict: Entry count, size, hits, misses, hit rate and evictions
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+                'evictions': self._evictions
+            }
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_tts_cache():
+    """
+    Get the process-wide TTS audio cache
+
+    Returns:
+        TTSAudioCache: Shared cache instance
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TTSAudioCache()
+        return _cache
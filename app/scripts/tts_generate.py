@@ -1,102 +1,265 @@
 import torch
 import torchaudio
-from tortoise.api import TextToSpeech
 import time
 import os
-from .device_detection import get_optimal_device, configure_device_for_model
+import shutil
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from importlib import metadata
+from .device_detection import get_optimal_device
+from .model_manager import get_tts_model_manager
+from .text_segmenter import split_text
+from .tts_cache import get_tts_cache, make_cache_key
+from .tracing import annotate
+from .tts_presets import get_preset_timings, tts_settings_label, AUTO_PRESET, DEFAULT_PRESET
+from .voice_library import get_voice_library, DEFAULT_VOICE
 
-def generate_tts(text, output_path="audio/ray_audio.wav"):
+TTS_SAMPLE_RATE = 24000
+
+# Long scripts are synthesized in chunks of whole sentences and joined with short crossfades
+TTS_CHUNK_CHARS = int(os.environ.get('FACE_GEN_TTS_CHUNK_CHARS', '250'))
+TTS_CROSSFADE_MS = int(os.environ.get('FACE_GEN_TTS_CROSSFADE_MS', '40'))
+
+@lru_cache(maxsize=None)
+def get_tortoise_version():
+    """Installed tortoise-tts version, used to invalidate cached audio on upgrades"""
+    try:
+        return metadata.version('tortoise-tts')
+    except metadata.PackageNotFoundError:
+        return 'unknown'
+
+def tts_seed(cache_key):
     """
-    Generate TTS audio from text using Tortoise TTS
+    Tortoise seed for a synthesis request
+
+    Seeding from the request makes identical requests produce identical audio,
+    also after a restart. Tortoise seeds the process-wide RNG, so this only
+    holds while one chunk is rendered at a time (FACE_GEN_TTS_INSTANCES=1).
+
+    Returns:
+        int: 32-bit seed derived from the cache key
+    """
+    return int(cache_key[:8], 16)
+
+def chunk_seed(seed, index):
+    """
+    Seed for one chunk of a request
+
+    Every chunk is seeded on its own, so its audio depends only on the request
+    and its position, not on which chunks the same instance rendered before it.
+
+    Returns:
+        int: 32-bit seed, or None for a random one
+    """
+    if seed is None:
+        return None
+    return (seed + index) % 2 ** 32
+
+def save_audio(gen_audio, output_path):
+    """Write a generated waveform as a 24kHz WAV"""
+    # Ensure output directory exists
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    torchaudio.save(output_path, gen_audio.reshape(1, -1), TTS_SAMPLE_RATE)
+
+def join_with_crossfade(pieces, sample_rate=TTS_SAMPLE_RATE, crossfade_ms=TTS_CROSSFADE_MS):
+    """
+    Concatenate 1-D waveforms, overlapping neighbours with a linear crossfade
+    
+    Args:
+        pieces (list): 1-D audio tensors in order
+        sample_rate (int): Sample rate of the pieces
+        crossfade_ms (int): Crossfade length in milliseconds
+    
+    Returns:
+        torch.Tensor: Joined 1-D waveform
+    """
+    fade = int(sample_rate * crossfade_ms / 1000)
+    parts = []
+    tail = pieces[0]
+    for piece in pieces[1:]:
+        n = min(fade, len(tail), len(piece))
+        if n == 0:
+            parts.append(tail)
+            tail = piece
+            continue
+        ramp = torch.linspace(0.0, 1.0, n, dtype=tail.dtype)
+        parts.append(tail[:-n])
+        parts.append(tail[-n:] * (1 - ramp) + piece[:n] * ramp)
+        tail = piece[n:]
+    parts.append(tail)
+    return torch.cat(parts)
+
+def _synthesize_chunk(manager, device, chunk, conditioning_latents=None, preset=DEFAULT_PRESET, params=None,
+                      seed=None):
+    with manager.acquire(device) as (tts, _):
+        if preset == DEFAULT_PRESET:
+            gen_audio = tts.tts(chunk, conditioning_latents=conditioning_latents, use_deterministic_seed=seed,
+                                **(params or {}))
+        else:
+            gen_audio = tts.tts_with_preset(chunk, preset=preset, conditioning_latents=conditioning_latents,
+                                            use_deterministic_seed=seed, **(params or {}))
+        return gen_audio.cpu().reshape(-1)
+
+def synthesize(text, manager, device=None, conditioning_latents=None, preset=DEFAULT_PRESET, params=None,
+               seed=None):
+    """
+    Synthesize text, splitting long scripts into sentence chunks
+    
+    Chunking bounds the text per Tortoise call; it does not synthesize in
+    parallel. With the default of one instance (FACE_GEN_TTS_INSTANCES=1)
+    chunks render one after another on this process's torch threads. More
+    instances overlap chunks in threads that share those torch threads, and
+    seeded output is then no longer reproducible.
+    
+    Args:
+        text (str): Input text
+        manager (TTSModelManager): Source of TTS models
+        device (str): Target device, defaults to the optimal device
+        conditioning_latents (tuple): Voice latents from the voice library, None for a random voice
+        preset (str): Tortoise preset, or 'default' for a plain tts() call
+        params (dict): Sampling parameter overrides (num_autoregressive_samples, diffusion_iterations)
+        seed (int): Seed of the request (see tts_seed), None for a random one; each
+            chunk gets its own seed derived from it (see chunk_seed)
+    
+    Returns:
+        torch.Tensor: 1-D 24kHz waveform on the CPU
+    """
+    device = device or get_optimal_device()
+    chunks = split_text(text, max_chars=TTS_CHUNK_CHARS) or [text]
+    
+    def render(index, chunk):
+        return _synthesize_chunk(manager, device, chunk, conditioning_latents, preset, params,
+                                 chunk_seed(seed, index))
+    
+    if len(chunks) == 1:
+        return render(0, chunks[0])
+    
+    workers = min(len(chunks), manager.max_instances)
+    print(f"Synthesizing {len(chunks)} chunks with {workers} worker(s)")
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='face-gen-tts') as executor:
+        pieces = list(executor.map(render, range(len(chunks)), chunks))
+    return join_with_crossfade(pieces)
+
+def _load_cached_audio(cache, cache_key, output_path=None):
+    """Load a cached waveform, copying the WAV to output_path if requested"""
+    path = cache.lookup(cache_key)
+    if path is None:
+        return None
+    try:
+        gen_audio, _ = torchaudio.load(path)
+        if output_path:
+            os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+            shutil.copyfile(path, output_path)
+        return gen_audio.reshape(-1)
+    except Exception as e:
+        print(f"TTS cache read failed: {str(e)}")
+        cache.forget(cache_key)
+        return None
+
+def _store_audio(gen_audio, output_path, cache, cache_key):
+    if output_path:
+        save_audio(gen_audio, output_path)
+        cache.put(cache_key, output_path)
+        print("TTS saved to", output_path)
+    else:
+        cache.put_with(cache_key, lambda path: torchaudio.save(path, gen_audio.reshape(1, -1), TTS_SAMPLE_RATE,
+                                                               format='wav'))
+
+def generate_speech(text, output_path=None, model_manager=None, cache=None, voice=DEFAULT_VOICE,
+                    preset=DEFAULT_PRESET, params=None, target_latency=None):
+    """
+    Generate speech and return the waveform in memory
+    
+    The waveform can be handed straight to the lip-sync stage; the WAV file
+    is only written when output_path is given.
     
     Args:
         text (str): Input text to convert to speech
-        output_path (str): Output audio file path
+        output_path (str): Optional path to also save the audio as a WAV file
+        model_manager (TTSModelManager): Source of warm TTS models, defaults to the process-wide manager
+        cache (TTSAudioCache): Cache of previously synthesized audio, defaults to the process-wide cache
+        voice (str): Voice library ID, defaults to Tortoise's random voice
+        preset (str): Tortoise preset, 'default' for Tortoise's defaults, or 'auto'
+            to pick one from measured timings
+        params (dict): Sampling parameter overrides (num_autoregressive_samples, diffusion_iterations)
+        target_latency (float): Seconds TTS may take, used by the 'auto' preset
     
     Returns:
-        bool: True if successful, False otherwise
+        torch.Tensor: 1-D 24kHz waveform on the CPU, or None if generation failed
+    
+    Raises:
+        VoiceNotFoundError: If voice is not in the voice library
     """
-    # Get optimal device for current environment
+    voice = voice or DEFAULT_VOICE
+    conditioning_latents = get_voice_library().get_latents(voice)
     device = get_optimal_device()
-    print(f"Using device: {device}")
-    print(f"Initializing Tortoise TTS on device: {device}")
+    timings = get_preset_timings()
+    if preset == AUTO_PRESET:
+        preset = timings.select(device, len(text), target_latency)
+        print(f"Auto preset for a {target_latency:.1f}s budget: {preset}")
+    preset = preset or DEFAULT_PRESET
+    params = params or {}
+    
+    cache = cache or get_tts_cache()
+    cache_key = make_cache_key(text, voice=voice, preset=tts_settings_label(preset, params),
+                               sample_rate=TTS_SAMPLE_RATE, model_version=get_tortoise_version())
+    gen_audio = _load_cached_audio(cache, cache_key, output_path)
+    if gen_audio is not None:
+        annotate(device='cache')
+        print("TTS cache hit")
+        return gen_audio
+    
+    manager = model_manager or get_tts_model_manager()
     
     try:
-        tts = TextToSpeech()
-        
-        # Configure models for the optimal device
-        if device == 'mps':
-            try:
-                print("Attempting to use MPS acceleration...")
-                if hasattr(tts, 'autoregressive'):
-                    tts.autoregressive = configure_device_for_model(tts.autoregressive, 'mps')
-                if hasattr(tts, 'diffusion'):
-                    tts.diffusion = configure_device_for_model(tts.diffusion, 'mps')
-                if hasattr(tts, 'vocoder'):
-                    tts.vocoder = configure_device_for_model(tts.vocoder, 'mps')
-                if hasattr(tts, 'clvp'):
-                    tts.clvp = configure_device_for_model(tts.clvp, 'mps')
-                print("Models configured for MPS device")
-            except Exception as e:
-                print(f"MPS configuration failed, falling back to CPU: {str(e)}")
-                device = 'cpu'
-                print(f"Switching to device: {device}")
-        
-        elif device == 'cuda':
-            try:
-                print("Attempting to use CUDA acceleration...")
-                if hasattr(tts, 'autoregressive'):
-                    tts.autoregressive = configure_device_for_model(tts.autoregressive, 'cuda')
-                if hasattr(tts, 'diffusion'):
-                    tts.diffusion = configure_device_for_model(tts.diffusion, 'cuda')
-                if hasattr(tts, 'vocoder'):
-                    tts.vocoder = configure_device_for_model(tts.vocoder, 'cuda')
-                if hasattr(tts, 'clvp'):
-                    tts.clvp = configure_device_for_model(tts.clvp, 'cuda')
-                print("Models configured for CUDA device")
-            except Exception as e:
-                print(f"CUDA configuration failed, falling back to CPU: {str(e)}")
-                device = 'cpu'
-                print(f"Switching to device: {device}")
-        
+        annotate(device=device)
+        print(f"Using device: {device}")
         print("Generating speech...")
         start_time = time.time()
         
-        gen_audio = tts.tts(text)
+        gen_audio = synthesize(text, manager, device, conditioning_latents, preset, params, tts_seed(cache_key))
         
         end_time = time.time()
         print(f"Generation time: {end_time - start_time:.2f} seconds")
+        if not params:
+            timings.record(device, preset, len(text), end_time - start_time)
         
-        # Move audio data back to CPU and save
-        if device in ['mps', 'cuda']:
-            gen_audio = gen_audio.cpu()
-        
-        # Ensure output directory exists
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        torchaudio.save(output_path, gen_audio.squeeze(0), 24000)
-        print("TTS saved to", output_path)
-        return True
+        _store_audio(gen_audio, output_path, cache, cache_key)
+        return gen_audio
         
     except Exception as e:
         print(f"TTS generation failed: {str(e)}")
         print("Attempting to regenerate with CPU...")
         
         # Fallback to CPU
-        device = 'cpu'
-        tts = TextToSpeech()
-        
         try:
-            gen_audio = tts.tts(text)
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            torchaudio.save(output_path, gen_audio.squeeze(0), 24000)
+            annotate(device='cpu')
+            gen_audio = synthesize(text, manager, 'cpu', conditioning_latents, preset, params, tts_seed(cache_key))
+            _store_audio(gen_audio, output_path, cache, cache_key)
             print("TTS generated successfully on CPU")
-            return True
+            return gen_audio
         except Exception as e2:
             print(f"CPU generation also failed: {str(e2)}")
-            return False
+            return None
+
+def generate_tts(text, output_path="audio/ray_audio.wav", model_manager=None, cache=None, voice=DEFAULT_VOICE):
+    """
+    Generate TTS audio from text using Tortoise TTS
+    
+    Args:
+        text (str): Input text to convert to speech
+        output_path (str): Output audio file path
+        model_manager (TTSModelManager): Source of warm TTS models, defaults to the process-wide manager
+        cache (TTSAudioCache): Cache of previously synthesized audio, defaults to the process-wide cache
+        voice (str): Voice library ID, defaults to Tortoise's random voice
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    return generate_speech(text, output_path, model_manager, cache, voice) is not None
 
 if __name__ == "__main__":
     # This part is for standalone testing, not used by Flask app directly
     with open("assets/script.txt", "r", encoding="utf-8") as f:
         text = f.read()
-    generate_tts(text)
\ No newline at end of file
+    generate_tts(text)
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Tortoise Preset Selection for Face-Gen
+Validates per-request TTS settings and picks a preset that fits a latency budget
+"""
+
+import json
+import os
+import tempfile
+import threading
+from collections import deque
+
+# Plain tts() call with Tortoise's own defaults (the behaviour before presets existed)
+DEFAULT_PRESET = 'default'
+# Pick the best preset expected to finish within target_latency
+AUTO_PRESET = 'auto'
+
+# Settings of the Tortoise presets, used to extrapolate timings between presets
+TTS_PRESETS = {
+    'ultra_fast': {'num_autoregressive_samples': 16, 'diffusion_iterations': 30},
+    'fast': {'num_autoregressive_samples': 96, 'diffusion_iterations': 80},
+    'standard': {'num_autoregressive_samples': 256, 'diffusion_iterations': 200}
+}
+# Highest quality first
+PRESET_QUALITY_ORDER = ('standard', 'fast', 'ultra_fast')
+
+# Sampling parameters a request may override, with their allowed range
+TTS_PARAM_LIMITS = {
+    'num_autoregressive_samples': (1, 512),
+    'diffusion_iterations': (1, 1000)
+}
+
+TTS_TIMINGS_PATH = os.environ.get('FACE_GEN_TTS_TIMINGS', os.path.join('cache', 'tts_timings.json'))
+# Samples kept per (device, preset) for the latency fit
+TIMING_SAMPLES = 50
+
+class TTSSettingsError(ValueError):
+    """Raised for an unknown preset or an out-of-range parameter"""
+
+def parse_tts_settings(preset=None, params=None, target_latency=None):
+    """
+    Validate TTS settings from a request
+
+    Args:
+        preset (str): 'default', 'auto' or a Tortoise preset name
+        params (dict): Overrides for num_autoregressive_samples / diffusion_iterations
+        target_latency (float): Seconds the speech should take to generate, required for 'auto'
+
+    Returns:
+        dict: Normalized settings with preset, params and target_latency
+
+    Raises:
+        TTSSettingsError: If a value is invalid
+    """
+    preset = preset or DEFAULT_PRESET
+    if preset not in TTS_PRESETS and preset not in (DEFAULT_PRESET, AUTO_PRESET):
+        raise TTSSettingsError(f"Unknown preset: {preset}")
+
+    clean_params = {}
+    for name, value in (params or {}).items():
+        if value in (None, ''):
+            continue
+        if name not in TTS_PARAM_LIMITS:
+            raise TTSSettingsError(f"Unknown TTS parameter: {name}")
+        low, high = TTS_PARAM_LIMITS[name]
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            raise TTSSettingsError(f"{name} must be an integer")
+        if not low <= value <= high:
+            raise TTSSettingsError(f"{name} must be between {low} and {high}")
+        clean_params[name] = value
+
+    if preset == AUTO_PRESET:
+        if clean_params:
+            raise TTSSettingsError("Sampling parameters cannot be combined with the auto preset")
+        try:
+            target_latency = float(target_latency)
+        except (TypeError, ValueError):
+            raise TTSSettingsError("The auto preset needs a numeric target_latency")
+        if target_latency <= 0:
+            raise TTSSettingsError("target_latency must be positive")
+    else:
+        target_latency = None
+
+    return {'preset': preset, 'params': clean_params, 'target_latency': target_latency}
+
+def tts_settings_label(preset, params=None):
+    """
+    Stable name for a preset plus overrides, used in cache keys
+
+    Example: 'fast+diffusion_iterations=50'
+    """
+    overrides = [f"{name}={value}" for name, value in sorted((params or {}).items())]
+    return '+'.join([preset] + overrides)
+
+def _work_units(preset):
+    """Rough relative cost of a preset: autoregressive samples plus diffusion steps"""
+    settings = TTS_PRESETS[preset]
+    return settings['num_autoregressive_samples'] + settings['diffusion_iterations']
+
+class PresetTimings:
+    """
+    Measured synthesis times per device and preset.
+
+    Each (device, preset) keeps its most recent runs and estimates
+    seconds = overhead + per_char * characters by least squares. Presets that
+    have never run on a device are extrapolated from a measured one by their
+    relative work. Timings are saved to a JSON file so they survive restarts.
+    Worker processes share the file, so each run re-reads it before adding
+    its sample and saving, keeping the runs other processes recorded.
+    """
+
+    def __init__(self, path=TTS_TIMINGS_PATH, max_samples=TIMING_SAMPLES):
+        self.path = path
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._samples = {}
+        self._load_locked()
+
+    def _load_locked(self):
+        """Replace the samples in memory with those in the file, if it can be read"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._samples = {}
+            for device, presets in data.items():
+                for preset, samples in presets.items():
+                    self._series(device, preset).extend(tuple(sample) for sample in samples)
+        except (OSError, ValueError) as e:
+            print(f"Could not load TTS timings: {str(e)}")
+
+    def _save_locked(self):
+        if not self.path:
+            return
+        data = {}
+        for (device, preset), samples in self._samples.items():
+            data.setdefault(device, {})[preset] = list(samples)
+        try:
+            directory = os.path.dirname(self.path) or '.'
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            # Losing timings only makes the next auto choice less informed
+            print(f"Could not save TTS timings: {str(e)}")
+
+    def _series(self, device, preset):
+        key = (device, preset)
+        if key not in self._samples:
+            self._samples[key] = deque(maxlen=self.max_samples)
+        return self._samples[key]
+
+    def record(self, device, preset, chars, seconds):
+        """Add a measured run of a preset"""
+        if preset not in TTS_PRESETS:
+            return
+        with self._lock:
+            # Start from the file, which also holds the runs of other processes
+            self._load_locked()
+            self._series(device, preset).append((chars, seconds))
+            self._save_locked()
+
+    def _fit(self, samples, chars):
+        n = len(samples)
+        mean_x = sum(x for x, _ in samples) / n
+        mean_y = sum(y for _, y in samples) / n
+        var_x = sum((x - mean_x) ** 2 for x, _ in samples)
+        if var_x == 0:
+            # Only one text length seen so far: assume time grows with length
+            return mean_y * chars / mean_x if mean_x else mean_y
+        slope = max(sum((x - mean_x) * (y - mean_y) for x, y in samples) / var_x, 0.0)
+        overhead = max(mean_y - slope * mean_x, 0.0)
+        return overhead + slope * chars
+
+    def estimate(self, device, preset, chars):
+        """
+        Estimate how long a preset takes for a text
+
+        Returns:
+            float: Seconds, or None when nothing has been measured on the device
+        """
+        with self._lock:
+            samples = self._samples.get((device, preset))
+            if samples:
+                return self._fit(list(samples), chars)
+            measured = [name for name in TTS_PRESETS if self._samples.get((device, name))]
+            if not measured:
+                return None
+            reference = max(measured, key=lambda name: len(self._samples[(device, name)]))
+            seconds = self._fit(list(self._samples[(device, reference)]), chars)
+        return seconds * _work_units(preset) / _work_units(reference)
+
+    def select(self, device, chars, target_latency):
+        """
+        Pick the highest-quality preset expected to finish within target_latency
+
+        Falls back to the fastest preset if none fits or nothing has been measured.
+
+        Returns:
+            str: Preset name
+        """
+        for preset in PRESET_QUALITY_ORDER:
+            seconds = self.estimate(device, preset, chars)
+            if seconds is not None and seconds <= target_latency:
+                return preset
+        return PRESET_QUALITY_ORDER[-1]
+
+    def get_stats(self):
+        """
+        Get measured runs per device and preset
+
+        Returns:
+            dict: {device: {preset: sample count}}
+        """
+        with self._lock:
+            stats = {}
+            for (device, preset), samples in self._samples.items():
+                stats.setdefault(device, {})[preset] = len(samples)
+            return stats
+
+_timings = None
+_timings_lock = threading.Lock()
+
+def get_preset_timings():
+    """
+    Get the process-wide preset timings
+
+    Returns:
+        PresetTimings: Shared instance
+    """
+    global _timings
+    with _timings_lock:
+        if _timings is None:
+            _timings = PresetTimings()
+        return _timings
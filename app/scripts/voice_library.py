@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Voice Library for Face-Gen
+Stores Tortoise conditioning latents per voice so custom voices cost nothing per request
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+import torch
+
+VOICE_LIBRARY_DIR = os.environ.get('FACE_GEN_VOICE_DIR', 'voices')
+
+# Voice used when a request does not pick one (Tortoise's random voice)
+DEFAULT_VOICE = 'random'
+
+# Latents are stored as float16, half the size of the float32 Tortoise returns
+LATENT_DTYPE = torch.float16
+LATENT_NAMES = ('autoregressive', 'diffusion')
+
+# Sample rate Tortoise expects for conditioning clips
+CONDITIONING_SAMPLE_RATE = 22050
+
+class VoiceNotFoundError(KeyError):
+    """Raised when a request names a voice that is not in the library"""
+
+class VoiceLibrary:
+    """
+    Conditioning latents of every registered voice in one indexed file.
+
+    latents.bin is append-only raw float16 data; index.json maps each voice ID
+    to its name and the offset, shape and length of its two latent tensors.
+    Loaded latents are kept in memory, so after the first request for a voice
+    looking it up is a dictionary access. Other processes (e.g. pipeline
+    workers) may register voices in the same directory, so a lookup that
+    misses re-reads the index before giving up.
+    """
+
+    def __init__(self, library_dir=VOICE_LIBRARY_DIR):
+        self.library_dir = library_dir
+        self.index_path = os.path.join(library_dir, 'index.json')
+        self.data_path = os.path.join(library_dir, 'latents.bin')
+        self._lock = threading.Lock()
+        self._loaded = {}
+        os.makedirs(library_dir, exist_ok=True)
+        self._index = self._read_index()
+
+    def _read_index(self):
+        if not os.path.exists(self.index_path):
+            return {}
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _write_index_locked(self):
+        fd, tmp_path = tempfile.mkstemp(dir=self.library_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self._index, f, indent=2)
+            os.replace(tmp_path, self.index_path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+    def _entry_locked(self, voice_id):
+        """Index entry of a voice, re-reading the index once if it is not known yet"""
+        entry = self._index.get(voice_id)
+        if entry is None:
+            self._index = self._read_index()
+            entry = self._index.get(voice_id)
+        return entry
+
+    def add(self, name, latents):
+        """
+        Register a voice
+
+        Args:
+            name (str): Display name
+            latents (tuple): (autoregressive, diffusion) conditioning latents
+                from TextToSpeech.get_conditioning_latents
+
+        Returns:
+            dict: Metadata of the new voice, including its 'id'
+        """
+        voice_id = uuid.uuid4().hex[:12]
+        tensors = [tensor.detach().cpu().to(LATENT_DTYPE).contiguous() for tensor in latents]
+        with self._lock:
+            # Keep voices other processes registered since the index was read
+            self._index = self._read_index()
+            entry = {'id': voice_id, 'name': name, 'created_at': time.time(), 'latents': {}}
+            with open(self.data_path, 'ab') as f:
+                for latent_name, tensor in zip(LATENT_NAMES, tensors):
+                    data = tensor.numpy().tobytes()
+                    entry['latents'][latent_name] = {
+                        'offset': f.tell(),
+                        'length': len(data),
+                        'shape': list(tensor.shape)
+                    }
+                    f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            self._index[voice_id] = entry
+            self._write_index_locked()
+            self._loaded[voice_id] = tuple(tensor.float() for tensor in tensors)
+        return self.describe(voice_id)
+
+    def has(self, voice_id):
+        """True if voice_id is the default voice or a registered one"""
+        if voice_id in (None, DEFAULT_VOICE):
+            return True
+        with self._lock:
+            return self._entry_locked(voice_id) is not None
+
+    def get_latents(self, voice_id):
+        """
+        Get the conditioning latents of a voice
+
+        Returns:
+            tuple: (autoregressive, diffusion) float32 CPU tensors, or None for the default voice
+
+        Raises:
+            VoiceNotFoundError: If the voice is not registered
+        """
+        if voice_id in (None, DEFAULT_VOICE):
+            return None
+        with self._lock:
+            latents = self._loaded.get(voice_id)
+            if latents is not None:
+                return latents
+            entry = self._entry_locked(voice_id)
+            if entry is None:
+                raise VoiceNotFoundError(voice_id)
+            tensors = []
+            with open(self.data_path, 'rb') as f:
+                for latent_name in LATENT_NAMES:
+                    spec = entry['latents'][latent_name]
+                    f.seek(spec['offset'])
+                    data = bytearray(f.read(spec['length']))
+                    tensors.append(torch.frombuffer(data, dtype=LATENT_DTYPE).reshape(spec['shape']).float())
+            latents = self._loaded[voice_id] = tuple(tensors)
+            return latents
+
+    def describe(self, voice_id):
+        """Public metadata of a voice (without storage offsets)"""
+        entry = self._index[voice_id]
+        return {'id': entry['id'], 'name': entry['name'], 'created_at': entry['created_at']}
+
+    def list_voices(self):
+        """
+        List registered voices
+
+        Returns:
+            list: Voice metadata, oldest first
+        """
+        with self._lock:
+            voices = [self.describe(voice_id) for voice_id in self._index]
+        return sorted(voices, key=lambda voice: voice['created_at'])
+
+    def get_stats(self):
+        """
+        Get library statistics
+
+        Returns:
+            dict: Voice count, voices held in memory and size of the latent file
+        """
+        with self._lock:
+            return {
+                'voices': len(self._index),
+                'loaded': len(self._loaded),
+                'bytes': os.path.getsize(self.data_path) if os.path.exists(self.data_path) else 0
+            }
+
+def compute_conditioning_latents(clip_paths, model_manager=None):
+    """
+    Compute Tortoise conditioning latents from reference clips
+
+    Args:
+        clip_paths (list): Audio files of the speaker, ideally several 5-10 second clips
+        model_manager (TTSModelManager): Source of warm TTS models, defaults to the process-wide manager
+
+    Returns:
+        tuple: (autoregressive, diffusion) conditioning latents
+    """
+    from tortoise.utils.audio import load_audio
+    from .model_manager import get_tts_model_manager
+
+    manager = model_manager or get_tts_model_manager()
+    clips = [load_audio(path, CONDITIONING_SAMPLE_RATE) for path in clip_paths]
+    with manager.acquire() as (tts, _):
+        return tts.get_conditioning_latents(clips)
+
+_library = None
+_library_lock = threading.Lock()
+
+def get_voice_library():
+    """
+    Get the process-wide voice library
+
+    Returns:
+        VoiceLibrary: Shared library instance
+    """
+    global _library
+    with _library_lock:
+        if _library is None:
+            _library = VoiceLibrary()
+        return _library
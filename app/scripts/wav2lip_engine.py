@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+"""
+In-process Wav2Lip Engine for Face-Gen
+Loads the Wav2Lip generator and face detector once and reuses them for every render
+"""
+
+import os
+import sys
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import cv2
+import numpy as np
+import torch
+import torchaudio
+from .device_detection import get_optimal_device
+from .face_cache import get_face_cache, hash_image_bytes, make_face_key
+from .metrics import MODELS_LOADED, STAGE_ENCODE
+from .tracing import annotate, trace_stage
+from .wav2lip_run import HLS_PLAYLIST, WAV2LIP_PADS, WAV2LIP_CHECKPOINT_NAME
+
+WAV2LIP_DIR = 'Wav2Lip'
+WAV2LIP_CHECKPOINT = os.path.join(WAV2LIP_DIR, 'checkpoints', WAV2LIP_CHECKPOINT_NAME)
+
+# Same padding the subprocess path passes via --pads
+DEFAULT_PADS = WAV2LIP_PADS
+
+# Wav2Lip model constants (see Wav2Lip/inference.py)
+IMG_SIZE = 96
+MEL_STEP_SIZE = 16
+STATIC_EXTENSIONS = ('jpg', 'png', 'jpeg')
+# Sample rate the Wav2Lip mel spectrogram is computed at (see Wav2Lip/hparams.py)
+MEL_SAMPLE_RATE = 16000
+
+# Target HLS segment length for streaming renders (see render(stream_dir=...))
+HLS_SEGMENT_SECONDS = 2
+
+def _import_wav2lip(wav2lip_dir):
+    """Import the modules shipped in the Wav2Lip checkout"""
+    wav2lip_dir = os.path.abspath(wav2lip_dir)
+    if wav2lip_dir not in sys.path:
+        sys.path.insert(0, wav2lip_dir)
+    import audio
+    import face_detection
+    from models import Wav2Lip
+    return audio, face_detection, Wav2Lip
+
+def get_smoothened_boxes(boxes, T):
+    """Average each face box with its neighbours to reduce jitter between frames"""
+    for i in range(len(boxes)):
+        if i + T > len(boxes):
+            window = boxes[len(boxes) - T:]
+        else:
+            window = boxes[i : i + T]
+        boxes[i] = np.mean(window, axis=0)
+    return boxes
+
+class PCMAudioInput:
+    """
+    Feeds an in-memory waveform to ffmpeg through an anonymous pipe.
+
+    The pipe's read end is passed to ffmpeg as an extra file descriptor
+    (pipe:N), leaving stdin free for video frames. Samples are written from a
+    background thread so ffmpeg can read audio and video in any order.
+    """
+
+    def __init__(self, waveform, sample_rate):
+        self._data = np.ascontiguousarray(waveform, dtype='<f4').tobytes()
+        self._read_fd, self._write_fd = os.pipe()
+        self.args = ['-f', 'f32le', '-ar', str(sample_rate), '-ac', '1', '-i', f'pipe:{self._read_fd}']
+        self.pass_fds = (self._read_fd,)
+        self._thread = None
+
+    def start(self):
+        """Hand the samples to ffmpeg once it has been started"""
+        os.close(self._read_fd)
+        self._thread = threading.Thread(target=self._write, daemon=True)
+        self._thread.start()
+
+    def _write(self):
+        try:
+            with os.fdopen(self._write_fd, 'wb') as f:
+                f.write(self._data)
+        except BrokenPipeError:
+            # ffmpeg exited early; its own error is reported by the caller
+            pass
+
+    def close(self):
+        """Wait for the writer, or release the pipe if ffmpeg never started"""
+        if self._thread is None:
+            os.close(self._read_fd)
+            os.close(self._write_fd)
+        else:
+            self._thread.join()
+
+def _audio_input(audio_path, waveform, sample_rate):
+    """ffmpeg input for the speech track: the in-memory waveform if given, else the file"""
+    if waveform is not None:
+        return PCMAudioInput(waveform, sample_rate)
+    return audio_path
+
+def _run_ffmpeg(command, audio):
+    """Run an ffmpeg command whose speech input is a path or a PCMAudioInput"""
+    if not isinstance(audio, PCMAudioInput):
+        subprocess.run(command, capture_output=True, check=True)
+        return
+    try:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, pass_fds=audio.pass_fds)
+        audio.start()
+        _, stderr = process.communicate()
+    finally:
+        audio.close()
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, 'ffmpeg', stderr=stderr.decode('utf-8', 'replace'))
+
+def _audio_args(audio):
+    return audio.args if isinstance(audio, PCMAudioInput) else ['-i', audio]
+
+class HLSFrameSink:
+    """
+    cv2.VideoWriter-compatible sink that pipes frames into ffmpeg's HLS muxer.
+
+    Segments and the playlist are written to stream_dir as frame batches
+    arrive, so playback can start before the render has finished.
+    """
+
+    def __init__(self, stream_dir, audio, fps, frame_size, segment_seconds=HLS_SEGMENT_SECONDS):
+        os.makedirs(stream_dir, exist_ok=True)
+        self.playlist_path = os.path.join(stream_dir, HLS_PLAYLIST)
+        frame_w, frame_h = frame_size
+        command = [
+            'ffmpeg', '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f'{frame_w}x{frame_h}', '-r', str(fps), '-i', 'pipe:0',
+            *_audio_args(audio),
+            '-map', '0:v', '-map', '1:a',
+            # libx264 needs even dimensions
+            '-vf', 'scale=trunc(iw/2)*2:trunc(ih/2)*2',
+            '-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p',
+            '-force_key_frames', f'expr:gte(t,n_forced*{segment_seconds})',
+            '-c:a', 'aac',
+            '-max_muxing_queue_size', '1024',
+            '-f', 'hls', '-hls_time', str(segment_seconds), '-hls_list_size', '0',
+            '-hls_playlist_type', 'event', '-hls_flags', 'independent_segments',
+            '-hls_segment_filename', os.path.join(stream_dir, 'segment_%04d.ts'),
+            self.playlist_path
+        ]
+        self._audio = audio if isinstance(audio, PCMAudioInput) else None
+        pass_fds = self._audio.pass_fds if self._audio else ()
+        try:
+            self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=subprocess.PIPE,
+                                             pass_fds=pass_fds)
+        except Exception:
+            if self._audio:
+                self._audio.close()
+            raise
+        if self._audio:
+            self._audio.start()
+
+    def write(self, frame):
+        self._process.stdin.write(np.ascontiguousarray(frame).tobytes())
+
+    def release(self):
+        """Finish the stream; ffmpeg appends #EXT-X-ENDLIST to the playlist"""
+        self._process.stdin.close()
+        stderr = self._process.stderr.read()
+        returncode = self._process.wait()
+        if self._audio:
+            self._audio.close()
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, 'ffmpeg', stderr=stderr.decode('utf-8', 'replace'))
+
+    def abort(self):
+        """Stop ffmpeg without waiting for the stream to be finalised"""
+        self._process.kill()
+        self._process.wait()
+        if self._audio:
+            self._audio.close()
+
+class Wav2LipEngine:
+    """
+    Wav2Lip inference without a subprocess.
+
+    The generator checkpoint and the S3FD face detector are loaded once in
+    __init__; render() only pays for face detection, inference and encoding.
+    """
+
+    def __init__(self, checkpoint_path=WAV2LIP_CHECKPOINT, wav2lip_dir=WAV2LIP_DIR, device=None,
+                 pads=DEFAULT_PADS, fps=25., face_det_batch_size=16, wav2lip_batch_size=128, nosmooth=False,
+                 face_cache=None):
+        self.checkpoint_path = checkpoint_path
+        self.face_cache = face_cache or get_face_cache()
+        self.pads = tuple(pads)
+        self.fps = fps
+        self.face_det_batch_size = face_det_batch_size
+        self.wav2lip_batch_size = wav2lip_batch_size
+        self.nosmooth = nosmooth
+
+        # The S3FD detector only supports CUDA and CPU
+        self.device = device or get_optimal_device()
+        self.detector_device = 'cuda' if self.device == 'cuda' else 'cpu'
+
+        self.audio, face_detection, Wav2Lip = _import_wav2lip(wav2lip_dir)
+
+        print(f"Loading Wav2Lip models on device: {self.device}")
+        start_time = time.time()
+        self.model = self._load_model(Wav2Lip)
+        self.detector = face_detection.FaceAlignment(
+            face_detection.LandmarksType._2D, flip_input=False, device=self.detector_device
+        )
+        self.load_time = time.time() - start_time
+        print(f"Wav2Lip models loaded in {self.load_time:.2f} seconds")
+
+        # The face detector keeps per-call state, so detections are serialised
+        self._detector_lock = threading.Lock()
+
+    def _load_model(self, Wav2Lip):
+        model = Wav2Lip()
+        checkpoint = torch.load(self.checkpoint_path, map_location=lambda storage, loc: storage)
+        state_dict = {k.replace('module.', ''): v for k, v in checkpoint['state_dict'].items()}
+        model.load_state_dict(state_dict)
+        return model.to(self.device).eval()
+
+    def face_detect(self, images):
+        """
+        Detect and crop the face in each image
+
+        Returns:
+            list: [face crop, (y1, y2, x1, x2)] per image
+        """
+        batch_size = self.face_det_batch_size
+        with self._detector_lock:
+            while True:
+                predictions = []
+                try:
+                    for i in range(0, len(images), batch_size):
+                        predictions.extend(self.detector.get_detections_for_batch(np.array(images[i:i + batch_size])))
+                except RuntimeError:
+                    if batch_size == 1:
+                        raise RuntimeError('Image too big to run face detection on GPU')
+                    batch_size //= 2
+                    continue
+                break
+
+        results = []
+        pady1, pady2, padx1, padx2 = self.pads
+        for rect, image in zip(predictions, images):
+            if rect is None:
+                raise ValueError('Face not detected! Ensure the image contains a face.')
+            y1 = max(0, rect[1] - pady1)
+            y2 = min(image.shape[0], rect[3] + pady2)
+            x1 = max(0, rect[0] - padx1)
+            x2 = min(image.shape[1], rect[2] + padx2)
+            results.append([x1, y1, x2, y2])
+
+        boxes = np.array(results)
+        if not self.nosmooth:
+            boxes = get_smoothened_boxes(boxes, T=5)
+        return [[image[y1:y2, x1:x2], (y1, y2, x1, x2)] for image, (x1, y1, x2, y2) in zip(images, boxes)]
+
+    def _load_frames(self, face_path):
+        """
+        Read the face image or video
+
+        Returns:
+            tuple: (frames, fps, is_static, SHA-256 of the image bytes or None for videos)
+        """
+        if not os.path.isfile(face_path):
+            raise ValueError(f"Face file not found: {face_path}")
+
+        if face_path.rsplit('.', 1)[-1].lower() in STATIC_EXTENSIONS:
+            with open(face_path, 'rb') as f:
+                data = f.read()
+            frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if frame is None:
+                raise ValueError(f"Could not read face image: {face_path}")
+            return [frame], self.fps, True, hash_image_bytes(data)
+
+        video_stream = cv2.VideoCapture(face_path)
+        fps = video_stream.get(cv2.CAP_PROP_FPS) or self.fps
+        frames = []
+        while True:
+            still_reading, frame = video_stream.read()
+            if not still_reading:
+                break
+            frames.append(frame)
+        video_stream.release()
+        if not frames:
+            raise ValueError(f"Could not read face frames: {face_path}")
+        return frames, fps, len(frames) == 1, None
+
+    def _load_wav(self, audio_path, work_dir):
+        """
+        Decode an audio file at the mel sample rate
+
+        Returns:
+            tuple: (samples, path of the WAV that was decoded)
+        """
+        if not audio_path.endswith('.wav'):
+            wav_path = os.path.join(work_dir, 'audio.wav')
+            subprocess.run(['ffmpeg', '-y', '-i', audio_path, '-strict', '-2', wav_path],
+                           capture_output=True, check=True)
+            audio_path = wav_path
+        return self.audio.load_wav(audio_path, MEL_SAMPLE_RATE), audio_path
+
+    def _resample(self, waveform, sample_rate):
+        """Bring a 1-D in-memory waveform to the mel sample rate without touching disk"""
+        if sample_rate != MEL_SAMPLE_RATE:
+            waveform = torchaudio.functional.resample(waveform, sample_rate, MEL_SAMPLE_RATE)
+        return waveform.numpy()
+
+    def _mel_chunks(self, wav, fps):
+        """Compute the mel spectrogram windows that drive each output frame"""
+        mel = self.audio.melspectrogram(wav)
+        if np.isnan(mel.reshape(-1)).sum() > 0:
+            raise ValueError('Mel contains nan! Using a TTS voice? Add a small epsilon noise to the wav file and try again')
+
+        mel_chunks = []
+        mel_idx_multiplier = 80. / fps
+        i = 0
+        while True:
+            start_idx = int(i * mel_idx_multiplier)
+            if start_idx + MEL_STEP_SIZE > len(mel[0]):
+                mel_chunks.append(mel[:, len(mel[0]) - MEL_STEP_SIZE:])
+                break
+            mel_chunks.append(mel[:, start_idx : start_idx + MEL_STEP_SIZE])
+            i += 1
+        return mel_chunks
+
+    def _datagen(self, frames, mels):
+        """Yield (face batch, mel batch, frames, coords) for the generator"""
+        face_det_results = self.face_detect(frames)
+
+        img_batch, mel_batch, frame_batch, coords_batch = [], [], [], []
+        for i, m in enumerate(mels):
+            idx = i % len(frames)
+            frame_to_save = frames[idx].copy()
+            face, coords = face_det_results[idx]
+            face = cv2.resize(face, (IMG_SIZE, IMG_SIZE))
+
+            img_batch.append(face)
+            mel_batch.append(m)
+            frame_batch.append(frame_to_save)
+            coords_batch.append(coords)
+
+            if len(img_batch) >= self.wav2lip_batch_size:
+                yield self._prepare_batch(img_batch, mel_batch) + (frame_batch, coords_batch)
+                img_batch, mel_batch, frame_batch, coords_batch = [], [], [], []
+
+        if len(img_batch) > 0:
+            yield self._prepare_batch(img_batch, mel_batch) + (frame_batch, coords_batch)
+
+    def _prepare_batch(self, img_batch, mel_batch):
+        img_batch, mel_batch = np.asarray(img_batch), np.asarray(mel_batch)
+        img_masked = img_batch.copy()
+        img_masked[:, IMG_SIZE // 2:] = 0
+        img_batch = np.concatenate((img_masked, img_batch), axis=3) / 255.
+        mel_batch = np.reshape(mel_batch, [len(mel_batch), mel_batch.shape[1], mel_batch.shape[2], 1])
+        return img_batch, mel_batch
+
+    def _render_frames(self, frames, mel_chunks, out):
+        """Render against a face video, detecting and cropping every frame"""
+        for img_batch, mel_batch, batch_frames, coords in self._datagen(frames, mel_chunks):
+            img_batch = torch.FloatTensor(np.transpose(img_batch, (0, 3, 1, 2))).to(self.device)
+            mel_batch = torch.FloatTensor(np.transpose(mel_batch, (0, 3, 1, 2))).to(self.device)
+
+            with torch.no_grad():
+                pred = self.model(mel_batch, img_batch)
+
+            pred = pred.cpu().numpy().transpose(0, 2, 3, 1) * 255.
+            for p, f, c in zip(pred, batch_frames, coords):
+                y1, y2, x1, x2 = c
+                p = cv2.resize(p.astype(np.uint8), (x2 - x1, y2 - y1))
+                f[y1:y2, x1:x2] = p
+                out.write(f)
+
+    def prepare_static_face(self, frame, image_hash=None):
+        """
+        Detect and preprocess the face of a still image once
+
+        With an image_hash the detection is looked up in (and saved to) the
+        face cache, so repeat uploads of the same image skip the S3FD detector.
+
+        Returns:
+            tuple: (6x96x96 generator input tensor on the engine device, (y1, y2, x1, x2) crop box)
+        """
+        key = make_face_key(image_hash, self.pads, IMG_SIZE) if image_hash else None
+        cached = self.face_cache.get(key) if key else None
+        if cached is not None:
+            coords, face = cached
+        else:
+            face, coords = self.face_detect([frame])[0]
+            face = cv2.resize(face, (IMG_SIZE, IMG_SIZE))
+            coords = tuple(int(c) for c in coords)
+            if key:
+                self.face_cache.put(key, coords, face)
+
+        masked = face.copy()
+        masked[IMG_SIZE // 2:] = 0
+        face_input = np.concatenate((masked, face), axis=2) / 255.
+        face_tensor = torch.FloatTensor(np.transpose(face_input, (2, 0, 1))).to(self.device)
+        return face_tensor, coords
+
+    def prepare_face(self, face_path):
+        """
+        Detect and cache the face of a still image ahead of rendering
+
+        Batches call this once so the items rendered afterwards all hit the
+        face cache instead of racing to run the detector.
+
+        Returns:
+            bool: True if the face was prepared, False for face videos
+        """
+        frames, _, is_static, image_hash = self._load_frames(face_path)
+        if not is_static or not image_hash:
+            return False
+        self.prepare_static_face(frames[0], image_hash)
+        return True
+
+    def _render_static(self, frame, mel_chunks, out, image_hash=None):
+        """
+        Render against a still image
+
+        The face is detected, cropped and resized once and the same input tensor
+        is broadcast across every batch. Only the mouth crop changes between
+        frames, so predictions are pasted into one reusable canvas.
+        """
+        face_tensor, (y1, y2, x1, x2) = self.prepare_static_face(frame, image_hash)
+        canvas = frame.copy()
+
+        for start in range(0, len(mel_chunks), self.wav2lip_batch_size):
+            mels = np.asarray(mel_chunks[start:start + self.wav2lip_batch_size])
+            mel_batch = torch.FloatTensor(mels[:, np.newaxis]).to(self.device)
+            img_batch = face_tensor.unsqueeze(0).expand(len(mels), -1, -1, -1)
+
+            with torch.no_grad():
+                pred = self.model(mel_batch, img_batch)
+
+            pred = pred.cpu().numpy().transpose(0, 2, 3, 1) * 255.
+            for p in pred:
+                canvas[y1:y2, x1:x2] = cv2.resize(p.astype(np.uint8), (x2 - x1, y2 - y1))
+                out.write(canvas)
+
+    def render(self, face_path, audio_path, output_path, stream_dir=None, waveform=None, sample_rate=24000):
+        """
+        Render a lip-synced video
+
+        Args:
+            face_path (str): Path to face image or video
+            audio_path (str): Path to speech audio, unused when waveform is given
+            output_path (str): Output video path
+            stream_dir (str): If set, also write an HLS stream (index.m3u8 plus
+                segments) there while rendering; output_path is remuxed from it
+            waveform (torch.Tensor): Speech held in memory, e.g. straight from TTS;
+                the mel is computed from it and it is piped to ffmpeg, so no
+                audio file is read or written
+            sample_rate (int): Sample rate of waveform
+
+        Returns:
+            str: output_path
+
+        Raises:
+            Exception: If any step of the render fails
+        """
+        work_dir = tempfile.mkdtemp(prefix='wav2lip_')
+        try:
+            frames, fps, is_static, image_hash = self._load_frames(face_path)
+            if waveform is not None:
+                waveform = torch.as_tensor(waveform, dtype=torch.float32).reshape(-1).cpu()
+                wav = self._resample(waveform, sample_rate)
+            else:
+                wav, audio_path = self._load_wav(audio_path, work_dir)
+            mel_chunks = self._mel_chunks(wav, fps)
+            frames = frames[:len(mel_chunks)]
+            annotate(device=self.device, frame_count=len(mel_chunks))
+
+            frame_h, frame_w = frames[0].shape[:-1]
+            if stream_dir:
+                out = HLSFrameSink(stream_dir, _audio_input(audio_path, waveform, sample_rate), fps, (frame_w, frame_h))
+            else:
+                avi_path = os.path.join(work_dir, 'result.avi')
+                out = cv2.VideoWriter(avi_path, cv2.VideoWriter_fourcc(*'DIVX'), fps, (frame_w, frame_h))
+            try:
+                if is_static:
+                    self._render_static(frames[0], mel_chunks, out, image_hash)
+                else:
+                    self._render_frames(frames, mel_chunks, out)
+            except Exception:
+                if stream_dir:
+                    out.abort()
+                raise
+
+            # Finishing the stream or muxing the AVI with the speech is the encode stage
+            with trace_stage(STAGE_ENCODE, device='cpu'):
+                out.release()
+
+                os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+                if stream_dir:
+                    command = ['ffmpeg', '-y', '-i', out.playlist_path, '-c', 'copy', '-bsf:a', 'aac_adtstoasc',
+                               '-movflags', '+faststart', output_path]
+                    subprocess.run(command, capture_output=True, check=True)
+                else:
+                    audio = _audio_input(audio_path, waveform, sample_rate)
+                    command = ['ffmpeg', '-y', *_audio_args(audio), '-i', avi_path, '-strict', '-2', '-q:v', '1',
+                               output_path]
+                    _run_ffmpeg(command, audio)
+            return output_path
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def get_wav2lip_engine():
+    """
+    Get the process-wide Wav2Lip engine, loading it on first use
+
+    Returns:
+        Wav2LipEngine: Shared engine instance
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = Wav2LipEngine()
+            MODELS_LOADED.labels(model='wav2lip', device=_engine.device).set(1)
+        return _engine
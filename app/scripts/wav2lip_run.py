@@ -2,14 +2,38 @@ import subprocess
 import os
 import time
 
-def run_wav2lip(face_path, audio_path, output_path):
+# 'inprocess' reuses a loaded Wav2LipEngine, 'subprocess' runs Wav2Lip/inference.py per video
+WAV2LIP_MODE = os.environ.get('WAV2LIP_MODE', 'inprocess')
+
+# Playlist written into stream_dir by streaming renders
+HLS_PLAYLIST = 'index.m3u8'
+
+# Face box padding (top, bottom, left, right) used by both modes
+WAV2LIP_PADS = (0, 20, 0, 0)
+WAV2LIP_CHECKPOINT_NAME = 'wav2lip_gan.pth'
+
+def get_wav2lip_options(mode=None):
+    """
+    Settings that change the rendered video
+
+    Returns:
+        dict: Mode, padding and checkpoint, used to fingerprint results
+    """
+    return {'mode': mode or WAV2LIP_MODE, 'pads': list(WAV2LIP_PADS), 'checkpoint': WAV2LIP_CHECKPOINT_NAME}
+
+def run_wav2lip(face_path, audio_path, output_path, mode=None, stream_dir=None, waveform=None):
     """
     Run Wav2Lip to generate talking face video
     
     Args:
         face_path (str): Path to face image
-        audio_path (str): Path to audio file
+        audio_path (str): Path to audio file; with waveform, where the audio is
+            written only if the subprocess path needs a file
         output_path (str): Output video path
+        mode (str): 'inprocess' or 'subprocess', defaults to WAV2LIP_MODE
+        stream_dir (str): Directory for an HLS stream written while rendering (in-process mode only)
+        waveform (torch.Tensor): 24kHz speech held in memory, handed to the
+            in-process engine without a WAV round trip
     
     Returns:
         bool: True if successful, False otherwise
@@ -21,20 +45,89 @@ def run_wav2lip(face_path, audio_path, output_path):
         print(f"Face image not found: {face_path}")
         return False
     
-    if not os.path.exists(audio_path):
+    if waveform is None and not os.path.exists(audio_path):
         print(f"Audio file not found: {audio_path}")
         return False
     
     # Ensure output directory exists
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
+    if (mode or WAV2LIP_MODE) == 'inprocess':
+        if run_wav2lip_inprocess(face_path, audio_path, output_path, stream_dir, waveform):
+            return True
+        print("Falling back to Wav2Lip subprocess...")
+    
+    if not os.path.exists(audio_path):
+        # inference.py only reads files
+        from .tts_generate import save_audio
+        save_audio(waveform, audio_path)
+    
+    return run_wav2lip_subprocess(face_path, audio_path, output_path)
+
+def run_wav2lip_inprocess(face_path, audio_path, output_path, stream_dir=None, waveform=None):
+    """
+    Render with the shared in-process Wav2Lip engine
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        from .wav2lip_engine import get_wav2lip_engine
+        engine = get_wav2lip_engine()
+        
+        start_time = time.time()
+        engine.render(face_path, audio_path, output_path, stream_dir=stream_dir, waveform=waveform)
+        end_time = time.time()
+        print(f"Wav2Lip generation time: {end_time - start_time:.2f} seconds")
+        
+        if os.path.exists(output_path):
+            print("Video generated successfully!")
+            print(f"Output file: {output_path}")
+            print(f"File size: {os.path.getsize(output_path)} bytes")
+            return True
+        print("Output video file not found")
+        return False
+    except subprocess.CalledProcessError as e:
+        print(f"In-process Wav2Lip failed: {e}")
+        print(f"Error output: {e.stderr}")
+        return False
+    except Exception as e:
+        print(f"In-process Wav2Lip failed: {str(e)}")
+        return False
+
+def prepare_wav2lip_face(face_path, mode=None):
+    """
+    Load the in-process engine and cache the face detection for an image
+    
+    Used before rendering many clips of the same face. Does nothing in
+    subprocess mode, where every render detects the face itself.
+    
+    Returns:
+        bool: True if the face detection is now cached, False otherwise
+    """
+    if (mode or WAV2LIP_MODE) != 'inprocess':
+        return False
+    try:
+        from .wav2lip_engine import get_wav2lip_engine
+        return get_wav2lip_engine().prepare_face(face_path)
+    except Exception as e:
+        print(f"Face preparation failed: {str(e)}")
+        return False
+
+def run_wav2lip_subprocess(face_path, audio_path, output_path):
+    """
+    Render by running Wav2Lip/inference.py in a fresh interpreter
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
     # Construct Wav2Lip command
     command = [
         "python", "Wav2Lip/inference.py",
         "--face", face_path,
         "--audio", audio_path,
         "--outfile", output_path,
-        "--pads", "0", "20", "0", "0"
+        "--pads", *[str(pad) for pad in WAV2LIP_PADS]
     ]
     
     try:
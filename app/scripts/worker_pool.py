@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Pipeline Worker Processes for Face-Gen
+Runs renders in separate processes, each with its own torch thread budget and CPU set
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Number of worker processes: 0 runs pipelines in the web process, 'auto' sizes the
+# pool from the CPU (see device_detection.recommend_worker_layout)
+PROCESS_WORKERS = os.environ.get('FACE_GEN_PROCESS_WORKERS', '0')
+THREADS_PER_WORKER = int(os.environ.get('FACE_GEN_THREADS_PER_WORKER', '0')) or None
+# Pin each worker to its own block of CPUs
+PIN_CPUS = os.environ.get('FACE_GEN_PIN_CPUS', '').lower() in ('1', 'true', 'yes')
+
+# Thread-count variables read by OpenMP/MKL/OpenBLAS when torch starts
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+def split_cpus(cpus, workers):
+    """
+    Split CPU IDs into one contiguous block per worker
+
+    Returns:
+        list: Lists of CPU IDs; leftover CPUs go to the first blocks, and with
+            fewer CPUs than workers the CPUs are shared round-robin
+    """
+    if len(cpus) < workers:
+        return [[cpus[index % len(cpus)]] for index in range(workers)]
+    size, extra = divmod(len(cpus), workers)
+    blocks, start = [], 0
+    for index in range(workers):
+        end = start + size + (1 if index < extra else 0)
+        blocks.append(list(cpus[start:end]))
+        start = end
+    return blocks
+
+def _init_worker(threads, cpu_blocks):
+    """Configure a freshly started worker process before it runs any job"""
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+
+    if cpu_blocks is not None:
+        cpus = cpu_blocks.get()
+        try:
+            import psutil
+            psutil.Process().cpu_affinity(cpus)
+        except (AttributeError, NotImplementedError, OSError) as e:
+            print(f"Could not pin worker {os.getpid()} to CPUs {cpus}: {str(e)}")
+
+    import torch
+    torch.set_num_threads(threads)
+    try:
+        # Only allowed before the first parallel op of the process
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+
+    if os.environ.get('FACE_GEN_PRELOAD_TTS', '').lower() in ('1', 'true', 'yes'):
+        from .model_manager import get_tts_model_manager
+        get_tts_model_manager().warmup()
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+def _worker_info():
+    import torch
+    try:
+        import psutil
+        cpus = psutil.Process().cpu_affinity()
+    except (AttributeError, NotImplementedError, OSError):
+        cpus = None
+    return {'pid': os.getpid(), 'torch_threads': torch.get_num_threads(), 'cpus': cpus}
+
+class PipelineWorkerPool:
+    """
+    Fixed set of worker processes that run pipeline functions.
+
+    Each process gets threads torch threads (and the matching OpenMP/MKL
+    settings) and, with pin_cpus, an exclusive block of CPUs, so N concurrent
+    renders use N * threads cores instead of all fighting over every core.
+    Processes are started with 'spawn' and keep their models loaded between jobs.
+    With PROMETHEUS_MULTIPROC_DIR set, the live gauge values of workers that have
+    exited are dropped, so /metrics only sums live processes.
+    """
+
+    def __init__(self, workers, threads, pin_cpus=False, cpus=None):
+        self.workers = workers
+        self.threads = threads
+        self.pin_cpus = pin_cpus
+        context = multiprocessing.get_context('spawn')
+        cpu_blocks = None
+        if pin_cpus and cpus:
+            cpu_blocks = context.Queue()
+            for block in split_cpus(cpus, workers):
+                cpu_blocks.put(block)
+        self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                             initializer=_init_worker, initargs=(threads, cpu_blocks))
+        self._lock = threading.Lock()
+        self._worker_info = None
+        # Worker PIDs seen so far, to clean up their metrics once they exit
+        self._pids = set()
+
+    def run(self, func, *args, **kwargs):
+        """
+        Run func(*args, **kwargs) in a worker process and wait for the result
+
+        func and its arguments must be picklable; exceptions are re-raised here.
+        """
+        future = self._executor.submit(func, *args, **kwargs)
+        self._track_workers()
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            # A worker died; the pool stops all of them
+            self._mark_dead_workers()
+            raise
+
+    def _track_workers(self):
+        # ProcessPoolExecutor starts processes on demand and only lists them internally
+        processes = getattr(self._executor, '_processes', None) or {}
+        with self._lock:
+            self._pids.update(processes)
+
+    def _mark_dead_workers(self):
+        """Drop the live gauge values of workers that have exited"""
+        if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+            return
+        from prometheus_client import multiprocess
+        with self._lock:
+            for pid in [pid for pid in self._pids if not _pid_alive(pid)]:
+                multiprocess.mark_process_dead(pid)
+                self._pids.discard(pid)
+
+    def start(self):
+        """Start every worker process now instead of on the first jobs"""
+        futures = [self._executor.submit(_worker_info) for _ in range(self.workers)]
+        self._track_workers()
+        info = {}
+        for future in futures:
+            worker = future.result()
+            info[worker['pid']] = worker
+        with self._lock:
+            self._worker_info = list(info.values())
+        return self._worker_info
+
+    def get_stats(self):
+        """
+        Get the pool configuration
+
+        Returns:
+            dict: Worker count, threads per worker, pinning and the workers seen by start()
+        """
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'threads_per_worker': self.threads,
+                'pin_cpus': self.pin_cpus,
+                'processes': self._worker_info
+            }
+
+    def shutdown(self, wait=True):
+        """Stop the worker processes"""
+        self._executor.shutdown(wait=wait)
+        self._mark_dead_workers()
+
+def create_worker_pool(setting=PROCESS_WORKERS, threads_per_worker=THREADS_PER_WORKER, pin_cpus=PIN_CPUS):
+    """
+    Build the worker pool described by FACE_GEN_PROCESS_WORKERS
+
+    Args:
+        setting (str): '0' for no pool, 'auto', or a worker count
+        threads_per_worker (int): Torch threads per worker, defaults to the recommended layout
+        pin_cpus (bool): Give each worker its own CPUs
+
+    Returns:
+        PipelineWorkerPool: The pool, or None when pipelines should run in-process
+    """
+    if setting in ('', '0'):
+        return None
+    from .device_detection import recommend_worker_layout
+
+    layout = recommend_worker_layout(threads_per_worker=threads_per_worker)
+    workers = layout['workers'] if setting == 'auto' else int(setting)
+    threads = layout['threads_per_worker']
+    if setting != 'auto' and not threads_per_worker:
+        # Share the cores out between the requested workers
+        threads = max(1, layout['cpu']['physical_cores'] // workers)
+    print(f"Starting {workers} pipeline worker process(es) with {threads} torch thread(s) each"
+          f"{' pinned to CPUs' if pin_cpus else ''}")
+    return PipelineWorkerPool(workers, threads, pin_cpus=pin_cpus, cpus=layout['cpu']['available_cpus'])
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Job Workspaces for Face-Gen
+Gives each job a private scratch directory and publishes finished files atomically
+"""
+
+import errno
+import os
+import shutil
+import tempfile
+import uuid
+
+WORK_FOLDER = os.environ.get('FACE_GEN_WORK_DIR', 'work')
+
+def new_job_id():
+    """
+    Create a collision-free job identifier
+
+    Returns:
+        str: 32-character hex UUID
+    """
+    return uuid.uuid4().hex
+
+def publish_file(src, dest):
+    """
+    Move a finished file into place atomically
+
+    Readers of dest see either nothing or the complete file. Across
+    filesystems the file is first copied next to dest and then renamed.
+
+    Args:
+        src (str): Finished file
+        dest (str): Final path
+
+    Returns:
+        str: dest
+    """
+    dest_dir = os.path.dirname(dest) or '.'
+    os.makedirs(dest_dir, exist_ok=True)
+    try:
+        os.replace(src, dest)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        fd, tmp_path = tempfile.mkstemp(dir=dest_dir, prefix='.publish_')
+        os.close(fd)
+        try:
+            shutil.copyfile(src, tmp_path)
+            os.replace(tmp_path, dest)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        os.remove(src)
+    return dest
+
+class JobWorkspace:
+    """
+    Scratch directory owned by a single job.
+
+    Intermediate files live under work/<job_id>/ so concurrent jobs never
+    touch each other's files. Use as a context manager to remove the
+    directory when the job ends, whether it succeeded or not.
+    """
+
+    def __init__(self, job_id=None, root=WORK_FOLDER):
+        self.job_id = job_id or new_job_id()
+        self.path = os.path.join(root, self.job_id)
+        os.makedirs(self.path)
+
+    def file(self, name):
+        """Path of a file inside the workspace"""
+        return os.path.join(self.path, name)
+
+    def publish(self, name, dest):
+        """Atomically move a workspace file to dest"""
+        return publish_file(self.file(name), dest)
+
+    def cleanup(self):
+        """Delete the workspace and everything left in it"""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cleanup()
+        return False
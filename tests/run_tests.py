@@ -68,7 +68,22 @@ def run_all_tests():
     test_files = [
         "test_device_detection.py",
         "test_setup.py",
-        "test_docker.py"
+        "test_docker.py",
+        "test_job_queue.py",
+        "test_tts_cache.py",
+        "test_text_segmenter.py",
+        "test_face_cache.py",
+        "test_workspace.py",
+        "test_tts_presets.py",
+        "test_tracing.py",
+        "test_worker_pool.py",
+        "test_image_normalize.py",
+        "test_janitor.py",
+        "test_result_index.py",
+        "test_cost_model.py",
+        "test_scheduling.py",
+        "test_voice_library.py",
+        "test_download.py"
     ]
     
     results = []
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Cost Model Test for Face-Gen
+Tests learning stage durations from finished jobs and predicting new ones
+"""
+
+import os
+import sys
+import tempfile
+
+# Add the parent directory to the path so we can import app modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.scripts.cost_model import JobCostModel, fit_line
+
+def make_trace(job_id, text_length, tts_seconds, wav2lip_seconds, device='cpu'):
+    """Trace of a job whose audio is a tenth of a second per character"""
+    audio_seconds = text_length / 10
+    return {
+        'job_id': job_id,
+        'stages': [
+            {'stage': 'upload_save', 'duration': 0.01},
+            {'stage': 'tts', 'duration': tts_seconds, 'device': device,
+             'text_length': text_length, 'audio_seconds': audio_seconds},
+            {'stage': 'wav2lip', 'duration': wav2lip_seconds, 'device': device,
+             'audio_seconds': audio_seconds, 'frame_count': int(audio_seconds * 25)}
+        ]
+    }
+
+def test_fit_line():
+    """Test the least-squares fit"""
+    print("Fit Line Test")
+    print("-" * 30)
+
+    intercept, slope = fit_line([(0, 1), (1, 3), (2, 5)])
+    assert abs(intercept - 1) < 1e-9 and abs(slope - 2) < 1e-9
+    # A single distinct x is assumed to be proportional
+    assert fit_line([(4, 8), (4, 8)]) == (0.0, 2.0)
+    # Durations never shrink as inputs grow
+    assert fit_line([(1, 5), (2, 3)])[1] == 0.0
+
+    print("PASS: Fit line")
+    return True
+
+def test_estimate():
+    """Test predictions from recorded jobs"""
+    print("\nEstimate Test")
+    print("-" * 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model = JobCostModel(os.path.join(tmp, 'costs.sqlite3'))
+        assert model.estimate(100, 'fast', 'cpu', 4)['total'] is None
+
+        # TTS takes 0.1 s per character, Wav2Lip 1 s per audio second
+        for i, length in enumerate((100, 200, 400)):
+            model.record(make_trace(f'job-{i}', length, length * 0.1, length / 10), 'fast', 4)
+
+        estimate = model.estimate(300, 'fast', 'cpu', 4)
+        assert abs(estimate['tts'] - 30) < 1e-6
+        assert abs(estimate['audio_seconds'] - 30) < 1e-6
+        assert abs(estimate['wav2lip'] - 30) < 1e-6
+        assert abs(estimate['total'] - 60) < 1e-6
+
+        # Other thread counts fall back to the same device; other devices have no data
+        assert abs(model.estimate(300, 'fast', 'cpu', 8)['total'] - 60) < 1e-6
+        assert model.estimate(300, 'fast', 'cuda', 4)['total'] is None
+        assert model.estimate(300, 'standard', 'cpu', 4)['tts'] is None
+
+        assert model.get_stats() == {'tts': {'cpu': 3}, 'wav2lip': {'cpu': 3}}
+
+    print("PASS: Estimate")
+    return True
+
+def test_persistence():
+    """Test that recorded runs survive a restart and old rows are dropped"""
+    print("\nPersistence Test")
+    print("-" * 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'costs.sqlite3')
+        model = JobCostModel(path, max_rows=4)
+        for i in range(3):
+            model.record(make_trace(f'job-{i}', 100, 10, 10), 'fast', 4)
+
+        restarted = JobCostModel(path)
+        assert restarted.get_stats() == {'tts': {'cpu': 2}, 'wav2lip': {'cpu': 2}}
+        assert abs(restarted.estimate(100, 'fast', 'cpu', 4)['total'] - 20) < 1e-6
+
+    print("PASS: Persistence")
+    return True
+
+def main():
+    """Main test function"""
+    print("Face-Gen Cost Model Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Fit Line", test_fit_line),
+        ("Estimate", test_estimate),
+        ("Persistence", test_persistence)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"FAIL: {test_name} test - {e}")
+            results.append((test_name, False))
+
+    # Summary
+    print("\nTest Summary")
+    print("=" * 20)
+
+    passed = 0
+    total = len(results)
+
+    for test_name, result in results:
+        status = "PASS" if result else "FAIL"
+        print(f"{test_name}: {status}")
+        if result:
+            passed += 1
+
+    print(f"\nOverall: {passed}/{total} tests passed")
+
+    if passed == total:
+        print("All tests passed!")
+
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -31,6 +31,30 @@ def test_device_detection():
         print(f"FAIL: Device detection test - {e}")
         return False
 
+def test_device_cache():
+    """Test that the device probe is cached and can be overridden"""
+    print("\nDevice Cache Test")
+    print("-" * 30)
+    
+    from app.scripts import device_detection
+    
+    first = device_detection.probe_devices()
+    assert device_detection.probe_devices() is first, "probe should be cached"
+    assert device_detection.probe_devices(refresh=True) is not first, "refresh should re-probe"
+    
+    previous = os.environ.get('FACE_GEN_DEVICE')
+    os.environ['FACE_GEN_DEVICE'] = 'cpu'
+    try:
+        assert device_detection.get_optimal_device() == 'cpu'
+    finally:
+        if previous is None:
+            del os.environ['FACE_GEN_DEVICE']
+        else:
+            os.environ['FACE_GEN_DEVICE'] = previous
+    
+    print("PASS: Device cache test")
+    return True
+
 def test_environment_compatibility():
     """Test environment compatibility"""
     print("\nEnvironment Compatibility Test")
@@ -116,6 +140,7 @@ def main():
     
     tests = [
         ("Device Detection", test_device_detection),
+        ("Device Cache", test_device_cache),
         ("Environment Compatibility", test_environment_compatibility),
         ("Performance Comparison", test_performance_comparison)
     ]
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Download Test for Face-Gen
+Tests ETags, conditional requests, ranges and caching headers of /download
+"""
+
+import os
+import sys
+import tempfile
+
+# main.py imports its helpers as 'scripts', relative to the app directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+VIDEO_BYTES = bytes(range(256)) * 4
+
+def make_client(video_folder):
+    """Flask test client serving videos from video_folder"""
+    import main
+    main.janitor.stop()
+    main.app.config['VIDEO_FOLDER'] = video_folder
+    return main.app.test_client()
+
+def write_video(video_folder):
+    os.makedirs(video_folder, exist_ok=True)
+    with open(os.path.join(video_folder, 'video_test.mp4'), 'wb') as f:
+        f.write(VIDEO_BYTES)
+
+def test_download():
+    """Test full, conditional and partial downloads of a video"""
+    print("Download Test")
+    print("-" * 30)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # main.py creates its folders relative to the working directory
+        os.chdir(tmp)
+        try:
+            video_folder = os.path.join(tmp, 'video')
+            client = make_client(video_folder)
+            write_video(video_folder)
+
+            response = client.get('/download/video_test.mp4')
+            assert response.status_code == 200
+            assert response.data == VIDEO_BYTES
+            assert response.mimetype == 'video/mp4'
+            etag = response.headers['ETag']
+            assert etag.startswith('"'), "ETag should be strong"
+            assert response.cache_control.immutable
+            assert response.cache_control.max_age > 0
+            assert response.headers['Accept-Ranges'] == 'bytes'
+            last_modified = response.headers['Last-Modified']
+
+            # Matching validators answer 304 without a body
+            response = client.get('/download/video_test.mp4', headers={'If-None-Match': etag})
+            assert response.status_code == 304 and response.data == b''
+            response = client.get('/download/video_test.mp4', headers={'If-Modified-Since': last_modified})
+            assert response.status_code == 304
+
+            response = client.get('/download/video_test.mp4', headers={'Range': 'bytes=0-9'})
+            assert response.status_code == 206
+            assert response.data == VIDEO_BYTES[:10]
+            assert response.headers['Content-Range'] == f'bytes 0-9/{len(VIDEO_BYTES)}'
+
+            response = client.get('/download/video_test.mp4?download=true')
+            assert response.status_code == 200
+            assert 'attachment' in response.headers['Content-Disposition']
+
+            assert client.get('/download/missing.mp4').status_code == 404
+        finally:
+            os.chdir(cwd)
+
+    print("PASS: Download")
+    return True
+
+def main():
+    """Main test function"""
+    print("Face-Gen Download Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Download", test_download)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"FAIL: {test_name} test - {e}")
+            results.append((test_name, False))
+
+    # Summary
+    print("\nTest Summary")
+    print("=" * 20)
+
+    passed = 0
+    total = len(results)
+
+    for test_name, result in results:
+        status = "PASS" if result else "FAIL"
+        print(f"{test_name}: {status}")
+        if result:
+            passed += 1
+
+    print(f"\nOverall: {passed}/{total} tests passed")
+
+    if passed == total:
+        print("All tests passed!")
+
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Face Cache Test for Face-Gen
+Tests that face detections are stored and reloaded by image content hash
+"""
+
+import os
+import sys
+import tempfile
+import numpy as np
+
+# Add the parent directory to the path so we can import app modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.scripts.face_cache import FaceDetectionCache, hash_image_bytes, make_face_key
+
+def test_face_key():
+    """Test that keys depend on image bytes and pads"""
+    print("Face Key Test")
+    print("-" * 30)
+
+    image_hash = hash_image_bytes(b'image')
+    assert image_hash != hash_image_bytes(b'other image')
+    assert make_face_key(image_hash, (0, 20, 0, 0)) != make_face_key(image_hash, (0, 10, 0, 0))
+
+    print("PASS: Face key")
+    return True
+
+def test_round_trip():
+    """Test storing and reloading a detection from disk"""
+    print("\nRound Trip Test")
+    print("-" * 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        key = make_face_key(hash_image_bytes(b'image'), (0, 20, 0, 0))
+        face = np.random.randint(0, 255, (96, 96, 3), dtype=np.uint8)
+
+        cache = FaceDetectionCache(tmp)
+        assert cache.get(key) is None
+        cache.put(key, (10, 110, 20, 120), face)
+
+        # A fresh instance has an empty memory cache and must read from disk
+        box, cached_face = FaceDetectionCache(tmp).get(key)
+        assert box == (10, 110, 20, 120)
+        assert cached_face.dtype == np.uint8
+        assert np.array_equal(cached_face, face)
+
+        assert cache.get(key) is not None
+        stats = cache.get_stats()
+        assert stats['hits'] == 1 and stats['misses'] == 1
+
+    print("PASS: Round trip")
+    return True
+
+def main():
+    """Main test function"""
+    print("Face-Gen Face Cache Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Face Key", test_face_key),
+        ("Round Trip", test_round_trip)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"FAIL: {test_name} test - {e}")
+            results.append((test_name, False))
+
+    # Summary
+    print("\nTest Summary")
+    print("=" * 20)
+
+    passed = 0
+    total = len(results)
+
+    for test_name, result in results:
+        status = "PASS" if result else "FAIL"
+        print(f"{test_name}: {status}")
+        if result:
+            passed += 1
+
+    print(f"\nOverall: {passed}/{total} tests passed")
+
+    if passed == total:
+        print("All tests passed!")
+
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
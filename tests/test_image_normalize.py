@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Image Normalization Test for Face-Gen
+Tests EXIF orientation, downscaling and format conversion of face uploads
+"""
+
+import io
+import os
+import sys
+import tempfile
+from PIL import Image
+
+# Add the parent directory to the path so we can import app modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.scripts.image_normalize import normalize_image, ImageNormalizeError
+
+def encode(image, fmt, **kwargs):
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **kwargs)
+    buffer.seek(0)
+    return buffer
+
+def test_downscale():
+    """Test that large uploads are shrunk to the maximum side"""
+    print("Downscale Test")
+    print("-" * 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'face.jpg')
+        info = normalize_image(encode(Image.new('RGB', (2000, 1000), 'red'), 'JPEG'), output, max_side=500)
+        assert info['original_size'] == (2000, 1000)
+        with Image.open(output) as stored:
+            assert stored.format == 'JPEG'
+            assert stored.size == (500, 250)
+
+        # Small images are left at their size
+        normalize_image(encode(Image.new('RGB', (300, 200)), 'PNG'), output, max_side=500)
+        with Image.open(output) as stored:
+            assert stored.size == (300, 200)
+
+    print("PASS: Downscale")
+    return True
+
+def test_exif_orientation():
+    """Test that the EXIF orientation is applied to the pixels"""
+    print("\nEXIF Orientation Test")
+    print("-" * 30)
+
+    exif = Image.Exif()
+    exif[0x0112] = 6  # rotated 90 degrees clockwise
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'face.jpg')
+        upload = encode(Image.new('RGB', (400, 200)), 'JPEG', exif=exif.tobytes())
+        info = normalize_image(upload, output, max_side=0)
+        assert info['stored_size'] == (200, 400)
+        with Image.open(output) as stored:
+            assert stored.getexif().get(0x0112) in (None, 1)
+
+    print("PASS: EXIF orientation")
+    return True
+
+def test_transparency_and_invalid():
+    """Test that transparent images are flattened and non-images are rejected"""
+    print("\nTransparency And Invalid Test")
+    print("-" * 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'face.jpg')
+        normalize_image(encode(Image.new('RGBA', (50, 50), (0, 0, 0, 0)), 'PNG'), output)
+        with Image.open(output) as stored:
+            assert stored.mode == 'RGB'
+            assert stored.getpixel((25, 25)) == (255, 255, 255)
+
+        try:
+            normalize_image(io.BytesIO(b'not an image'), os.path.join(tmp, 'bad.jpg'))
+            raise AssertionError("Expected ImageNormalizeError")
+        except ImageNormalizeError:
+            pass
+        assert not os.path.exists(os.path.join(tmp, 'bad.jpg'))
+
+    print("PASS: Transparency and invalid")
+    return True
+
+def main():
+    """Main test function"""
+    print("Face-Gen Image Normalization Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Downscale", test_downscale),
+        ("EXIF Orientation", test_exif_orientation),
+        ("Transparency And Invalid", test_transparency_and_invalid)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"FAIL: {test_name} test - {e}")
+            results.append((test_name, False))
+
+    # Summary
+    print("\nTest Summary")
+    print("=" * 20)
+
+    passed = 0
+    total = len(results)
+
+    for test_name, result in results:
+        status = "PASS" if result else "FAIL"
+        print(f"{test_name}: {status}")
+        if result:
+            passed += 1
+
+    print(f"\nOverall: {passed}/{total} tests passed")
+
+    if passed == total:
+        print("All tests passed!")
+
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
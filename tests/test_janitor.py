@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Storage Janitor Test for Face-Gen
+Tests TTL expiry, quota eviction and protection of files that are still needed
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+# Add the parent directory to the path so we can import app modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.scripts.janitor import StorageJanitor, FileLeases, touch_file
+
+def make_file(folder, name, size, age=0):
+    path = os.path.join(folder, name)
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    used = time.time() - age
+    os.utime(path, (used, used))
+    return path
+
+def test_ttl_expiry():
+    """Test that entries unused for longer than their folder's TTL are deleted"""
+    print("TTL Expiry Test")
+    print("-" * 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        uploads = os.path.join(tmp, 'uploads')
+        video = os.path.join(tmp, 'video')
+        os.makedirs(uploads)
+        os.makedirs(video)
+        old_upload = make_file(uploads, 'old.jpg', 100, age=7200)
+        new_upload = make_file(uploads, 'new.jpg', 100, age=60)
+        old_video = make_file(video, 'old.mp4', 100, age=7200)
+
+        janitor = StorageJanitor({uploads: 3600, video: 0}, max_bytes=0, interval=0)
+        result = janitor.sweep()
+        assert result == {'deleted': 1, 'reclaimed_bytes': 100}
+        assert not os.path.exists(old_upload)
+        assert os.path.exists(new_upload)
+        # A TTL of 0 keeps files forever
+        assert os.path.exists(old_video)
+        assert janitor.get_stats()['bytes'] == 200
+
+    print("PASS: TTL expiry")
+    return True
+
+def test_quota_eviction():
+    """Test that the least recently used entries are evicted to meet the quota"""
+    print("\nQuota Eviction Test")
+    print("-" * 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        oldest = make_file(tmp, 'a.mp4', 100, age=300)
+        middle = make_file(tmp, 'b.mp4', 100, age=200)
+        newest = make_file(tmp, 'c.mp4', 100, age=100)
+        # A download makes the oldest file the most recently used one
+        touch_file(oldest)
+
+        stream = os.path.join(tmp, 'stream')
+        os.makedirs(stream)
+        make_file(stream, 'segment_00000.ts', 100)
+        old = time.time() - 400
+        os.utime(stream, (old, old))
+
+        janitor = StorageJanitor({tmp: 0}, max_bytes=250, interval=0)
+        result = janitor.sweep()
+        assert result == {'deleted': 2, 'reclaimed_bytes': 200}
+        assert not os.path.exists(stream)
+        assert not os.path.exists(middle)
+        assert os.path.exists(oldest) and os.path.exists(newest)
+
+    print("PASS: Quota eviction")
+    return True
+
+def test_protected_files():
+    """Test that job files and leased downloads survive TTL and quota"""
+    print("\nProtected Files Test")
+    print("-" * 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        job_file = make_file(tmp, 'job.jpg', 100, age=7200)
+        served = make_file(tmp, 'served.mp4', 100, age=7200)
+        other = make_file(tmp, 'other.mp4', 100, age=7200)
+
+        leases = FileLeases()
+        leases.acquire(served)
+        leases.acquire(served)
+        janitor = StorageJanitor({tmp: 3600}, max_bytes=50, interval=0,
+                                 protected=lambda: [job_file, None], leases=leases)
+        janitor.sweep()
+        assert os.path.exists(job_file) and os.path.exists(served)
+        assert not os.path.exists(other)
+
+        # Still leased once, then free to go
+        leases.release(served)
+        janitor.sweep()
+        assert os.path.exists(served)
+        leases.release(served)
+        janitor.sweep()
+        assert not os.path.exists(served)
+        assert os.path.exists(job_file)
+
+    print("PASS: Protected files")
+    return True
+
+def main():
+    """Main test function"""
+    print("Face-Gen Storage Janitor Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("TTL Expiry", test_ttl_expiry),
+        ("Quota Eviction", test_quota_eviction),
+        ("Protected Files", test_protected_files)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"FAIL: {test_name} test - {e}")
+            results.append((test_name, False))
+
+    # Summary
+    print("\nTest Summary")
+    print("=" * 20)
+
+    passed = 0
+    total = len(results)
+
+    for test_name, result in results:
+        status = "PASS" if result else "FAIL"
+        print(f"{test_name}: {status}")
+        if result:
+            passed += 1
+
+    print(f"\nOverall: {passed}/{total} tests passed")
+
+    if passed == total:
+        print("All tests passed!")
+
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+Job Queue Test for Face-Gen
+Tests background job submission, state tracking and worker limits
+"""
+
+import os
+import sys
+import threading
+import time
+
+# Add the parent directory to the path so we can import app modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.scripts.job_queue import JobManager, QueueFullError, JOB_COMPLETED, JOB_FAILED
+from app.scripts.scheduling import ShortestJobFirstPolicy
+
+def wait_for(manager, job_id, timeout=5):
+    """Poll a job until it finishes"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job['state'] in (JOB_COMPLETED, JOB_FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+def test_job_lifecycle():
+    """Test that a job returns immediately and completes in the background"""
+    print("Job Lifecycle Test")
+    print("-" * 30)
+
+    manager = JobManager(max_workers=1)
+    release = threading.Event()
+
+    def work():
+        release.wait(5)
+        return {'value': 42}
+
+    start_time = time.time()
+    job = manager.submit(work)
+    assert time.time() - start_time < 0.5, "submit should not block"
+    assert job['state'] in ('queued', 'running')
+
+    release.set()
+    job = wait_for(manager, job['id'])
+    assert job['state'] == JOB_COMPLETED
+    assert job['result'] == {'value': 42}
+    manager.shutdown()
+
+    print("PASS: Job lifecycle")
+    return True
+
+def test_job_failure():
+    """Test that exceptions are recorded as failed jobs"""
+    print("\nJob Failure Test")
+    print("-" * 30)
+
+    manager = JobManager(max_workers=1)
+
+    def work():
+        raise RuntimeError('boom')
+
+    job = wait_for(manager, manager.submit(work)['id'])
+    assert job['state'] == JOB_FAILED
+    assert job['error'] == 'boom'
+    assert manager.get('missing') is None
+    manager.shutdown()
+
+    print("PASS: Job failure")
+    return True
+
+def test_worker_limit():
+    """Test that concurrency is bounded by max_workers"""
+    print("\nWorker Limit Test")
+    print("-" * 30)
+
+    manager = JobManager(max_workers=2)
+    lock = threading.Lock()
+    state = {'running': 0, 'peak': 0}
+
+    def work():
+        with lock:
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+        time.sleep(0.05)
+        with lock:
+            state['running'] -= 1
+        return {}
+
+    jobs = [manager.submit(work) for _ in range(6)]
+    for job in jobs:
+        wait_for(manager, job['id'])
+    assert state['peak'] <= 2, f"peak concurrency {state['peak']} exceeds 2"
+    assert manager.get_stats()['completed'] == 6
+    manager.shutdown()
+
+    print(f"PASS: Peak concurrency {state['peak']}")
+    return True
+
+def test_as_completed():
+    """Test that jobs are yielded in the order they finish"""
+    print("\nAs Completed Test")
+    print("-" * 30)
+
+    manager = JobManager(max_workers=2)
+    release = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return {'name': 'slow'}
+
+    def fast():
+        return {'name': 'fast'}
+
+    job_ids = [manager.submit(slow)['id'], manager.submit(fast)['id']]
+    finished = manager.as_completed(job_ids, timeout=5)
+    assert next(finished)['result'] == {'name': 'fast'}
+    release.set()
+    assert next(finished)['result'] == {'name': 'slow'}
+    assert list(finished) == []
+    manager.shutdown()
+
+    print("PASS: As completed")
+    return True
+
+def test_referenced_files():
+    """Test that files of unfinished and recently finished jobs are reported"""
+    print("\nReferenced Files Test")
+    print("-" * 30)
+
+    manager = JobManager(max_workers=1)
+    release = threading.Event()
+
+    def work():
+        release.wait(5)
+        return {}
+
+    running = manager.submit(work, files=['face.jpg', 'video_1.mp4', None])
+    done = manager.submit(lambda: {}, files=['video_2.mp4'])
+    assert manager.referenced_files() == {'face.jpg', 'video_1.mp4', 'video_2.mp4'}
+
+    release.set()
+    wait_for(manager, running['id'])
+    wait_for(manager, done['id'])
+    assert manager.referenced_files(finished_within=60) == {'face.jpg', 'video_1.mp4', 'video_2.mp4'}
+    time.sleep(0.05)
+    assert manager.referenced_files(finished_within=0.01) == set()
+    manager.shutdown()
+
+    print("PASS: Referenced files")
+    return True
+
+def test_single_flight():
+    """Test that jobs with the same key share one run while it is unfinished"""
+    print("\nSingle Flight Test")
+    print("-" * 30)
+
+    manager = JobManager(max_workers=2)
+    release = threading.Event()
+    runs = []
+
+    def work(name):
+        runs.append(name)
+        release.wait(5)
+        return {'name': name}
+
+    first = manager.submit(work, 'first', key='same')
+    attached = manager.submit(work, 'second', key='same')
+    other = manager.submit(work, 'other', key='different')
+    assert attached['id'] == first['id']
+    assert other['id'] != first['id']
+
+    release.set()
+    assert manager.wait(attached['id'], timeout=5)['result'] == {'name': 'first'}
+    manager.wait(other['id'], timeout=5)
+    assert sorted(runs) == ['first', 'other']
+    assert manager.get_stats()['coalesced'] == 1
+
+    # Once the job has finished, the key starts a new run
+    again = manager.submit(work, 'again', key='same')
+    assert again['id'] != first['id']
+    assert manager.wait(again['id'], timeout=5)['result'] == {'name': 'again'}
+    manager.shutdown()
+
+    print("PASS: Single flight")
+    return True
+
+def test_admission_control():
+    """Test that a full queue refuses jobs with a retry time"""
+    print("\nAdmission Control Test")
+    print("-" * 30)
+
+    manager = JobManager(max_workers=1, max_queued=2)
+    release = threading.Event()
+
+    def work():
+        release.wait(5)
+        return {}
+
+    running = manager.submit(work, key='running')
+    deadline = time.time() + 5
+    while manager.get(running['id'])['state'] != 'running' and time.time() < deadline:
+        time.sleep(0.01)
+    manager.submit(work)
+    manager.submit(work)
+    try:
+        manager.submit(work)
+        raise AssertionError("a full queue should refuse jobs")
+    except QueueFullError as e:
+        # Nothing has finished yet, so the default duration is assumed for all three jobs
+        assert 170 <= e.retry_after <= 180
+    try:
+        manager.check_capacity(1)
+        raise AssertionError("check_capacity should refuse too")
+    except QueueFullError:
+        pass
+
+    # Attaching to a running job and pre-admitted work are still accepted
+    assert manager.submit(work, key='running')['id'] == running['id']
+    manager.submit(work, bounded=False)
+    stats = manager.get_stats()
+    assert stats['queued'] == 3 and stats['rejected'] == 2
+    release.set()
+    manager.shutdown()
+
+    # An empty queue admits work larger than the limit
+    idle = JobManager(max_workers=1, max_queued=2)
+    idle.check_capacity(5)
+    idle.shutdown()
+
+    print("PASS: Admission control")
+    return True
+
+def test_on_success():
+    """Test that the success callback sees the result before the job completes"""
+    print("\nOn Success Test")
+    print("-" * 30)
+
+    manager = JobManager(max_workers=1)
+    seen = []
+
+    def record(result):
+        # The job is still running while its result is recorded
+        seen.append((result, manager.get('indexed')['state']))
+
+    manager.submit(lambda: {'video_filename': 'video_1.mp4'}, job_id='indexed', key='same', on_success=record)
+    manager.wait('indexed', timeout=5)
+    assert seen == [({'video_filename': 'video_1.mp4'}, 'running')]
+
+    # A failing callback does not fail the job, and failed jobs are not recorded
+    def broken(result):
+        raise RuntimeError('index unavailable')
+    assert wait_for(manager, manager.submit(lambda: {}, on_success=broken)['id'])['state'] == JOB_COMPLETED
+
+    def fail():
+        raise RuntimeError('boom')
+    wait_for(manager, manager.submit(fail, on_success=record)['id'])
+    assert len(seen) == 1
+    manager.shutdown()
+
+    print("PASS: On success")
+    return True
+
+def test_coalesce_when_full():
+    """Test that a request identical to a queued job attaches to it while the queue is full"""
+    print("\nCoalesce When Full Test")
+    print("-" * 30)
+
+    manager = JobManager(max_workers=1, max_queued=1)
+    release = threading.Event()
+
+    def work():
+        release.wait(5)
+        return {}
+
+    running = manager.submit(work, key='a')
+    deadline = time.time() + 5
+    while manager.get(running['id'])['state'] != 'running' and time.time() < deadline:
+        time.sleep(0.01)
+    queued = manager.submit(work, key='b')
+    try:
+        manager.submit(work, key='c')
+        raise AssertionError("a new job should be refused by the full queue")
+    except QueueFullError:
+        pass
+
+    # Identical requests need no new job, so they are still accepted
+    assert manager.submit(work, key='b')['id'] == queued['id']
+    assert manager.submit(work, key='a')['id'] == running['id']
+    stats = manager.get_stats()
+    assert stats['coalesced'] == 2 and stats['rejected'] == 1
+    release.set()
+    manager.shutdown()
+
+    print("PASS: Coalesce when full")
+    return True
+
+def test_admit_group():
+    """Test that a group is admitted as a whole or refused"""
+    print("\nAdmit Group Test")
+    print("-" * 30)
+
+    manager = JobManager(max_workers=1, max_queued=3)
+    release = threading.Event()
+
+    def work():
+        release.wait(5)
+        return {}
+
+    running = manager.submit(work)
+    deadline = time.time() + 5
+    while manager.get(running['id'])['state'] != 'running' and time.time() < deadline:
+        time.sleep(0.01)
+    manager.submit(work)
+    try:
+        with manager.admit(3):
+            raise AssertionError("a group larger than the free room should be refused")
+    except QueueFullError:
+        pass
+    with manager.admit(2):
+        manager.submit(work, bounded=False)
+        manager.submit(work, bounded=False)
+    assert manager.get_stats()['queued'] == 3
+    release.set()
+    manager.shutdown()
+
+    print("PASS: Admit group")
+    return True
+
+def test_eta():
+    """Test that ETAs use the predicted cost of each job"""
+    print("\nETA Test")
+    print("-" * 30)
+
+    manager = JobManager(max_workers=1)
+    release = threading.Event()
+
+    def work():
+        release.wait(5)
+        return {}
+
+    running = manager.submit(work, cost=10)
+    deadline = time.time() + 5
+    while manager.get(running['id'])['state'] != 'running' and time.time() < deadline:
+        time.sleep(0.01)
+    first = manager.submit(work, cost=30)
+    second = manager.submit(work)
+
+    assert 9 <= manager.eta_seconds(running['id']) <= 10
+    # Waits for the running job, then needs its own 30 seconds
+    assert 39 <= manager.eta_seconds(first['id']) <= 40
+    # Jobs without a cost are assumed to take the default duration
+    assert 99 <= manager.eta_seconds(second['id']) <= 100
+    assert manager.eta_seconds('unknown') is None
+
+    release.set()
+    wait_for(manager, second['id'])
+    assert manager.eta_seconds(second['id']) == 0.0
+    manager.shutdown()
+
+    print("PASS: ETA")
+    return True
+
+def test_scheduling_policy():
+    """Test that the policy picks the next job and drives the ETAs"""
+    print("\nScheduling Policy Test")
+    print("-" * 30)
+
+    manager = JobManager(max_workers=1, policy=ShortestJobFirstPolicy())
+    release = threading.Event()
+    started = []
+
+    def work(name):
+        started.append(name)
+        release.wait(5)
+        return {}
+
+    blocker = manager.submit(work, 'blocker', cost=10)
+    deadline = time.time() + 5
+    while manager.get(blocker['id'])['state'] != 'running' and time.time() < deadline:
+        time.sleep(0.01)
+    long_job = manager.submit(work, 'long', cost=300, size=3000)
+    short_job = manager.submit(work, 'short', cost=5, size=50)
+
+    # The short job is predicted to run before the long one
+    assert manager.eta_seconds(short_job['id']) < 20
+    assert manager.eta_seconds(long_job['id']) > 310
+    assert manager.get_stats()['policy'] == 'sjf'
+
+    release.set()
+    wait_for(manager, long_job['id'])
+    assert started == ['blocker', 'short', 'long']
+    manager.shutdown()
+
+    print("PASS: Scheduling policy")
+    return True
+
+def main():
+    """Main test function"""
+    print("Face-Gen Job Queue Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Job Lifecycle", test_job_lifecycle),
+        ("Job Failure", test_job_failure),
+        ("Worker Limit", test_worker_limit),
+        ("As Completed", test_as_completed),
+        ("Referenced Files", test_referenced_files),
+        ("Single Flight", test_single_flight),
+        ("Admission Control", test_admission_control),
+        ("On Success", test_on_success),
+        ("Coalesce When Full", test_coalesce_when_full),
+        ("Admit Group", test_admit_group),
+        ("ETA", test_eta),
+        ("Scheduling Policy", test_scheduling_policy)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"FAIL: {test_name} test - {e}")
+            results.append((test_name, False))
+
+    # Summary
+    print("\nTest Summary")
+    print("=" * 20)
+
+    passed = 0
+    total = len(results)
+
+    for test_name, result in results:
+        status = "PASS" if result else "FAIL"
+        print(f"{test_name}: {status}")
+        if result:
+            passed += 1
+
+    print(f"\nOverall: {passed}/{total} tests passed")
+
+    if passed == total:
+        print("All tests passed!")
+
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Result Index Test for Face-Gen
+Tests request fingerprints and reuse of finished videos across restarts
+"""
+
+import os
+import sys
+import tempfile
+
+# Add the parent directory to the path so we can import app modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.scripts.result_index import ResultIndex, make_result_fingerprint, hash_file
+
+WAV2LIP = {'mode': 'inprocess', 'pads': [0, 20, 0, 0], 'checkpoint': 'wav2lip_gan.pth'}
+SETTINGS = {'preset': 'fast', 'params': {}, 'target_latency': None}
+
+def test_fingerprint():
+    """Test that fingerprints ignore whitespace but not settings"""
+    print("Fingerprint Test")
+    print("-" * 30)
+
+    base = make_result_fingerprint('abc', 'Hello  world ', 'random', SETTINGS, WAV2LIP)
+    assert base == make_result_fingerprint('abc', 'Hello world', 'random', SETTINGS, WAV2LIP)
+    assert base != make_result_fingerprint('abd', 'Hello world', 'random', SETTINGS, WAV2LIP)
+    assert base != make_result_fingerprint('abc', 'Hello world', 'alice', SETTINGS, WAV2LIP)
+    assert base != make_result_fingerprint('abc', 'Hello world', 'random', dict(SETTINGS, preset='standard'), WAV2LIP)
+    assert base != make_result_fingerprint('abc', 'Hello world', 'random', SETTINGS, dict(WAV2LIP, pads=[0, 10, 0, 0]))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'face.jpg')
+        with open(path, 'wb') as f:
+            f.write(b'image')
+        assert hash_file(path) == hash_file(path, chunk_size=2)
+
+    print("PASS: Fingerprint")
+    return True
+
+def test_persistence():
+    """Test that recorded results are found again by a new index"""
+    print("\nPersistence Test")
+    print("-" * 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index_path = os.path.join(tmp, 'results.json')
+        with open(os.path.join(tmp, 'video_1.mp4'), 'wb') as f:
+            f.write(b'video')
+
+        index = ResultIndex(index_path)
+        assert index.lookup('fp', tmp) is None
+        index.record('fp', 'video_1.mp4')
+        assert index.lookup('fp', tmp) == 'video_1.mp4'
+
+        restarted = ResultIndex(index_path)
+        assert restarted.lookup('fp', tmp) == 'video_1.mp4'
+        assert restarted.get_stats()['hits'] == 1
+
+    print("PASS: Persistence")
+    return True
+
+def test_missing_video():
+    """Test that entries whose video was deleted are dropped"""
+    print("\nMissing Video Test")
+    print("-" * 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = ResultIndex(os.path.join(tmp, 'results.json'), max_entries=2)
+        for name in ('a', 'b', 'c'):
+            with open(os.path.join(tmp, f'video_{name}.mp4'), 'wb') as f:
+                f.write(b'video')
+            index.record(name, f'video_{name}.mp4')
+        # The oldest entry was forgotten to stay within max_entries
+        assert index.lookup('a', tmp) is None
+        assert index.get_stats()['entries'] == 2
+
+        os.remove(os.path.join(tmp, 'video_b.mp4'))
+        assert index.lookup('b', tmp) is None
+        assert index.get_stats()['entries'] == 1
+        assert index.lookup('c', tmp) == 'video_c.mp4'
+
+    print("PASS: Missing video")
+    return True
+
+def main():
+    """Main test function"""
+    print("Face-Gen Result Index Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Fingerprint", test_fingerprint),
+        ("Persistence", test_persistence),
+        ("Missing Video", test_missing_video)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"FAIL: {test_name} test - {e}")
+            results.append((test_name, False))
+
+    # Summary
+    print("\nTest Summary")
+    print("=" * 20)
+
+    passed = 0
+    total = len(results)
+
+    for test_name, result in results:
+        status = "PASS" if result else "FAIL"
+        print(f"{test_name}: {status}")
+        if result:
+            passed += 1
+
+    print(f"\nOverall: {passed}/{total} tests passed")
+
+    if passed == total:
+        print("All tests passed!")
+
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Scheduling Policy Test for Face-Gen
+Tests the order in which FIFO, shortest-job-first and fair-share policies start queued jobs
+"""
+
+import os
+import sys
+
+# Add the parent directory to the path so we can import app modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.scripts.scheduling import (FifoPolicy, ShortestJobFirstPolicy, FairSharePolicy, create_scheduling_policy,
+                                    job_sizes)
+
+def make_job(job_id, created_at, estimated_seconds=None, size=None, client=None, started_at=None,
+             finished_at=None):
+    """Job dict with the fields the policies read"""
+    return {'id': job_id, 'created_at': created_at, 'estimated_seconds': estimated_seconds, 'size': size,
+            'client': client, 'started_at': started_at, 'finished_at': finished_at}
+
+def ids(jobs):
+    return [job['id'] for job in jobs]
+
+def test_shortest_job_first():
+    """Test that short jobs overtake long ones until the long ones have aged"""
+    print("Shortest Job First Test")
+    print("-" * 30)
+
+    queued = [make_job('long', 0, 300), make_job('short', 1, 5), make_job('medium', 2, 60)]
+    assert ids(FifoPolicy().order(queued, queued, 10)) == ['long', 'short', 'medium']
+
+    policy = ShortestJobFirstPolicy(max_wait=600)
+    assert ids(policy.order(queued, queued, 10)) == ['short', 'medium', 'long']
+    # After 595 seconds the long job counts as 2.5 seconds and goes before a new short job
+    fresh = make_job('fresh', 590, 5)
+    assert ids(policy.order([queued[0], fresh], queued, 595)) == ['long', 'fresh']
+    # Jobs that waited max_wait or longer run in submission order
+    assert ids(policy.order(queued, queued, 1000)) == ['long', 'short', 'medium']
+
+    # Without costs for every job, text length is compared instead
+    queued = [make_job('long', 0, 300, size=3000), make_job('short', 1, None, size=40)]
+    assert job_sizes(queued) == {'long': 3000, 'short': 40}
+    assert ids(policy.order(queued, queued, 10)) == ['short', 'long']
+
+    print("PASS: Shortest job first")
+    return True
+
+def test_fair_share():
+    """Test that clients take turns and running jobs count against their client"""
+    print("\nFair Share Test")
+    print("-" * 30)
+
+    batch = [make_job(f'a{i}', i, client='a') for i in range(4)]
+    single = [make_job('b0', 10, client='b'), make_job('b1', 11, client='b')]
+    queued = batch + single
+    policy = FairSharePolicy()
+    assert ids(policy.order(queued, queued, 20)) == ['a0', 'b0', 'a1', 'b1', 'a2', 'a3']
+
+    # Client a already has a job running, so b goes first
+    running = make_job('a-run', -1, client='a', started_at=5)
+    assert ids(policy.order(queued, queued + [running], 20))[0] == 'b0'
+
+    # With equal running jobs, the client served least recently goes first
+    served = [make_job('a-done', -2, client='a', started_at=8, finished_at=9),
+              make_job('b-done', -3, client='b', started_at=6, finished_at=7)]
+    assert ids(policy.order(queued, queued + served, 20))[0] == 'b0'
+
+    print("PASS: Fair share")
+    return True
+
+def test_create_policy():
+    """Test building policies by name"""
+    print("\nCreate Policy Test")
+    print("-" * 30)
+
+    assert isinstance(create_scheduling_policy('fifo'), FifoPolicy)
+    assert create_scheduling_policy('sjf', max_wait=30).max_wait == 30
+    assert create_scheduling_policy('fair').name == 'fair'
+    try:
+        create_scheduling_policy('lottery')
+        raise AssertionError("unknown policies should be refused")
+    except ValueError:
+        pass
+
+    print("PASS: Create policy")
+    return True
+
+def main():
+    """Main test function"""
+    print("Face-Gen Scheduling Policy Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Shortest Job First", test_shortest_job_first),
+        ("Fair Share", test_fair_share),
+        ("Create Policy", test_create_policy)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"FAIL: {test_name} test - {e}")
+            results.append((test_name, False))
+
+    # Summary
+    print("\nTest Summary")
+    print("=" * 20)
+
+    passed = 0
+    total = len(results)
+
+    for test_name, result in results:
+        status = "PASS" if result else "FAIL"
+        print(f"{test_name}: {status}")
+        if result:
+            passed += 1
+
+    print(f"\nOverall: {passed}/{total} tests passed")
+
+    if passed == total:
+        print("All tests passed!")
+
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Text Segmenter Test for Face-Gen
+Tests sentence splitting and chunking for English and Chinese scripts
+"""
+
+import os
+import sys
+
+# Add the parent directory to the path so we can import app modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.scripts.text_segmenter import split_sentences, split_text
+
+def test_english_sentences():
+    """Test splitting on English sentence punctuation"""
+    print("English Sentence Test")
+    print("-" * 30)
+
+    sentences = split_sentences("Hello world. How are you? I am fine! Version 2.0 is out.")
+    assert sentences == ["Hello world.", "How are you?", "I am fine!", "Version 2.0 is out."], sentences
+
+    print("PASS: English sentences")
+    return True
+
+def test_chinese_sentences():
+    """Test splitting on CJK punctuation without spaces"""
+    print("\nChinese Sentence Test")
+    print("-" * 30)
+
+    sentences = split_sentences("你好，我是数字分身。欢迎来到未来！你准备好了吗？")
+    assert sentences == ["你好，我是数字分身。", "欢迎来到未来！", "你准备好了吗？"], sentences
+
+    # Merged CJK chunks are joined without a space
+    assert split_text("你好。世界。", max_chars=20) == ["你好。世界。"]
+
+    print("PASS: Chinese sentences")
+    return True
+
+def test_chunk_limits():
+    """Test that chunks respect max_chars and keep all the text"""
+    print("\nChunk Limit Test")
+    print("-" * 30)
+
+    text = " ".join(f"This is sentence number {i}." for i in range(40))
+    chunks = split_text(text, max_chars=100)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert " ".join(chunks) == text
+
+    # A sentence longer than the limit is split at commas, then hard-wrapped
+    long_sentence = ", ".join(["word"] * 50) + "."
+    assert all(len(chunk) <= 30 for chunk in split_text(long_sentence, max_chars=30))
+    assert all(len(chunk) <= 30 for chunk in split_text("x" * 95, max_chars=30))
+
+    assert split_text("   ") == []
+
+    print(f"PASS: {len(chunks)} chunks")
+    return True
+
+def main():
+    """Main test function"""
+    print("Face-Gen Text Segmenter Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("English Sentences", test_english_sentences),
+        ("Chinese Sentences", test_chinese_sentences),
+        ("Chunk Limits", test_chunk_limits)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"FAIL: {test_name} test - {e}")
+            results.append((test_name, False))
+
+    # Summary
+    print("\nTest Summary")
+    print("=" * 20)
+
+    passed = 0
+    total = len(results)
+
+    for test_name, result in results:
+        status = "PASS" if result else "FAIL"
+        print(f"{test_name}: {status}")
+        if result:
+            passed += 1
+
+    print(f"\nOverall: {passed}/{total} tests passed")
+
+    if passed == total:
+        print("All tests passed!")
+
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Stage Tracing Test for Face-Gen
+Tests per-job stage records, annotations and the JSON-lines trace log
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+# Add the parent directory to the path so we can import app modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.scripts.tracing import JobTrace, annotate, trace_stage, current_trace
+
+def test_stage_records():
+    """Test that nested stages are timed and annotated"""
+    print("Stage Records Test")
+    print("-" * 30)
+
+    trace = JobTrace('job-1')
+    with trace.activate():
+        with trace_stage('tts', text_length=11):
+            annotate(device='cpu', audio_seconds=1.5, unknown='ignored')
+        with trace_stage('wav2lip'):
+            with trace_stage('encode'):
+                annotate(frame_count=40)
+            annotate(frame_count=38)
+    assert current_trace() is None
+
+    stages = {entry['stage']: entry for entry in trace.to_dict()['stages']}
+    assert list(stages) == ['tts', 'wav2lip', 'encode']
+    assert stages['tts']['text_length'] == 11 and stages['tts']['device'] == 'cpu'
+    assert stages['tts']['audio_seconds'] == 1.5 and 'unknown' not in stages['tts']
+    assert stages['encode']['frame_count'] == 40
+    assert stages['wav2lip']['frame_count'] == 38
+    assert all(entry['duration'] >= 0 and entry['peak_rss_mb'] > 0 for entry in stages.values())
+
+    print("PASS: Stage records")
+    return True
+
+def test_failed_stage():
+    """Test that a stage that raises is marked failed"""
+    print("\nFailed Stage Test")
+    print("-" * 30)
+
+    trace = JobTrace('job-2')
+    try:
+        with trace.stage('tts'):
+            raise RuntimeError('boom')
+    except RuntimeError:
+        pass
+    entry = trace.to_dict()['stages'][0]
+    assert entry['failed'] and entry['duration'] is not None
+
+    # Without an active trace, stages still run
+    with trace_stage('tts') as entry:
+        annotate(device='cpu')
+    assert entry == {}
+
+    print("PASS: Failed stage")
+    return True
+
+def test_trace_log():
+    """Test that traces are appended as JSON lines"""
+    print("\nTrace Log Test")
+    print("-" * 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'logs', 'traces.jsonl')
+        for job_id in ('a', 'b'):
+            trace = JobTrace(job_id)
+            trace.record_wait('queue_wait')
+            trace.write_log(path, outcome='completed')
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f]
+        assert [line['job_id'] for line in lines] == ['a', 'b']
+        assert lines[0]['outcome'] == 'completed'
+        assert lines[0]['stages'][0]['stage'] == 'queue_wait'
+
+    print("PASS: Trace log")
+    return True
+
+def main():
+    """Main test function"""
+    print("Face-Gen Tracing Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Stage Records", test_stage_records),
+        ("Failed Stage", test_failed_stage),
+        ("Trace Log", test_trace_log)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"FAIL: {test_name} test - {e}")
+            results.append((test_name, False))
+
+    # Summary
+    print("\nTest Summary")
+    print("=" * 20)
+
+    passed = 0
+    total = len(results)
+
+    for test_name, result in results:
+        status = "PASS" if result else "FAIL"
+        print(f"{test_name}: {status}")
+        if result:
+            passed += 1
+
+    print(f"\nOverall: {passed}/{total} tests passed")
+
+    if passed == total:
+        print("All tests passed!")
+
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+TTS Cache Test for Face-Gen
+Tests cache keys, hits, misses and LRU eviction of synthesized audio
+"""
+
+import os
+import sys
+import tempfile
+
+# Add the parent directory to the path so we can import app modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.scripts.tts_cache import TTSAudioCache, make_cache_key
+
+def write_file(path, size):
+    with open(path, 'wb') as f:
+        f.write(b'\0' * size)
+    return path
+
+def test_cache_key():
+    """Test that keys ignore whitespace but not settings"""
+    print("Cache Key Test")
+    print("-" * 30)
+
+    assert make_cache_key("Hello  world ") == make_cache_key("Hello world")
+    assert make_cache_key("Hello world") != make_cache_key("Hello world", preset='fast')
+    assert make_cache_key("Hello world") != make_cache_key("Hello world", model_version='2.0')
+
+    print("PASS: Cache key")
+    return True
+
+def test_hit_and_miss():
+    """Test that a stored waveform is returned on the next lookup"""
+    print("\nHit And Miss Test")
+    print("-" * 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TTSAudioCache(os.path.join(tmp, 'cache'), max_bytes=1024)
+        source = write_file(os.path.join(tmp, 'source.wav'), 100)
+        output = os.path.join(tmp, 'out', 'output.wav')
+        key = make_cache_key("Hello")
+
+        assert not cache.get(key, output)
+        cache.put(key, source)
+        assert cache.get(key, output)
+        assert os.path.getsize(output) == 100
+
+        stats = cache.get_stats()
+        assert stats['hits'] == 1 and stats['misses'] == 1
+        assert stats['hit_rate'] == 0.5
+
+        # A new instance picks up entries already on disk
+        assert TTSAudioCache(os.path.join(tmp, 'cache'), max_bytes=1024).get(key, output)
+
+    print("PASS: Hit and miss")
+    return True
+
+def test_lru_eviction():
+    """Test that the least recently used entry is evicted first"""
+    print("\nLRU Eviction Test")
+    print("-" * 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TTSAudioCache(os.path.join(tmp, 'cache'), max_bytes=250)
+        source = write_file(os.path.join(tmp, 'source.wav'), 100)
+        output = os.path.join(tmp, 'output.wav')
+
+        cache.put('a', source)
+        cache.put('b', source)
+        assert cache.get('a', output)
+        cache.put('c', source)
+
+        assert cache.get('a', output)
+        assert not cache.get('b', output)
+        assert cache.get('c', output)
+        assert cache.get_stats()['evictions'] == 1
+        assert cache.get_stats()['bytes'] <= 250
+
+    print("PASS: LRU eviction")
+    return True
+
+def test_put_with_writer():
+    """Test that in-memory audio can be written straight into the cache"""
+    print("\nPut With Writer Test")
+    print("-" * 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TTSAudioCache(os.path.join(tmp, 'cache'), max_bytes=1024)
+        key = make_cache_key("Hello")
+
+        assert cache.lookup(key) is None
+        cache.put_with(key, lambda path: write_file(path, 64))
+        path = cache.lookup(key)
+        assert path is not None and os.path.getsize(path) == 64
+
+        # A failing writer leaves no entry and raises nothing
+        def broken(path):
+            raise RuntimeError('encoder failed')
+        cache.put_with(make_cache_key("Other"), broken)
+        assert cache.get_stats()['entries'] == 1
+        assert not [name for name in os.listdir(os.path.join(tmp, 'cache')) if name.endswith('.tmp')]
+
+    print("PASS: Put with writer")
+    return True
+
+def test_shared_directory():
+    """Test that caches in several processes keep the shared directory within max_bytes"""
+    print("\nShared Directory Test")
+    print("-" * 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = os.path.join(tmp, 'cache')
+        # One instance per worker process, all pointed at the same directory
+        first = TTSAudioCache(cache_dir, max_bytes=250)
+        second = TTSAudioCache(cache_dir, max_bytes=250)
+        source = write_file(os.path.join(tmp, 'source.wav'), 100)
+        output = os.path.join(tmp, 'output.wav')
+
+        first.put('a', source)
+        second.put('b', source)
+        first.put('c', source)
+        second.put('d', source)
+
+        on_disk = sum(os.path.getsize(os.path.join(cache_dir, name)) for name in os.listdir(cache_dir))
+        assert on_disk <= 250, f"{on_disk} bytes on disk exceed the 250 byte cap"
+        assert first.get_stats()['bytes'] <= 250 and second.get_stats()['bytes'] <= 250
+
+        # Entries stored by the other process are found
+        assert first.get('d', output)
+        assert not second.get('a', output)
+
+    print("PASS: Shared directory")
+    return True
+
+def main():
+    """Main test function"""
+    print("Face-Gen TTS Cache Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Cache Key", test_cache_key),
+        ("Hit And Miss", test_hit_and_miss),
+        ("LRU Eviction", test_lru_eviction),
+        ("Put With Writer", test_put_with_writer),
+        ("Shared Directory", test_shared_directory)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"FAIL: {test_name} test - {e}")
+            results.append((test_name, False))
+
+    # Summary
+    print("\nTest Summary")
+    print("=" * 20)
+
+    passed = 0
+    total = len(results)
+
+    for test_name, result in results:
+        status = "PASS" if result else "FAIL"
+        print(f"{test_name}: {status}")
+        if result:
+            passed += 1
+
+    print(f"\nOverall: {passed}/{total} tests passed")
+
+    if passed == total:
+        print("All tests passed!")
+
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+TTS Preset Test for Face-Gen
+Tests request validation and latency-driven preset selection
+"""
+
+import os
+import sys
+import tempfile
+
+# Add the parent directory to the path so we can import app modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.scripts.tts_presets import PresetTimings, TTSSettingsError, parse_tts_settings, tts_settings_label
+
+def test_parse_settings():
+    """Test that presets and parameters are validated"""
+    print("Parse Settings Test")
+    print("-" * 30)
+
+    settings = parse_tts_settings('fast', {'diffusion_iterations': '50', 'num_autoregressive_samples': ''})
+    assert settings == {'preset': 'fast', 'params': {'diffusion_iterations': 50}, 'target_latency': None}
+    assert parse_tts_settings()['preset'] == 'default'
+    assert parse_tts_settings('auto', target_latency='12')['target_latency'] == 12.0
+    assert tts_settings_label('fast', {'diffusion_iterations': 50}) == 'fast+diffusion_iterations=50'
+
+    for args in [('slowest',), ('fast', {'diffusion_iterations': 0}), ('fast', {'temperature': 1}),
+                 ('auto',), ('auto', None, '-1'), ('auto', {'diffusion_iterations': 10}, '5')]:
+        try:
+            parse_tts_settings(*args)
+        except TTSSettingsError:
+            continue
+        raise AssertionError(f"{args} should be rejected")
+
+    print("PASS: Parse settings")
+    return True
+
+def test_select_preset():
+    """Test that the best preset within the budget is chosen"""
+    print("\nSelect Preset Test")
+    print("-" * 30)
+
+    timings = PresetTimings(path=None)
+    # Nothing measured yet: play safe
+    assert timings.select('cpu', 100, 1000) == 'ultra_fast'
+
+    # fast costs 1 s + 0.1 s per character
+    for chars in (50, 100, 200):
+        timings.record('cpu', 'fast', chars, 1 + 0.1 * chars)
+    assert abs(timings.estimate('cpu', 'fast', 300) - 31) < 1e-6
+    assert timings.estimate('cuda', 'fast', 300) is None
+
+    assert timings.select('cpu', 100, 12) == 'fast'
+    assert timings.select('cpu', 100, 5) == 'ultra_fast'
+    # standard is extrapolated from fast by relative work (456 / 176)
+    assert timings.select('cpu', 100, 11 * 456 / 176 + 1) == 'standard'
+
+    print("PASS: Select preset")
+    return True
+
+def test_timings_persist():
+    """Test that measured timings survive a restart"""
+    print("\nTimings Persist Test")
+    print("-" * 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'timings.json')
+        PresetTimings(path=path).record('cpu', 'ultra_fast', 100, 4.0)
+        timings = PresetTimings(path=path)
+        assert timings.get_stats() == {'cpu': {'ultra_fast': 1}}
+        assert abs(timings.estimate('cpu', 'ultra_fast', 50) - 2.0) < 1e-6
+
+    print("PASS: Timings persist")
+    return True
+
+def test_timings_shared():
+    """Test that processes sharing the timings file keep each other's runs"""
+    print("\nTimings Shared Test")
+    print("-" * 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'timings.json')
+        # One instance per worker process, both loaded before either has run
+        first = PresetTimings(path=path)
+        second = PresetTimings(path=path)
+        first.record('cpu', 'ultra_fast', 100, 4.0)
+        second.record('cpu', 'ultra_fast', 200, 8.0)
+        first.record('cpu', 'fast', 100, 10.0)
+
+        assert PresetTimings(path=path).get_stats() == {'cpu': {'ultra_fast': 2, 'fast': 1}}
+        assert first.get_stats() == {'cpu': {'ultra_fast': 2, 'fast': 1}}
+
+    print("PASS: Timings shared")
+    return True
+
+def main():
+    """Main test function"""
+    print("Face-Gen TTS Preset Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Parse Settings", test_parse_settings),
+        ("Select Preset", test_select_preset),
+        ("Timings Persist", test_timings_persist),
+        ("Timings Shared", test_timings_shared)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"FAIL: {test_name} test - {e}")
+            results.append((test_name, False))
+
+    # Summary
+    print("\nTest Summary")
+    print("=" * 20)
+
+    passed = 0
+    total = len(results)
+
+    for test_name, result in results:
+        status = "PASS" if result else "FAIL"
+        print(f"{test_name}: {status}")
+        if result:
+            passed += 1
+
+    print(f"\nOverall: {passed}/{total} tests passed")
+
+    if passed == total:
+        print("All tests passed!")
+
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
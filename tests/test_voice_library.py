@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Voice Library Test for Face-Gen
+Tests storing, loading and listing conditioning latents of custom voices
+"""
+
+import os
+import sys
+import tempfile
+import torch
+
+# Add the parent directory to the path so we can import app modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.scripts.voice_library import VoiceLibrary, VoiceNotFoundError, DEFAULT_VOICE
+
+def make_latents():
+    """Random latents shaped like Tortoise's (autoregressive, diffusion) pair"""
+    return torch.randn(1, 1024), torch.randn(1, 2048)
+
+def assert_latents_match(loaded, latents):
+    for tensor, expected in zip(loaded, latents):
+        assert tensor.shape == expected.shape
+        assert tensor.dtype == torch.float32
+        # Stored as float16, so values come back within half precision
+        assert torch.allclose(tensor, expected, rtol=1e-3, atol=1e-3)
+
+def test_add_and_load():
+    """Test that added latents come back with their shapes and values"""
+    print("Add And Load Test")
+    print("-" * 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        library = VoiceLibrary(tmp)
+        latents = make_latents()
+        voice = library.add('Alice', latents)
+
+        assert voice['name'] == 'Alice'
+        assert library.has(voice['id'])
+        assert library.has(DEFAULT_VOICE) and library.has(None)
+        assert not library.has('unknown')
+        assert library.get_latents(DEFAULT_VOICE) is None
+        assert_latents_match(library.get_latents(voice['id']), latents)
+
+        second = library.add('Bob', make_latents())
+        assert [entry['id'] for entry in library.list_voices()] == [voice['id'], second['id']]
+        assert library.get_stats()['voices'] == 2
+
+    print("PASS: Add and load")
+    return True
+
+def test_persistence():
+    """Test that a new instance reads the voices stored on disk"""
+    print("\nPersistence Test")
+    print("-" * 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        latents = make_latents()
+        voice = VoiceLibrary(tmp).add('Alice', latents)
+
+        library = VoiceLibrary(tmp)
+        assert library.has(voice['id'])
+        assert library.list_voices() == [voice]
+        assert library.get_stats()['loaded'] == 0
+        assert_latents_match(library.get_latents(voice['id']), latents)
+        assert library.get_stats()['loaded'] == 1
+
+    print("PASS: Persistence")
+    return True
+
+def test_voice_added_elsewhere():
+    """Test that a voice registered by another instance is found without a restart"""
+    print("\nVoice Added Elsewhere Test")
+    print("-" * 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Like a worker process that loaded the library before the voice was registered
+        worker = VoiceLibrary(tmp)
+        web = VoiceLibrary(tmp)
+        first = web.add('Alice', make_latents())
+        latents = make_latents()
+        second = web.add('Bob', latents)
+
+        assert worker.has(first['id'])
+        assert_latents_match(worker.get_latents(second['id']), latents)
+
+        # Adding through the stale instance keeps the voices added elsewhere
+        third = worker.add('Carol', make_latents())
+        voice_ids = [voice['id'] for voice in VoiceLibrary(tmp).list_voices()]
+        assert voice_ids == [first['id'], second['id'], third['id']]
+
+    print("PASS: Voice added elsewhere")
+    return True
+
+def test_unknown_voice():
+    """Test that unknown voices raise VoiceNotFoundError"""
+    print("\nUnknown Voice Test")
+    print("-" * 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        library = VoiceLibrary(tmp)
+        try:
+            library.get_latents('unknown')
+            raise AssertionError("an unknown voice should raise VoiceNotFoundError")
+        except VoiceNotFoundError:
+            pass
+
+    print("PASS: Unknown voice")
+    return True
+
+def main():
+    """Main test function"""
+    print("Face-Gen Voice Library Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Add And Load", test_add_and_load),
+        ("Persistence", test_persistence),
+        ("Voice Added Elsewhere", test_voice_added_elsewhere),
+        ("Unknown Voice", test_unknown_voice)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"FAIL: {test_name} test - {e}")
+            results.append((test_name, False))
+
+    # Summary
+    print("\nTest Summary")
+    print("=" * 20)
+
+    passed = 0
+    total = len(results)
+
+    for test_name, result in results:
+        status = "PASS" if result else "FAIL"
+        print(f"{test_name}: {status}")
+        if result:
+            passed += 1
+
+    print(f"\nOverall: {passed}/{total} tests passed")
+
+    if passed == total:
+        print("All tests passed!")
+
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Worker Pool Test for Face-Gen
+Tests how CPUs are divided between pipeline worker processes
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+
+# Add the parent directory to the path so we can import app modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.scripts.worker_pool import PipelineWorkerPool, split_cpus
+
+def test_split_cpus():
+    """Test that every worker gets its own contiguous block of CPUs"""
+    print("Split CPUs Test")
+    print("-" * 30)
+
+    assert split_cpus(list(range(8)), 2) == [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert split_cpus(list(range(7)), 3) == [[0, 1, 2], [3, 4], [5, 6]]
+    # Affinity masks need not start at 0 or be contiguous
+    assert split_cpus([2, 3, 6, 7], 2) == [[2, 3], [6, 7]]
+
+    print("PASS: Split CPUs")
+    return True
+
+def test_more_workers_than_cpus():
+    """Test that no worker is left with an empty CPU set"""
+    print("\nMore Workers Than CPUs Test")
+    print("-" * 30)
+
+    blocks = split_cpus([0, 1], 3)
+    assert blocks == [[0], [1], [0]]
+    assert all(blocks)
+
+    print("PASS: More workers than CPUs")
+    return True
+
+def test_dead_worker_metrics():
+    """Test that live gauge files of exited workers are removed on shutdown"""
+    print("\nDead Worker Metrics Test")
+    print("-" * 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        previous = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+        os.environ['PROMETHEUS_MULTIPROC_DIR'] = tmp
+        try:
+            # PID of a process that has already exited, standing in for a worker
+            process = subprocess.Popen([sys.executable, '-c', 'pass'])
+            process.wait()
+            live = os.path.join(tmp, f'gauge_livesum_{process.pid}.db')
+            counter = os.path.join(tmp, f'counter_{process.pid}.db')
+            for path in (live, counter):
+                open(path, 'wb').close()
+
+            # No worker process is started until a job is submitted
+            pool = PipelineWorkerPool(1, 1)
+            pool._pids.add(process.pid)
+            pool.shutdown()
+            assert not os.path.exists(live)
+            # Counters keep counting what dead workers did
+            assert os.path.exists(counter)
+        finally:
+            if previous is None:
+                del os.environ['PROMETHEUS_MULTIPROC_DIR']
+            else:
+                os.environ['PROMETHEUS_MULTIPROC_DIR'] = previous
+
+    print("PASS: Dead worker metrics")
+    return True
+
+def main():
+    """Main test function"""
+    print("Face-Gen Worker Pool Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Split CPUs", test_split_cpus),
+        ("More Workers Than CPUs", test_more_workers_than_cpus),
+        ("Dead Worker Metrics", test_dead_worker_metrics)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"FAIL: {test_name} test - {e}")
+            results.append((test_name, False))
+
+    # Summary
+    print("\nTest Summary")
+    print("=" * 20)
+
+    passed = 0
+    total = len(results)
+
+    for test_name, result in results:
+        status = "PASS" if result else "FAIL"
+        print(f"{test_name}: {status}")
+        if result:
+            passed += 1
+
+    print(f"\nOverall: {passed}/{total} tests passed")
+
+    if passed == total:
+        print("All tests passed!")
+
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
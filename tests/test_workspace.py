@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Workspace Test for Face-Gen
+Tests per-job scratch directories, atomic publishing and cleanup
+"""
+
+import os
+import sys
+import tempfile
+
+# Add the parent directory to the path so we can import app modules
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from app.scripts.workspace import JobWorkspace, new_job_id
+
+def test_unique_workspaces():
+    """Test that concurrent jobs get separate directories"""
+    print("Unique Workspace Test")
+    print("-" * 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ids = {new_job_id() for _ in range(1000)}
+        assert len(ids) == 1000
+
+        first = JobWorkspace(root=tmp)
+        second = JobWorkspace(root=tmp)
+        assert first.path != second.path
+        assert first.file('audio.wav') != second.file('audio.wav')
+
+    print("PASS: Unique workspaces")
+    return True
+
+def test_publish_and_cleanup():
+    """Test that published files survive and intermediates are removed"""
+    print("\nPublish And Cleanup Test")
+    print("-" * 30)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dest = os.path.join(tmp, 'video', 'video_1.mp4')
+        with JobWorkspace(root=os.path.join(tmp, 'work')) as workspace:
+            with open(workspace.file('video.mp4'), 'wb') as f:
+                f.write(b'video')
+            with open(workspace.file('temp.avi'), 'wb') as f:
+                f.write(b'intermediate')
+            workspace.publish('video.mp4', dest)
+
+        assert not os.path.exists(workspace.path)
+        with open(dest, 'rb') as f:
+            assert f.read() == b'video'
+
+        # Failed jobs are cleaned up too
+        try:
+            with JobWorkspace(root=os.path.join(tmp, 'work')) as workspace:
+                raise RuntimeError('render failed')
+        except RuntimeError:
+            pass
+        assert not os.path.exists(workspace.path)
+
+    print("PASS: Publish and cleanup")
+    return True
+
+def main():
+    """Main test function"""
+    print("Face-Gen Workspace Test Suite")
+    print("=" * 50)
+
+    tests = [
+        ("Unique Workspaces", test_unique_workspaces),
+        ("Publish And Cleanup", test_publish_and_cleanup)
+    ]
+
+    results = []
+    for test_name, test_func in tests:
+        try:
+            result = test_func()
+            results.append((test_name, result))
+        except Exception as e:
+            print(f"FAIL: {test_name} test - {e}")
+            results.append((test_name, False))
+
+    # Summary
+    print("\nTest Summary")
+    print("=" * 20)
+
+    passed = 0
+    total = len(results)
+
+    for test_name, result in results:
+        status = "PASS" if result else "FAIL"
+        print(f"{test_name}: {status}")
+        if result:
+            passed += 1
+
+    print(f"\nOverall: {passed}/{total} tests passed")
+
+    if passed == total:
+        print("All tests passed!")
+
+    return passed == total
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)